@@ -1,10 +1,11 @@
 """API routes."""
 
 from fastapi import APIRouter
-from app.api import auth, coins, categories
+from app.api import auth, coins, categories, stream
 
 router = APIRouter()
 
 router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 router.include_router(coins.router, prefix="/coins", tags=["coins"])
 router.include_router(categories.router, prefix="/categories", tags=["categories"])
+router.include_router(stream.router, prefix="/stream", tags=["streaming"])
@@ -1,8 +1,10 @@
 """Authentication endpoints."""
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from app.core.security import create_access_token
+from app.core.security import create_access_token, decode_token, revoke_token, security
+from app.services.users import user_service
 
 
 router = APIRouter()
@@ -25,11 +27,20 @@ class TokenResponse(BaseModel):
 @router.post("/token", response_model=TokenResponse)
 async def login(request: TokenRequest):
     """Generate JWT token for authentication."""
-    if request.username == "admin" and request.password == "admin123":
-        access_token = create_access_token(data={"sub": request.username})
+    user = await user_service.authenticate(request.username, request.password)
+    if user is not None:
+        access_token = create_access_token(data={"sub": user.username})
         return {"access_token": access_token, "token_type": "bearer"}
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Incorrect username or password",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Revoke the bearer token of this request until it expires."""
+    decode_token(credentials.credentials)
+    revoke_token(credentials.credentials)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
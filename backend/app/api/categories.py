@@ -1,18 +1,37 @@
 """Category endpoints."""
 
-from fastapi import APIRouter, Depends
-from typing import List, Dict, Any
-from app.services.coingecko import coingecko_service
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
+from app.core.responses import payload_response
+from app.services.category_index import SORTS
+from app.services.market import market_service, served_stale
 from app.core.security import verify_token
 
 router = APIRouter()
 
 
 @router.get("", dependencies=[Depends(verify_token)])
-async def get_categories() -> List[Dict[str, Any]]:
+async def get_categories(
+    request: Request,
+    sort: Optional[str] = Query(None, pattern="^(" + "|".join(SORTS) + ")$"),
+    search: Optional[str] = Query(None, min_length=1, max_length=100),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+) -> Response:
     """
     Get list of cryptocurrency categories.
 
     Returns category information including market cap and top coins.
+
+    - **sort**: ``market_cap``, ``market_cap_change_24h`` or ``volume_24h``
+      (largest first) or ``name`` (A-Z); upstream order by default
+    - **search**: Only categories whose name contains this text
+    - **limit**: Most categories to return (default: all)
+    - **offset**: Categories to skip (default: 0)
+
+    The ``ETag`` / ``If-None-Match`` handshake works as for ``/api/coins``.
     """
-    return coingecko_service.get_categories()
+    payload = await market_service.get_categories_payload(
+        sort=sort, search=search, limit=limit, offset=offset
+    )
+    return await payload_response(request, payload, served_stale())
@@ -1,36 +1,155 @@
 """Cryptocurrency endpoints."""
 
-from fastapi import APIRouter, Depends, Query
-from typing import List, Dict, Any
-from app.services.coingecko import coingecko_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import Optional
+from app.core.config import settings
+from app.core.responses import payload_response
+from app.db.repository import HISTORY_RANGES
+from app.services.coin_index import ORDERS
+from app.services.coin_search import MAX_RESULTS
+from app.services.market import BATCH_VIEWS, market_service, served_stale
+from app.services.projection import SPARKLINE_MODES, Projection, parse_fields
 from app.core.security import verify_token
 
 router = APIRouter()
 
 
+def get_projection(
+    fields: Optional[str] = Query(None, max_length=1000),
+    sparkline_points: Optional[int] = Query(None, ge=2, le=168),
+    sparkline_mode: str = Query(
+        "lttb", pattern="^(" + "|".join(SPARKLINE_MODES) + ")$"
+    ),
+) -> Projection:
+    """Build the response projection from the shared query options."""
+    return Projection(parse_fields(fields), sparkline_points, sparkline_mode)
+
+
 @router.get("", dependencies=[Depends(verify_token)])
 async def get_coins(
+    request: Request,
     page_num: int = Query(1, alias="page_num", ge=1),
     per_page: int = Query(10, alias="per_page", ge=1, le=100),
     vs_currency: str = Query("inr", alias="vs_currency"),
-) -> List[Dict[str, Any]]:
+    order: Optional[str] = Query(None, pattern="^(" + "|".join(ORDERS) + ")$"),
+    symbol_prefix: Optional[str] = Query(None, min_length=1, max_length=20),
+    projection: Projection = Depends(get_projection),
+) -> Response:
     """
     Get paginated list of cryptocurrencies.
 
     - **page_num**: Page number (default: 1)
     - **per_page**: Items per page (default: 10, max: 100)
     - **vs_currency**: Currency for prices (inr, cad, usd)
+    - **order**: Sort order (default: market_cap_desc)
+    - **symbol_prefix**: Only coins whose symbol starts with this prefix
+    - **fields**: Comma separated fields to return (``id`` is always kept)
+    - **sparkline_points**: Downsample 7d sparklines to this many points
+    - **sparkline_mode**: Downsampling method, ``lttb`` (default) or ``stride``
+
+    Responses carry an ``ETag``; send it back in ``If-None-Match`` to get a
+    304 until the data is refreshed.
+    """
+    payload = await market_service.get_coins_market_payload(
+        vs_currency=vs_currency,
+        page=page_num,
+        per_page=per_page,
+        order=order,
+        symbol_prefix=symbol_prefix,
+        projection=projection,
+    )
+    return await payload_response(request, payload, served_stale())
+
+
+@router.get("/batch", dependencies=[Depends(verify_token)])
+async def get_coins_batch(
+    request: Request,
+    ids: str = Query(..., min_length=1, max_length=5000),
+    vs_currency: str = Query("inr", alias="vs_currency"),
+    view: str = Query("market", pattern="^(" + "|".join(BATCH_VIEWS) + ")$"),
+    projection: Projection = Depends(get_projection),
+) -> Response:
+    """
+    Get many cryptocurrencies in one request.
+
+    - **ids**: Comma separated CoinGecko coin identifiers
+    - **vs_currency**: Currency for prices of the ``market`` view
+    - **view**: ``market`` (default) for markets rows, fetched together in
+      one upstream call, or ``details`` for full coin details
+    - **fields**, **sparkline_points**, **sparkline_mode**: As for single coins
+
+    Coins that could not be served are listed under ``errors`` with a status
+    and detail; the others are returned under ``data``.
     """
-    return coingecko_service.get_coins_market(
-        vs_currency=vs_currency, page=page_num, per_page=per_page
+    coin_ids = [coin_id.strip() for coin_id in ids.split(",") if coin_id.strip()]
+    if not coin_ids or len(coin_ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provide between 1 and {settings.BATCH_MAX_IDS} coin ids",
+        )
+    payload = await market_service.get_coins_batch_payload(
+        coin_ids, vs_currency, view, projection
     )
+    return await payload_response(request, payload, served_stale())
+
+
+@router.get("/search", dependencies=[Depends(verify_token)])
+async def search_coins(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=MAX_RESULTS),
+) -> Response:
+    """
+    Find coins by the start of their symbol, name or id.
+
+    - **q**: Prefix to look up, e.g. ``eth`` or ``bitc``
+    - **limit**: Most coins to return (default: 10, max: 50)
+
+    Matches are listed with their ``id``, ``symbol``, ``name`` and
+    ``market_cap_rank``, highest market cap first; coins outside the top
+    ``COIN_INDEX_SIZE`` come last with no rank.
+    """
+    payload = await market_service.search_coins_payload(q, limit)
+    return await payload_response(request, payload, served_stale())
 
 
 @router.get("/{coin_id}", dependencies=[Depends(verify_token)])
-async def get_coin_details(coin_id: str) -> Dict[str, Any]:
+async def get_coin_details(
+    request: Request, coin_id: str, projection: Projection = Depends(get_projection)
+) -> Response:
     """
     Get detailed information for a specific cryptocurrency.
 
     - **coin_id**: CoinGecko coin identifier (e.g., 'bitcoin')
+    - **fields**: Comma separated top-level fields to return
+    - **sparkline_points**: Downsample the 7d sparkline to this many points
+    - **sparkline_mode**: Downsampling method, ``lttb`` (default) or ``stride``
+    """
+    payload = await market_service.get_coin_details_payload(coin_id, projection)
+    return await payload_response(request, payload, served_stale())
+
+
+@router.get("/{coin_id}/history", dependencies=[Depends(verify_token)])
+async def get_coin_history(
+    request: Request,
+    coin_id: str,
+    range_: str = Query(
+        "7d", alias="range", pattern="^(" + "|".join(HISTORY_RANGES) + ")$"
+    ),
+    vs_currency: str = Query("inr", alias="vs_currency"),
+) -> Response:
     """
-    return coingecko_service.get_coin_details(coin_id)
+    Get OHLC price candles of a cryptocurrency from the local history.
+
+    - **coin_id**: CoinGecko coin identifier (e.g., 'bitcoin')
+    - **range**: ``1d`` (5 minute candles), ``7d`` (hourly, default), ``30d``
+      (4 hourly) or ``1y`` (daily)
+    - **vs_currency**: Currency for prices (inr, cad, usd)
+
+    Candles are ``[time_ms, open, high, low, close]`` lists, oldest first,
+    recorded from market refreshes of the top ``COIN_INDEX_SIZE`` coins.
+    """
+    payload = await market_service.get_coin_history_payload(
+        coin_id, vs_currency, range_
+    )
+    return await payload_response(request, payload, served_stale())
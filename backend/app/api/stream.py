@@ -0,0 +1,97 @@
+"""Price streaming over WebSocket."""
+
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, WebSocket, status
+from app.core.config import settings
+from app.core.security import decode_token
+from app.services.projection import parse_fields
+from app.services.streaming import STREAM_FIELDS, StreamKey, price_streamer
+
+router = APIRouter()
+
+
+def _bearer_token(websocket: WebSocket, token: Optional[str]) -> Optional[str]:
+    """Return the token from the query string or the Authorization header.
+
+    Browsers cannot set headers on WebSocket connections, hence the query
+    parameter.
+    """
+    if token:
+        return token
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    return credentials if scheme.lower() == "bearer" and credentials else None
+
+
+@router.websocket("")
+async def stream_prices(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    ids: Optional[str] = None,
+    vs_currency: str = "inr",
+    page_num: int = 1,
+    per_page: int = 10,
+    fields: Optional[str] = None,
+):
+    """
+    Stream market data for coin ids, or for one page, as JSON messages.
+
+    - **token**: Access token, unless sent as an ``Authorization`` header
+    - **ids**: Comma separated coin ids; without it ``page_num`` and
+      ``per_page`` select a page by market cap
+    - **vs_currency**: Currency for prices
+    - **fields**: Comma separated fields to stream (``id`` is always kept)
+
+    The first message is a ``snapshot`` of every row; later ``diff``
+    messages carry new and changed rows, removed ids and, when it changed,
+    the new ``order``.
+    """
+    token = _bearer_token(websocket, token)
+    try:
+        decode_token(token or "")
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    coin_ids = None
+    if ids is not None:
+        coin_ids = [coin_id.strip() for coin_id in ids.lower().split(",")]
+        coin_ids = [coin_id for coin_id in coin_ids if coin_id]
+    if (
+        (coin_ids is not None and not 0 < len(coin_ids) <= settings.BATCH_MAX_IDS)
+        or page_num < 1
+        or not 1 <= per_page <= 100
+    ):
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Invalid subscription"
+        )
+        return
+    key = StreamKey(
+        currency=vs_currency.lower(),
+        ids=None if coin_ids is None else tuple(dict.fromkeys(coin_ids)),
+        page=page_num,
+        per_page=per_page,
+        fields=tuple(parse_fields(fields) or STREAM_FIELDS),
+    )
+    await websocket.accept()
+    try:
+        subscription = await price_streamer.subscribe(key)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=e.detail)
+        return
+
+    async def send() -> None:
+        while True:
+            await websocket.send_text(await subscription.queue.get())
+
+    async def receive() -> None:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.ensure_future(send()), asyncio.ensure_future(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        price_streamer.unsubscribe(subscription)
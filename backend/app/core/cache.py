@@ -0,0 +1,169 @@
+"""In-process caching primitives."""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    """Counters describing cache effectiveness."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups answered from the cache, stale answers included."""
+        served = self.hits + self.stale_hits
+        lookups = served + self.misses
+        return served / lookups if lookups else 0.0
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with its freshness deadlines."""
+
+    value: Any
+    fresh_until: float
+    expires_at: float
+    weight: int = 0
+
+    def is_stale(self, now: float) -> bool:
+        """Whether the soft TTL has passed."""
+        return now >= self.fresh_until
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry TTL.
+
+    An entry can outlive its TTL by a ``grace`` period during which
+    :meth:`lookup` still returns it, flagged as stale, so callers can serve it
+    while revalidating. :meth:`get` only ever returns fresh values. With
+    ``maxbytes``, entries are also evicted to keep the sum of their
+    ``weigh`` results under it.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+        maxbytes: Optional[int] = None,
+        weigh: Optional[Callable[[Any], int]] = None,
+    ):
+        """Initialize an empty cache holding at most ``maxsize`` entries."""
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.stats = CacheStats()
+        self._clock = clock
+        self._weigh = weigh
+        self._bytes = 0
+        self._data: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of stored entries, expired ones included."""
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the total weight of the stored entries."""
+        return self._bytes
+
+    def now(self) -> float:
+        """Return the current time on the cache clock."""
+        return self._clock()
+
+    def _live_entry(self, key: Hashable) -> Tuple[Optional[CacheEntry], float]:
+        """Return the unexpired entry for ``key`` and the lookup time."""
+        now = self._clock()
+        entry = self._data.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._remove(key)
+            self.stats.expirations += 1
+            entry = None
+        return entry, now
+
+    def lookup(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for ``key``, fresh or stale, unless it expired."""
+        entry, now = self._live_entry(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        if entry.is_stale(now):
+            self.stats.stale_hits += 1
+        else:
+            self.stats.hits += 1
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the fresh value for ``key`` or ``default``."""
+        entry, now = self._live_entry(key)
+        if entry is None or entry.is_stale(now):
+            self.stats.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: float, grace: float = 0) -> None:
+        """Store ``value`` for ``ttl`` seconds plus an optional stale ``grace``.
+
+        The least recently used entry is evicted when the cache is full.
+        """
+        now = self._clock()
+        weight = 0 if self._weigh is None else self._weigh(value)
+        self.delete(key)
+        self._data[key] = CacheEntry(value, now + ttl, now + ttl + grace, weight)
+        self._bytes += weight
+        while len(self._data) > self.maxsize or (
+            self.maxbytes is not None and self._bytes > self.maxbytes
+        ):
+            _, evicted = self._data.popitem(last=False)
+            self._bytes -= evicted.weight
+            self.stats.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """Drop the entry of ``key``, which must be present."""
+        self._bytes -= self._data.pop(key).weight
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return the stored value for ``key``, even if expired.
+
+        Neither counts as a lookup nor marks the entry as recently used.
+        """
+        entry = self._data.get(key)
+        return default if entry is None else entry.value
+
+    def delete(self, key: Hashable) -> None:
+        """Drop ``key`` if present."""
+        if key in self._data:
+            self._remove(key)
+
+    def prune(self, predicate: Callable[[Any], bool]) -> int:
+        """Drop every entry whose value matches ``predicate``; return how many."""
+        doomed = [key for key, entry in self._data.items() if predicate(entry.value)]
+        for key in doomed:
+            self._remove(key)
+        return len(doomed)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        self._data.clear()
+        self._bytes = 0
+        self.stats = CacheStats()
+
+    def info(self) -> Dict[str, Any]:
+        """Return counters and sizing as a plain dictionary."""
+        return {
+            **asdict(self.stats),
+            "hit_ratio": round(self.stats.hit_ratio, 4),
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "maxbytes": self.maxbytes,
+        }
@@ -0,0 +1,431 @@
+"""Minimal Prometheus-style metrics registry and exposition.
+
+Metrics are updated from the event loop thread without locks: an update is
+a dict lookup plus a few integer or float additions, and no objects are
+allocated once a label set has been seen. The rare update from a worker
+thread may race with another and lose an increment, which is acceptable
+for monitoring data.
+"""
+
+from bisect import bisect_left
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.cache import TTLCache
+
+LabelValues = Tuple[str, ...]
+
+# State kept per label set, such as a value or histogram buckets
+Child = TypeVar("Child")
+
+# Request latencies, from sub-millisecond cache hits to upstream timeouts
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render a label set as ``{name="value",...}``."""
+    if not names:
+        return ""
+    pairs = (f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(Generic[Child]):
+    """Base class holding one child per label set."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        """Initialize metric."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children: Dict[LabelValues, Child] = {}
+
+    def _new_child(self) -> Child:
+        """Create the state of a new label set."""
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Child:
+        """Return the child for one label set, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield ``(suffix, labels, value)`` samples."""
+        raise NotImplementedError
+
+    def expose(self) -> List[str]:
+        """Render the metric in the text exposition format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class _Value:
+    """A single counter or gauge value."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        """Initialize at zero."""
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Add ``amount``."""
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Subtract ``amount``."""
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        """Replace the value."""
+        self.value = value
+
+
+class Counter(_Metric[_Value]):
+    """Monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        """Create a zero counter."""
+        return _Value()
+
+    def inc(self, *values: str, amount: float = 1.0) -> None:
+        """Increment the counter of one label set."""
+        self.labels(*values).inc(amount)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield one ``_total`` sample per label set."""
+        for values, child in self._children.items():
+            yield "_total", _format_labels(self.label_names, values), child.value
+
+
+class Gauge(Counter):
+    """Value that can go up and down per label set."""
+
+    kind = "gauge"
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield one sample per label set."""
+        for values, child in self._children.items():
+            yield "", _format_labels(self.label_names, values), child.value
+
+
+class _Buckets:
+    """Per-bucket counts, sum and count of one histogram label set."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        """Initialize empty buckets plus the ``+Inf`` overflow bucket."""
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric[_Buckets]):
+    """Distribution of observed values in fixed buckets per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """Initialize histogram with sorted upper bounds ``buckets``."""
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _Buckets:
+        """Create empty buckets."""
+        return _Buckets(len(self.buckets))
+
+    def observe(self, value: float, *values: str) -> None:
+        """Record ``value`` for one label set."""
+        child = self.labels(*values)
+        child.counts[bisect_left(self.buckets, value)] += 1
+        child.sum += value
+        child.count += 1
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield cumulative ``_bucket`` samples plus ``_sum`` and ``_count``."""
+        names = self.label_names + ("le",)
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                labels = _format_labels(names, values + (_format_value(bound),))
+                yield "_bucket", labels, cumulative
+            labels = _format_labels(self.label_names, values)
+            yield "_sum", labels, child.sum
+            yield "_count", labels, child.count
+
+
+M = TypeVar("M", bound=_Metric[Any])
+
+
+class Registry:
+    """Metrics plus callbacks that refresh derived gauges at scrape time."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, _Metric[Any]] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: M) -> M:
+        """Add ``metric`` and return it."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labels: Iterable[str] = ()
+    ) -> Counter:
+        """Register a counter."""
+        return self.register(Counter(name, documentation, tuple(labels)))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        """Register a gauge."""
+        return self.register(Gauge(name, documentation, tuple(labels)))
+
+    def histogram(
+        self, name: str, documentation: str, labels: Iterable[str] = ()
+    ) -> Histogram:
+        """Register a latency histogram."""
+        return self.register(Histogram(name, documentation, tuple(labels)))
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        """Run ``collector`` before every exposition."""
+        self._collectors.append(collector)
+
+    def expose(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests", "HTTP requests served.", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route")
+)
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being served."
+).labels()
+upstream_requests = registry.counter(
+    "coingecko_requests", "CoinGecko requests sent.", ("endpoint", "status")
+)
+upstream_duration = registry.histogram(
+    "coingecko_request_duration_seconds", "CoinGecko request latency.", ("endpoint",)
+)
+jwt_verification_duration = registry.histogram(
+    "jwt_verification_duration_seconds",
+    "Bearer token verification time.",
+    ("result",),
+)
+cache_lookups = registry.counter(
+    "cache_lookups", "Cache lookups by outcome.", ("cache", "result")
+)
+cache_hit_ratio = registry.gauge(
+    "cache_hit_ratio", "Share of lookups served from the cache.", ("cache",)
+)
+cache_entries = registry.gauge("cache_entries", "Entries held.", ("cache",))
+cache_bytes = registry.gauge(
+    "cache_bytes", "Bytes held, for caches capped by size.", ("cache",)
+)
+
+
+upstream_retries = registry.counter(
+    "coingecko_retries",
+    "CoinGecko requests retried after a transient failure.",
+    ("endpoint",),
+)
+rate_limit_tokens = registry.gauge(
+    "coingecko_rate_limit_tokens", "Tokens left in the upstream request budget."
+).labels()
+rate_limit_paused = registry.gauge(
+    "coingecko_rate_limit_paused_seconds", "Time left in a pause after a 429."
+).labels()
+rate_limit_waiting = registry.gauge(
+    "coingecko_rate_limit_waiting", "Calls queued for a token.", ("priority",)
+)
+rate_limit_acquired = registry.counter(
+    "coingecko_rate_limit_acquired", "Tokens spent.", ("priority",)
+)
+rate_limit_rejected = registry.counter(
+    "coingecko_rate_limit_rejected", "Calls refused rather than queued too long."
+).labels()
+rate_limit_throttled = registry.counter(
+    "coingecko_rate_limit_throttled", "429 answers from CoinGecko."
+).labels()
+rate_limit_wait = registry.counter(
+    "coingecko_rate_limit_wait_seconds", "Time spent waiting for tokens."
+).labels()
+circuit_state = registry.gauge(
+    "coingecko_circuit_state", "1 for the current circuit breaker state.", ("state",)
+)
+circuit_opened = registry.counter(
+    "coingecko_circuit_opened", "Times the circuit breaker opened."
+).labels()
+circuit_short_circuited = registry.counter(
+    "coingecko_circuit_short_circuited", "Calls failed fast by an open breaker."
+).labels()
+
+
+def track_rate_governor(governor: Any) -> None:
+    """Export the budget and queue of a ``RateGovernor`` at every scrape."""
+
+    def collect() -> None:
+        info = governor.info()
+        rate_limit_tokens.set(info["tokens"])
+        rate_limit_paused.set(info["paused_for_seconds"])
+        for priority, waiting in info["waiting"].items():
+            rate_limit_waiting.labels(priority).set(waiting)
+        for priority, acquired in info["acquired"].items():
+            rate_limit_acquired.labels(priority).set(acquired)
+        rate_limit_rejected.set(info["rejected"])
+        rate_limit_throttled.set(info["throttled"])
+        rate_limit_wait.set(info["wait_seconds"])
+
+    registry.on_collect(collect)
+
+
+def track_circuit_breaker(breaker: Any) -> None:
+    """Export the state and counters of a ``CircuitBreaker`` at every scrape."""
+    states = [circuit_state.labels(state) for state in breaker.STATES]
+
+    def collect() -> None:
+        current = breaker.state
+        for state, gauge in zip(breaker.STATES, states):
+            gauge.set(1 if state == current else 0)
+        circuit_opened.set(breaker.opened)
+        circuit_short_circuited.set(breaker.short_circuited)
+
+    registry.on_collect(collect)
+
+
+def track_cache(name: str, cache: TTLCache) -> None:
+    """Export the statistics of ``cache`` under ``name`` at every scrape.
+
+    Reading the counters at scrape time keeps the cache hot path untouched.
+    """
+    hits = cache_lookups.labels(name, "hit")
+    stale_hits = cache_lookups.labels(name, "stale_hit")
+    misses = cache_lookups.labels(name, "miss")
+    ratio = cache_hit_ratio.labels(name)
+    entries = cache_entries.labels(name)
+    size = cache_bytes.labels(name) if cache.maxbytes is not None else None
+
+    def collect() -> None:
+        stats = cache.stats
+        hits.set(stats.hits)
+        stale_hits.set(stats.stale_hits)
+        misses.set(stats.misses)
+        ratio.set(stats.hit_ratio)
+        entries.set(len(cache))
+        if size is not None:
+            size.set(cache.nbytes)
+
+    registry.on_collect(collect)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and concurrency.
+
+    Requests are labelled with the matched route template rather than the
+    raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Wrap the ASGI ``app``."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve one ASGI connection."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_request_duration.observe(elapsed, method, path)
+            http_requests.inc(method, path, _status_text(status))
+
+
+_STATUS_TEXT = {code: str(code) for code in range(100, 600)}
+
+
+def _status_text(status: int) -> str:
+    """Return ``status`` as a label value without allocating."""
+    return _STATUS_TEXT.get(status) or str(status)
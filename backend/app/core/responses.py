@@ -0,0 +1,160 @@
+"""Pre-serialized, pre-compressed JSON responses with strong ETags."""
+
+import gzip
+from hashlib import blake2b
+from typing import Any, Callable, Dict, Iterator, Optional
+import brotli
+import orjson
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+# Content codings by name, in order of preference
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    "br": lambda body: brotli.compress(
+        body, mode=brotli.MODE_TEXT, quality=settings.COMPRESSION_BROTLI_QUALITY
+    ),
+    "gzip": lambda body: gzip.compress(
+        body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+    ),
+}
+
+
+class Payload:
+    """A JSON body encoded once and reused for every matching request.
+
+    The ETag is a digest of the encoded body, so it changes exactly when a
+    refresh changes the data and is the same in every worker. Compressed
+    variants are made on first use and kept with the payload, so each is
+    compressed once per data version.
+    """
+
+    __slots__ = ("body", "etag", "variants")
+
+    def __init__(self, body: bytes):
+        """Initialize payload from encoded JSON bytes."""
+        self.body = body
+        self.etag = '"' + blake2b(body, digest_size=16).hexdigest() + '"'
+        self.variants: Dict[str, bytes] = {}
+
+    @classmethod
+    def encode(cls, content: Any) -> "Payload":
+        """Serialize ``content`` with orjson."""
+        return cls(orjson.dumps(content))
+
+    @property
+    def compressible(self) -> bool:
+        """Whether the body is large enough to be sent compressed."""
+        return len(self.body) >= settings.COMPRESSION_MIN_BYTES
+
+    @property
+    def footprint(self) -> int:
+        """Return an upper bound of the bytes held once every variant is made.
+
+        JSON never compresses to more than its own size, give or take a few
+        header bytes, so each variant is counted at the size of the body.
+        """
+        codings = len(COMPRESSORS) if self.compressible else 0
+        return len(self.body) * (1 + codings)
+
+    def compress(self, encoding: str) -> bytes:
+        """Return the body compressed with ``encoding``, compressing it once."""
+        body = self.variants.get(encoding)
+        if body is None:
+            body = self.variants[encoding] = COMPRESSORS[encoding](self.body)
+        return body
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Return the ETag of the ``encoding`` variant, ``None`` for the body."""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def etags(self) -> Iterator[str]:
+        """Yield the ETag of every variant."""
+        yield self.etag
+        for encoding in COMPRESSORS:
+            yield self.etag_for(encoding)
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the preferred coding of ``COMPRESSORS`` allowed by a request.
+
+    Honors ``q`` values, including ``q=0`` and ``*``; ties go to the order
+    of ``COMPRESSORS``. ``None`` means the body is sent uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in COMPRESSORS:
+        weight = weights.get(encoding, default)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag``."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+STALE_HEADER = "X-Data-Stale"
+# Compressions in progress; keyed on payload ids, which cannot be reused
+# while a compression still holds its payload
+compressions = SingleFlight()
+
+
+async def _variant(payload: Payload, encoding: str) -> bytes:
+    """Return the ``encoding`` variant, compressed once for concurrent requests."""
+    body = payload.variants.get(encoding)
+    if body is None:
+        body = await compressions.do(
+            (id(payload), encoding),
+            lambda: run_in_threadpool(payload.compress, encoding),
+        )
+    return body
+
+
+async def payload_response(
+    request: Request, payload: Payload, stale: bool = False
+) -> Response:
+    """Serve ``payload``, or 304 when the client already holds it.
+
+    Bodies of at least ``COMPRESSION_MIN_BYTES`` are sent with the coding
+    negotiated from ``Accept-Encoding``; a variant not compressed yet is
+    compressed in the threadpool. ``stale`` payloads, served past their TTL
+    or while CoinGecko is down, are flagged with an ``X-Data-Stale: true``
+    header.
+    """
+    encoding = None
+    if payload.compressible:
+        encoding = negotiate(request.headers.get("accept-encoding"))
+    headers = {"ETag": payload.etag_for(encoding), "Vary": "Accept-Encoding"}
+    if stale:
+        headers[STALE_HEADER] = "true"
+    if_none_match = request.headers.get("if-none-match")
+    if any(_etag_matches(if_none_match, etag) for etag in payload.etags()):
+        return Response(status_code=304, headers=headers)
+    if encoding is None:
+        body = payload.body
+    else:
+        body = await _variant(payload, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,15 +1,76 @@
 """Security utilities for JWT authentication."""
 
+import asyncio
+import hashlib
+import heapq
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import jwt_verification_duration
+
+
+class RevokedTokens:
+    """Hashes of revoked tokens, each kept until the token itself expires.
+
+    Unlike an LRU cache this never drops a revocation early, so a revoked
+    token cannot become usable again while it is still valid. It is only
+    bounded by the number of tokens revoked within one token lifetime.
+    Revocations live in this process: other workers still accept the token.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        """Initialize an empty revocation list."""
+        self._clock = clock
+        self._expiry: Dict[bytes, float] = {}
+        self._heap: List[Tuple[float, bytes]] = []
+
+    def __len__(self) -> int:
+        """Return the number of remembered revocations."""
+        return len(self._expiry)
+
+    def __contains__(self, key: bytes) -> bool:
+        """Whether ``key`` was revoked and has not expired yet."""
+        self._purge()
+        return key in self._expiry
+
+    def add(self, key: bytes, expires_at: float) -> None:
+        """Revoke ``key`` until the wall clock time ``expires_at``."""
+        self._purge()
+        self._expiry[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+    def _purge(self) -> None:
+        """Forget revocations of tokens that have expired."""
+        now = self._clock()
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._expiry.get(key) == expires_at:
+                del self._expiry[key]
+
+    def clear(self) -> None:
+        """Forget every revocation."""
+        self._expiry.clear()
+        self._heap.clear()
+
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+# Keyed on token hashes; entries expire with the token. Both are only used
+# from the event loop, which is why they need no lock.
+verified_tokens = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_ENTRIES, clock=time.time)
+revoked_tokens = RevokedTokens()
+# bcrypt costs ~100-300ms of CPU; at most this many hashes run at once
+password_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password"
+)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -28,20 +89,79 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Verify JWT token from request."""
+def _token_key(token: str) -> bytes:
+    """Return the cache key of ``token``; raw tokens are never kept."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _seconds_left(claims: Dict[str, Any]) -> Optional[float]:
+    """Return the seconds until the ``exp`` claim, if the token has one."""
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        return None
+    return exp - time.time()
+
+
+def _credentials_error() -> HTTPException:
+    """Build the 401 raised for unusable bearer tokens."""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """Return the claims of a valid, unrevoked token.
+
+    Verified claims are cached under a hash of the token until its ``exp``,
+    so repeated requests with the same bearer token skip signature checks.
+    Call it from the event loop only; the caches are not thread safe.
+    """
+    started = time.perf_counter()
+    key = _token_key(token)
+    if key in revoked_tokens:
+        jwt_verification_duration.observe(time.perf_counter() - started, "revoked")
+        raise _credentials_error()
+    claims = verified_tokens.get(key)
+    result = "cached"
+    if claims is None:
+        try:
+            claims = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+        except JWTError:
+            elapsed = time.perf_counter() - started
+            jwt_verification_duration.observe(elapsed, "invalid")
+            raise _credentials_error()
+        ttl = _seconds_left(claims)
+        if ttl is not None and ttl > 0:
+            verified_tokens.set(key, claims, ttl)
+        result = "decoded"
+    jwt_verification_duration.observe(time.perf_counter() - started, result)
+    return dict(claims)
+
+
+def revoke_token(token: str) -> None:
+    """Reject ``token`` in this process from now until it expires.
+
+    Tokens without an ``exp`` claim stay revoked for the process lifetime.
+    """
+    key = _token_key(token)
+    verified_tokens.delete(key)
     try:
-        token = credentials.credentials
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        return payload
+        exp = jwt.get_unverified_claims(token).get("exp")
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        return
+    revoked_tokens.add(key, exp if isinstance(exp, (int, float)) else math.inf)
+
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Verify JWT token from request.
+
+    Async so FastAPI runs it on the event loop rather than in the threadpool.
+    """
+    return decode_token(credentials.credentials)
 
 
 def get_password_hash(password: str) -> str:
@@ -52,3 +172,17 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password in ``password_pool``, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_pool, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in ``password_pool``, off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_pool, verify_password, plain_password, hashed_password
+    )
@@ -0,0 +1,230 @@
+"""Snapshot cache shared by the workers of one deployment.
+
+Snapshots are JSON documents stamped with the time they were fetched and
+kept by a :class:`SharedBackend`. The backend also elects the one worker
+that runs the background refresher, so the others read what it fetched
+instead of calling CoinGecko themselves.
+
+Sharing saves upstream calls and warm-up time, not memory: every worker
+decodes the snapshots it reads into its own in-process cache. The backend
+interface is plain bytes in and out, so a network store such as Redis can
+replace :class:`DirectoryBackend`, which keeps one file per snapshot in a
+directory that is normally on a tmpfs such as ``/dev/shm``. Snapshots are
+never evicted on read, so the refresher leader purges old ones.
+"""
+
+import fcntl
+import os
+import struct
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from hashlib import blake2b
+from pathlib import Path
+from typing import IO, Any, Dict, Hashable, Optional
+import orjson
+
+# Wall clock time at which a snapshot was fetched
+_HEADER = struct.Struct("<d")
+# Lock file of the refresher leadership in a DirectoryBackend
+_LOCK_NAME = "refresher.lock"
+
+
+class SharedBackend(ABC):
+    """Byte store visible to every worker, with a refresher leadership lock."""
+
+    @abstractmethod
+    def read(self, name: str) -> Optional[bytes]:
+        """Return the bytes stored under ``name``, or ``None``."""
+
+    @abstractmethod
+    def write(self, name: str, data: bytes) -> None:
+        """Replace the bytes stored under ``name`` atomically."""
+
+    def purge(self, max_age: float) -> int:
+        """Delete entries written more than ``max_age`` seconds ago.
+
+        Returns how many were deleted. Backends whose entries expire on their
+        own, such as Redis keys written with a TTL, need not override this.
+        """
+        return 0
+
+    @abstractmethod
+    def acquire_leadership(self) -> bool:
+        """Try to become the one worker that refreshes data; may repeat."""
+
+    @abstractmethod
+    def release_leadership(self) -> None:
+        """Give up refresher leadership."""
+
+    @property
+    @abstractmethod
+    def is_leader(self) -> bool:
+        """Whether this process holds refresher leadership."""
+
+
+class DirectoryBackend(SharedBackend):
+    """Files in a local directory, shared by the processes of one host.
+
+    Writers replace files atomically, so readers never see partial data.
+    Leadership is an ``flock`` on a lock file, which the operating system
+    drops when the holding process exits.
+    """
+
+    def __init__(self, directory: str):
+        """Initialize backend; ``directory`` is created on first write."""
+        self.directory = Path(directory)
+        self._lock: Optional[IO[bytes]] = None
+
+    def read(self, name: str) -> Optional[bytes]:
+        """Return the contents of file ``name``, or ``None`` if missing."""
+        try:
+            return (self.directory / name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def write(self, name: str, data: bytes) -> None:
+        """Write file ``name`` through a temporary file and a rename."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(data)
+            os.replace(temporary, self.directory / name)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def purge(self, max_age: float) -> int:
+        """Delete files, including abandoned temporary ones, older than ``max_age``.
+
+        A file's age is that of its last write, the time its snapshot was
+        fetched.
+        """
+        cutoff = time.time() - max_age
+        purged = 0
+        try:
+            paths = list(self.directory.iterdir())
+        except FileNotFoundError:
+            return 0
+        for path in paths:
+            if path.name == _LOCK_NAME:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    purged += 1
+            except FileNotFoundError:
+                continue
+        return purged
+
+    def acquire_leadership(self) -> bool:
+        """Take the directory's lock file without waiting."""
+        if self._lock is not None:
+            return True
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock = open(self.directory / _LOCK_NAME, "wb")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+        self._lock = lock
+        return True
+
+    def release_leadership(self) -> None:
+        """Release the lock file."""
+        lock, self._lock = self._lock, None
+        if lock is not None:
+            lock.close()
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process holds the lock file."""
+        return self._lock is not None
+
+
+class SharedCache:
+    """JSON snapshots keyed by cache key, readable by every worker.
+
+    Reads and writes block on the backend and on JSON coding, so call them
+    from the threadpool when serving requests.
+    """
+
+    def __init__(self, backend: SharedBackend):
+        """Initialize cache on top of ``backend``."""
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.purged = 0
+
+    @classmethod
+    def from_directory(cls, directory: str) -> "SharedCache":
+        """Return a cache kept in ``directory``, see :class:`DirectoryBackend`."""
+        return cls(DirectoryBackend(directory))
+
+    @staticmethod
+    def _name(key: Hashable) -> str:
+        """Return the backend name holding ``key``."""
+        return blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+    def get(self, key: Hashable, max_age: float) -> Optional[Any]:
+        """Return the snapshot of ``key`` if it is at most ``max_age`` old."""
+        value = None
+        try:
+            data = self.backend.read(self._name(key))
+            if data is not None:
+                (fetched_at,) = _HEADER.unpack_from(data)
+                if time.time() - fetched_at <= max_age:
+                    value = orjson.loads(memoryview(data)[_HEADER.size :])
+        except (OSError, ValueError, struct.error):
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Publish ``value`` as the snapshot of ``key``, fetched now."""
+        body = _HEADER.pack(time.time()) + orjson.dumps(value)
+        self.backend.write(self._name(key), body)
+        self.writes += 1
+
+    def purge(self, max_age: float) -> int:
+        """Delete snapshots fetched more than ``max_age`` seconds ago.
+
+        Nothing else removes snapshots, so the refresher leader calls this
+        to bound the space they take. Returns how many were deleted.
+        """
+        purged = self.backend.purge(max_age)
+        self.purged += purged
+        return purged
+
+    def acquire_leadership(self) -> bool:
+        """Try to become the one worker that refreshes data.
+
+        Leadership is held until :meth:`release_leadership` or until the
+        process exits.
+        """
+        return self.backend.acquire_leadership()
+
+    def release_leadership(self) -> None:
+        """Give up refresher leadership."""
+        self.backend.release_leadership()
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process holds refresher leadership."""
+        return self.backend.is_leader
+
+    def info(self) -> Dict[str, Any]:
+        """Return read, write and purge counters."""
+        return {
+            "leader": self.is_leader,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "purged": self.purged,
+        }
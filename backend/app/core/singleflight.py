@@ -0,0 +1,46 @@
+"""Request coalescing for concurrent identical work."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work in its own task; callers that
+    arrive while it is running await the same task and receive its result or
+    its exception. Cancelling one waiter does not cancel the shared work.
+    """
+
+    def __init__(self):
+        """Initialize with no work in flight."""
+        self.executions = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        """Drop a finished task and mark its exception as retrieved."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` once for all concurrent callers sharing ``key``."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def info(self) -> Dict[str, int]:
+        """Return counters as a plain dictionary."""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
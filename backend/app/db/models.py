@@ -1,6 +1,16 @@
 """Database models."""
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -17,7 +27,7 @@ class CachedCoin(Base):
     current_price_inr = Column(Float)
     current_price_cad = Column(Float)
     current_price_usd = Column(Float)
-    market_cap_rank = Column(Integer)
+    market_cap_rank = Column(Integer, index=True)
     market_cap = Column(Float)
     price_change_percentage_24h = Column(Float)
     market_data = Column(JSON)
@@ -33,7 +43,43 @@ class CachedCategory(Base):
     id = Column(String, primary_key=True, index=True)
     name = Column(String)
     market_cap = Column(Float)
+    market_cap_change_24h = Column(Float)
+    volume_24h = Column(Float)
     content = Column(String)
     top_3_coins = Column(JSON)
+    # The upstream row as fetched and its place in the upstream list
+    category_data = Column(JSON)
+    position = Column(Integer)
     cached_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class PriceCandle(Base):
+    """Open, high, low and close price of a coin over one time bucket."""
+
+    __tablename__ = "price_candles"
+    __table_args__ = (
+        Index("ix_price_candles_resolution_bucket", "resolution", "bucket"),
+    )
+
+    coin_id = Column(String, primary_key=True)
+    vs_currency = Column(String, primary_key=True)
+    # Bucket length and start, in seconds since the epoch
+    resolution = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+
+
+class User(Base):
+    """API user allowed to request access tokens."""
+
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String, unique=True, index=True, nullable=False)
+    hashed_password = Column(String, nullable=False)
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,376 @@
+"""Bulk persistence and reads of CoinGecko snapshots in the cached tables."""
+
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.db.models import CachedCategory, CachedCoin, PriceCandle
+
+_PRICE_CURRENCIES = ("inr", "cad", "usd")
+# Chart range -> (candle resolution, span), in seconds; at most 366 candles
+HISTORY_RANGES: Dict[str, Tuple[int, int]] = {
+    "1d": (300, 86400),
+    "7d": (3600, 7 * 86400),
+    "30d": (4 * 3600, 30 * 86400),
+    "1y": (86400, 365 * 86400),
+}
+_CATEGORY_FIELDS = (
+    "name",
+    "market_cap",
+    "market_cap_change_24h",
+    "volume_24h",
+    "content",
+    "top_3_coins",
+)
+
+
+def _now() -> datetime:
+    """Return the current UTC time."""
+    return datetime.now(timezone.utc)
+
+
+def _quote_row(market_data: Dict[str, Any], vs_currency: str) -> Dict[str, Any]:
+    """Return the markets row stored for ``vs_currency``, or an empty one."""
+    row: Dict[str, Any] = (market_data.get(vs_currency) or {}).get("row") or {}
+    return row
+
+
+def _insert(session: Session, model: Any) -> Union[postgresql.Insert, sqlite.Insert]:
+    """Return an ``INSERT`` into ``model`` that supports ``ON CONFLICT``."""
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def _upsert(session: Session, model: Any, values: List[Dict[str, Any]]) -> None:
+    """Insert ``values`` in one statement, updating rows whose id exists."""
+    stmt = _insert(session, model).values(values)
+    updated = {column: stmt.excluded[column] for column in values[0] if column != "id"}
+    session.execute(stmt.on_conflict_do_update(index_elements=["id"], set_=updated))
+
+
+class SnapshotStore:
+    """Write-through store for market and category snapshots.
+
+    Rows are written with one bulk upsert per snapshot and read back only if
+    their ``updated_at`` is recent enough.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        """Initialize store with a session factory such as ``SessionLocal``."""
+        self.session_factory = session_factory
+
+    def save_coins_markets(self, pages: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Upsert markets rows fetched in one or more currencies.
+
+        ``pages`` maps each currency to its rows; all currencies of a coin are
+        written by the same statement. ``market_data`` keeps one entry per
+        currency with the row and the time it was fetched, so quotes merged
+        from earlier writes keep their own age.
+        """
+        now = _now()
+        fetched_at = now.timestamp()
+        by_id: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for vs_currency, rows in pages.items():
+            for row in rows:
+                by_id.setdefault(row["id"], {})[vs_currency] = {
+                    "fetched_at": fetched_at,
+                    "row": row,
+                }
+        if not by_id:
+            return
+        with self.session_factory() as session:
+            existing: Dict[str, Any] = {
+                coin_id: market_data
+                for coin_id, market_data in session.execute(
+                    select(CachedCoin.id, CachedCoin.market_data).where(
+                        CachedCoin.id.in_(list(by_id))
+                    )
+                )
+            }
+            values = []
+            for coin_id, quotes in by_id.items():
+                market_data = {**(existing.get(coin_id) or {}), **quotes}
+                row = next(iter(quotes.values()))["row"]
+                value = {
+                    "id": coin_id,
+                    "symbol": row.get("symbol"),
+                    "name": row.get("name"),
+                    "image": row.get("image"),
+                    "market_cap_rank": row.get("market_cap_rank"),
+                    "market_data": market_data,
+                    "updated_at": now,
+                }
+                # A coin can be missing from some pages when ranks shift
+                # between fetches; its columns then keep the last stored quote
+                for vs_currency in pages:
+                    if vs_currency in _PRICE_CURRENCIES:
+                        quote = _quote_row(market_data, vs_currency)
+                        value[f"current_price_{vs_currency}"] = quote.get(
+                            "current_price"
+                        )
+                if "usd" in pages:
+                    usd = _quote_row(market_data, "usd")
+                    value["market_cap"] = usd.get("market_cap")
+                    value["price_change_percentage_24h"] = usd.get(
+                        "price_change_percentage_24h"
+                    )
+                values.append(value)
+            _upsert(session, CachedCoin, values)
+            session.commit()
+
+    def save_coins_market(self, vs_currency: str, rows: List[Dict[str, Any]]) -> None:
+        """Upsert a markets page fetched in ``vs_currency``."""
+        self.save_coins_markets({vs_currency: rows})
+
+    def load_coins_markets(
+        self, currencies: Sequence[str], page: int, per_page: int, max_age: float
+    ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Return a complete, fresh markets page for every currency or ``None``.
+
+        Rows last written before the cutoff are skipped by the query; each
+        currency's quote must then also have been fetched after it.
+        """
+        first_rank = (page - 1) * per_page + 1
+        cutoff = _now() - timedelta(seconds=max_age)
+        oldest = cutoff.timestamp()
+        with self.session_factory() as session:
+            market_data = session.scalars(
+                select(CachedCoin.market_data)
+                .where(
+                    CachedCoin.market_cap_rank.between(
+                        first_rank, first_rank + per_page - 1
+                    ),
+                    CachedCoin.updated_at >= cutoff,
+                )
+                .order_by(CachedCoin.market_cap_rank)
+            ).all()
+        if len(market_data) != per_page:
+            return None
+        pages = {}
+        for vs_currency in currencies:
+            rows = []
+            for quotes in market_data:
+                quote = (quotes or {}).get(vs_currency)
+                if not quote or quote.get("fetched_at", 0) < oldest:
+                    return None
+                rows.append(quote["row"])
+            pages[vs_currency] = rows
+        return pages
+
+    def load_coins_market(
+        self, vs_currency: str, page: int, per_page: int, max_age: float
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return a complete, fresh markets page or ``None``."""
+        pages = self.load_coins_markets([vs_currency], page, per_page, max_age)
+        return None if pages is None else pages[vs_currency]
+
+    def save_categories(self, rows: List[Dict[str, Any]]) -> None:
+        """Replace the stored category list, keeping each row and the order."""
+        if not rows:
+            return
+        now = _now()
+        values = [
+            {
+                "id": row["id"],
+                **{field: row.get(field) for field in _CATEGORY_FIELDS},
+                "category_data": row,
+                "position": position,
+                "updated_at": now,
+            }
+            for position, row in enumerate(rows)
+        ]
+        with self.session_factory() as session:
+            _upsert(session, CachedCategory, values)
+            session.execute(
+                delete(CachedCategory).where(
+                    CachedCategory.id.not_in([row["id"] for row in rows])
+                )
+            )
+            session.commit()
+
+    def load_categories(self, max_age: float) -> Optional[List[Dict[str, Any]]]:
+        """Return the stored category list if every row is fresh, else ``None``.
+
+        Rows are returned as fetched from upstream, in the upstream order.
+        """
+        cutoff = _now() - timedelta(seconds=max_age)
+        with self.session_factory() as session:
+            stale = session.scalar(
+                select(func.count())
+                .select_from(CachedCategory)
+                .where(
+                    or_(
+                        CachedCategory.updated_at.is_(None),
+                        CachedCategory.updated_at < cutoff,
+                    )
+                )
+            )
+            if stale:
+                return None
+            rows = session.scalars(
+                select(CachedCategory.category_data).order_by(CachedCategory.position)
+            ).all()
+        if not rows or any(row is None for row in rows):
+            return None
+        return list(rows)
+
+
+class HistoryStore:
+    """Price history kept as OHLC candles at every ``HISTORY_RANGES`` resolution.
+
+    Each batch of price points is rolled up into candles in memory and merged
+    into the stored ones with bulk upserts, so a chart read is one range scan
+    of the primary key returning a bounded number of candles. Candles older
+    than the span they serve are pruned on write.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        """Initialize store with a session factory such as ``SessionLocal``."""
+        self.session_factory = session_factory
+
+    def append(
+        self, points: Iterable[Tuple[str, str, float]], at: Optional[datetime] = None
+    ) -> int:
+        """Add ``(coin_id, vs_currency, price)`` points observed ``at``.
+
+        Returns the number of candles written.
+        """
+        timestamp = int((at or _now()).timestamp())
+        candles: Dict[Tuple[str, str, int, int], Dict[str, Any]] = {}
+        for coin_id, vs_currency, price in points:
+            if price is None:
+                continue
+            for resolution, _ in HISTORY_RANGES.values():
+                bucket = timestamp - timestamp % resolution
+                key = (coin_id, vs_currency, resolution, bucket)
+                candle = candles.get(key)
+                if candle is None:
+                    candles[key] = {
+                        "coin_id": coin_id,
+                        "vs_currency": vs_currency,
+                        "resolution": resolution,
+                        "bucket": bucket,
+                        "open": price,
+                        "high": price,
+                        "low": price,
+                        "close": price,
+                    }
+                else:
+                    candle["high"] = max(candle["high"], price)
+                    candle["low"] = min(candle["low"], price)
+                    candle["close"] = price
+        if not candles:
+            return 0
+        with self.session_factory() as session:
+            stmt = _insert(session, PriceCandle)
+            excluded = stmt.excluded
+            if session.get_bind().dialect.name == "postgresql":
+                high = func.greatest(PriceCandle.high, excluded.high)
+                low = func.least(PriceCandle.low, excluded.low)
+            else:
+                high = func.max(PriceCandle.high, excluded.high)
+                low = func.min(PriceCandle.low, excluded.low)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["coin_id", "vs_currency", "resolution", "bucket"],
+                set_={"high": high, "low": low, "close": excluded.close},
+            )
+            session.execute(stmt, list(candles.values()))
+            for resolution, span in HISTORY_RANGES.values():
+                session.execute(
+                    delete(PriceCandle).where(
+                        PriceCandle.resolution == resolution,
+                        PriceCandle.bucket < timestamp - span - resolution,
+                    )
+                )
+            session.commit()
+        return len(candles)
+
+    def load(
+        self,
+        coin_id: str,
+        vs_currency: str,
+        range_: str,
+        at: Optional[datetime] = None,
+    ) -> List[List[float]]:
+        """Return ``[time_ms, open, high, low, close]`` candles covering ``range_``."""
+        resolution, span = HISTORY_RANGES[range_]
+        timestamp = int((at or _now()).timestamp())
+        with self.session_factory() as session:
+            rows = session.execute(
+                select(
+                    PriceCandle.bucket,
+                    PriceCandle.open,
+                    PriceCandle.high,
+                    PriceCandle.low,
+                    PriceCandle.close,
+                )
+                .where(
+                    PriceCandle.coin_id == coin_id,
+                    PriceCandle.vs_currency == vs_currency,
+                    PriceCandle.resolution == resolution,
+                    PriceCandle.bucket > timestamp - span - resolution,
+                )
+                .order_by(PriceCandle.bucket)
+            ).all()
+        return [[bucket * 1000, *prices] for bucket, *prices in rows]
+
+
+class CoinReader:
+    """Bulk async reads of cached coins for request handlers.
+
+    Each read is a single indexed query on an async session, so handlers can
+    await it without blocking the event loop.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        """Initialize reader with a factory such as ``AsyncSessionLocal``."""
+        self.session_factory = session_factory
+
+    async def by_ids(self, coin_ids: Iterable[str]) -> List[CachedCoin]:
+        """Return the cached coins among ``coin_ids``, in the order given."""
+        coin_ids = list(dict.fromkeys(coin_ids))
+        if not coin_ids:
+            return []
+        async with self.session_factory() as session:
+            coins = await session.scalars(
+                select(CachedCoin).where(CachedCoin.id.in_(coin_ids))
+            )
+            # Legacy Column attributes type ids as Column[str]
+            found: Dict[Any, CachedCoin] = {coin.id: coin for coin in coins}
+        return [found[coin_id] for coin_id in coin_ids if coin_id in found]
+
+    async def by_symbols(self, symbols: Iterable[str]) -> List[CachedCoin]:
+        """Return the cached coins whose symbol is one of ``symbols``, by rank."""
+        symbols = list({symbol.lower() for symbol in symbols})
+        if not symbols:
+            return []
+        async with self.session_factory() as session:
+            coins = await session.scalars(
+                select(CachedCoin)
+                .where(CachedCoin.symbol.in_(symbols))
+                .order_by(CachedCoin.market_cap_rank.nulls_last(), CachedCoin.id)
+            )
+            return list(coins)
+
+    async def by_rank(self, first_rank: int, last_rank: int) -> List[CachedCoin]:
+        """Return the cached coins ranked ``first_rank`` to ``last_rank``."""
+        async with self.session_factory() as session:
+            coins = await session.scalars(
+                select(CachedCoin)
+                .where(CachedCoin.market_cap_rank.between(first_rank, last_rank))
+                .order_by(CachedCoin.market_cap_rank)
+            )
+            return list(coins)
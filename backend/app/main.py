@@ -1,8 +1,57 @@
 """Main FastAPI application entry point."""
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from app.api import router
+from app.core.config import settings
+from app.core.metrics import (
+    MetricsMiddleware,
+    registry,
+    track_cache,
+    track_circuit_breaker,
+    track_rate_governor,
+)
+from app.core.security import verified_tokens
+from app.db.database import (
+    Base,
+    dispose_async_engine,
+    dispose_engine,
+    init_engine,
+)
+from app.services.coingecko import coingecko_service
+from app.services.market import market_service
+from app.services.refresher import market_refresher
+from app.services.streaming import price_streamer
+from app.services.users import user_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown."""
+    engine = await run_in_threadpool(init_engine)
+    if settings.CACHE_L2_ENABLED or settings.HISTORY_ENABLED:
+        await run_in_threadpool(Base.metadata.create_all, bind=engine)
+    await user_service.start()
+    if settings.ADMIN_USERNAME and settings.ADMIN_PASSWORD:
+        await user_service.ensure(settings.ADMIN_USERNAME, settings.ADMIN_PASSWORD)
+    await coingecko_service.start()
+    # With a shared cache, one worker per host refreshes for all of them
+    shared = market_service.shared
+    if settings.REFRESH_ENABLED and (shared is None or shared.acquire_leadership()):
+        market_refresher.start()
+    try:
+        yield
+    finally:
+        await price_streamer.stop()
+        await market_refresher.stop()
+        if shared is not None:
+            shared.release_leadership()
+        await coingecko_service.close()
+        await run_in_threadpool(dispose_engine)
+        await dispose_async_engine()
+
 
 app = FastAPI(
     title="Vetty Crypto API",
@@ -10,6 +59,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -20,8 +70,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(router, prefix="/api")
 
+track_cache("market", market_service.cache)
+track_cache("views", market_service.views)
+track_cache("payloads", market_service.payloads)
+track_cache("last_good", market_service.last_good)
+track_cache("tokens", verified_tokens)
+track_rate_governor(coingecko_service.governor)
+track_circuit_breaker(coingecko_service.breaker)
+
 
 @app.get("/health")
 async def health_check():
@@ -37,3 +97,22 @@ async def version():
         "api_version": "v1",
         "dependencies": {"coingecko_api": "v3"},
     }
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Market data cache, request coalescing and upstream health counters."""
+    return {
+        **market_service.info(),
+        "rate_limit": coingecko_service.governor.info(),
+        "circuit": coingecko_service.breaker.info(),
+        "streaming": price_streamer.info(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return Response(
+        registry.expose(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,74 @@
+"""Pre-sorted, pre-encoded in-memory index of coin categories."""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import orjson
+
+# Sort names -> descending; missing values always sort last
+SORTS: Dict[str, bool] = {
+    "market_cap": True,
+    "market_cap_change_24h": True,
+    "volume_24h": True,
+    "name": False,
+}
+
+
+class CategoryIndex:
+    """CoinGecko categories, ready to be sorted, searched and paged locally.
+
+    Built once per refresh. Every category is encoded to JSON once and kept
+    in upstream order plus one precomputed order per entry of ``SORTS``, so
+    a page costs a tuple slice and a join of encoded rows.
+    """
+
+    def __init__(self, categories: Sequence[Dict[str, Any]]):
+        """Encode every category and build all orders."""
+        self._rows: Tuple[bytes, ...] = tuple(map(orjson.dumps, categories))
+        self._names: Tuple[str, ...] = tuple(
+            str(category.get("name") or "").lower() for category in categories
+        )
+        upstream = tuple(range(len(categories)))
+        self._orders: Dict[Optional[str], Tuple[int, ...]] = {None: upstream}
+        for name, descending in SORTS.items():
+            self._orders[name] = self._sorted(upstream, categories, name, descending)
+
+    @staticmethod
+    def _sorted(
+        positions: Tuple[int, ...],
+        categories: Sequence[Dict[str, Any]],
+        field: str,
+        descending: bool,
+    ) -> Tuple[int, ...]:
+        """Order ``positions`` by ``field``, keeping missing values last."""
+        present = [n for n in positions if categories[n].get(field) is not None]
+        missing = [n for n in positions if categories[n].get(field) is None]
+
+        def key(position: int) -> Any:
+            value = categories[position][field]
+            return value.lower() if isinstance(value, str) else value
+
+        present.sort(key=key, reverse=descending)
+        return tuple(present + missing)
+
+    def __len__(self) -> int:
+        """Return the number of indexed categories."""
+        return len(self._rows)
+
+    def query(
+        self,
+        sort: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> bytes:
+        """Return the JSON array of one page of categories.
+
+        ``sort`` is a key of ``SORTS``, or ``None`` for upstream order.
+        ``search`` keeps categories whose name contains it, ignoring case.
+        """
+        positions = self._orders[sort]
+        if search:
+            needle = search.lower()
+            positions = tuple(n for n in positions if needle in self._names[n])
+        end = None if limit is None else offset + limit
+        rows: List[bytes] = [self._rows[n] for n in positions[offset:end]]
+        return b"[" + b",".join(rows) + b"]"
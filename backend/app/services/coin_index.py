@@ -0,0 +1,112 @@
+"""Rank-ordered in-memory index of the top coins."""
+
+from bisect import bisect_left
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+from app.services.multicurrency import MergedMarkets, Row
+from app.services.projection import Projection
+
+MARKET_CAP_DESC = "market_cap_desc"
+
+# Secondary orders: name -> (row field, descending)
+_SORTS: Dict[str, Tuple[str, bool]] = {
+    "price_change_percentage_24h_desc": ("price_change_percentage_24h", True),
+    "price_change_percentage_24h_asc": ("price_change_percentage_24h", False),
+    "volume_desc": ("total_volume", True),
+}
+
+ORDERS = (MARKET_CAP_DESC,) + tuple(_SORTS)
+
+
+class CoinIndex:
+    """Top coins in every merged currency, ready to be sliced locally.
+
+    Built once per refresh from large upstream pages. Each currency keeps its
+    market cap rank order plus one precomputed order per entry of
+    ``ORDERS``; symbols are kept in a sorted array for prefix lookups. A
+    page of ``per_page`` rows costs a tuple slice and ``per_page`` row
+    projections.
+    """
+
+    def __init__(self, markets: MergedMarkets):
+        """Build all orders and the symbol index from ``markets``."""
+        self.markets = markets
+        self._orders: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        self._positions: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for currency in markets.currencies:
+            ranked = markets.order[currency]
+            orders = {MARKET_CAP_DESC: ranked}
+            for name, (field, descending) in _SORTS.items():
+                orders[name] = self._sorted(ranked, currency, field, descending)
+            self._orders[currency] = orders
+            self._positions[currency] = {
+                name: {coin_id: position for position, coin_id in enumerate(ids)}
+                for name, ids in orders.items()
+            }
+        self._symbols: List[Tuple[str, str]] = sorted(
+            {
+                (str(markets.get(coin_id, currency, "symbol") or "").lower(), coin_id)
+                for currency in markets.currencies
+                for coin_id in markets.order[currency]
+            }
+        )
+
+    def _sorted(
+        self, ranked: Tuple[str, ...], currency: str, field: str, descending: bool
+    ) -> Tuple[str, ...]:
+        """Order ``ranked`` by ``field``, keeping missing values last."""
+        sign = -1 if descending else 1
+
+        def key(coin_id: str) -> Tuple[bool, float]:
+            value = self.markets.get(coin_id, currency, field)
+            return (value is None, sign * value if value is not None else 0.0)
+
+        return tuple(sorted(ranked, key=key))
+
+    def __contains__(self, currency: str) -> bool:
+        """Whether the index covers ``currency``."""
+        return currency in self._orders
+
+    def size(self, currency: str) -> int:
+        """Return the number of coins indexed in ``currency``."""
+        return len(self._orders[currency][MARKET_CAP_DESC])
+
+    def _symbol_matches(self, prefix: str) -> List[str]:
+        """Return the ids of coins whose symbol starts with ``prefix``."""
+        prefix = prefix.lower()
+        start = bisect_left(self._symbols, (prefix,))
+        matches = []
+        for symbol, coin_id in islice(self._symbols, start, None):
+            if not symbol.startswith(prefix):
+                break
+            matches.append(coin_id)
+        return matches
+
+    def query(
+        self,
+        currency: str,
+        page: int = 1,
+        per_page: int = 10,
+        order: str = MARKET_CAP_DESC,
+        symbol_prefix: Optional[str] = None,
+        projection: Optional[Projection] = None,
+    ) -> List[Row]:
+        """Return one page of rows in ``currency``, optionally filtered."""
+        ids = self._orders[currency][order]
+        if symbol_prefix:
+            positions = self._positions[currency][order]
+            ids = tuple(
+                sorted(
+                    (
+                        coin_id
+                        for coin_id in self._symbol_matches(symbol_prefix)
+                        if coin_id in positions
+                    ),
+                    key=positions.__getitem__,
+                )
+            )
+        start = (page - 1) * per_page
+        return [
+            self.markets.row(coin_id, currency, projection)
+            for coin_id in ids[start : start + per_page]
+        ]
@@ -0,0 +1,109 @@
+"""Prefix search over every CoinGecko coin, ranked by market cap."""
+
+from bisect import bisect_left
+from heapq import nsmallest
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.services.coin_index import CoinIndex
+
+# Sorts after every character a search term can contain
+_END = "\U0010ffff"
+# Most results one search returns
+MAX_RESULTS = 50
+# Prefixes matching more terms than this are looked up by scanning coins in
+# rank order, which stops early when matches are common, and memoized
+_SCAN_THRESHOLD = 5000
+
+
+class CoinSearch:
+    """Sorted-array prefix index over coin symbols, names and ids.
+
+    Built once per refresh from the ``/coins/list`` entries and the coin
+    index, which supplies market cap ranks and any ranked coin missing from
+    the list. Coins are numbered by rank, unranked coins last, so a lookup
+    is a bisect into the sorted terms followed by picking the ``limit``
+    smallest numbers of the matching range. Prefixes with very large
+    ranges, such as single letters or words like "token", instead scan coins
+    in rank order until ``MAX_RESULTS`` match, and remember the result.
+    """
+
+    def __init__(self, coins: Sequence[Dict[str, Any]], index: Optional[CoinIndex]):
+        """Rank ``coins`` with ``index`` and index their terms."""
+        ranks: Dict[str, int] = {}
+        listed: Dict[str, Tuple[str, str]] = {}
+        if index is not None:
+            markets = index.markets
+            currency = markets.currencies[0]
+            for rank, coin_id in enumerate(markets.order[currency], 1):
+                ranks[coin_id] = rank
+                listed[coin_id] = (
+                    str(markets.get(coin_id, currency, "symbol") or ""),
+                    str(markets.get(coin_id, currency, "name") or ""),
+                )
+        for coin in coins:
+            coin_id = str(coin.get("id") or "")
+            if coin_id:
+                listed[coin_id] = (
+                    str(coin.get("symbol") or ""),
+                    str(coin.get("name") or ""),
+                )
+        unranked = len(ranks) + 1
+        ordered = sorted(
+            listed.items(),
+            key=lambda item: (ranks.get(item[0], unranked), len(item[1][1]), item[0]),
+        )
+        self._rows: Tuple[Dict[str, Any], ...] = tuple(
+            {
+                "id": coin_id,
+                "symbol": symbol,
+                "name": name,
+                "market_cap_rank": ranks.get(coin_id),
+            }
+            for coin_id, (symbol, name) in ordered
+        )
+        self._row_terms: List[Tuple[str, ...]] = []
+        for row in self._rows:
+            name = row["name"].lower()
+            candidates = (row["symbol"].lower(), row["id"], name, *name.split()[1:])
+            self._row_terms.append(tuple(filter(None, dict.fromkeys(candidates))))
+        self._terms: List[Tuple[str, int]] = sorted(
+            (term, position)
+            for position, terms in enumerate(self._row_terms)
+            for term in terms
+        )
+        self._memo: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of searchable coins."""
+        return len(self._rows)
+
+    def _scan(self, prefix: str) -> List[int]:
+        """Return the top ``MAX_RESULTS`` matches by testing coins in rank order."""
+        matches = (
+            position
+            for position, terms in enumerate(self._row_terms)
+            if any(term.startswith(prefix) for term in terms)
+        )
+        return list(islice(matches, MAX_RESULTS))
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` coins with a term starting with ``query``.
+
+        A coin matches when its symbol, id, name or any word of its name
+        starts with ``query``, ignoring case. Results are in market cap
+        order, unranked coins last.
+        """
+        prefix = query.strip().lower()
+        if not prefix:
+            return []
+        limit = min(limit, MAX_RESULTS)
+        top = self._memo.get(prefix)
+        if top is None:
+            start = bisect_left(self._terms, (prefix,))
+            end = bisect_left(self._terms, (prefix + _END,), start)
+            if end - start <= _SCAN_THRESHOLD:
+                positions = {position for _, position in self._terms[start:end]}
+                top = nsmallest(limit, positions)
+            else:
+                top = self._memo[prefix] = self._scan(prefix)
+        return [self._rows[position] for position in top[:limit]]
@@ -1,70 +1,578 @@
 """CoinGecko API service."""
 
+import asyncio
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
 import requests
-from typing import List, Dict, Any
+import httpx
+from typing import Callable, Iterator, List, Dict, Any, Optional
+from urllib.parse import urlsplit
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.metrics import upstream_duration, upstream_requests, upstream_retries
+
+
+def _coins_market_params(vs_currency: str, page: int, per_page: int) -> Dict[str, Any]:
+    """Build query parameters for the markets endpoint."""
+    return {
+        "vs_currency": vs_currency,
+        "order": "market_cap_desc",
+        "per_page": per_page,
+        "page": page,
+        "sparkline": True,
+    }
+
+
+def _coins_by_ids_params(vs_currency: str, coin_ids: List[str]) -> Dict[str, Any]:
+    """Build markets query parameters selecting ``coin_ids``."""
+    return {
+        **_coins_market_params(vs_currency, 1, len(coin_ids)),
+        "ids": ",".join(coin_ids),
+    }
+
+
+def _coin_details_params() -> Dict[str, Any]:
+    """Build query parameters for the coin details endpoint."""
+    return {
+        "localization": False,
+        "tickers": False,
+        "market_data": True,
+        "community_data": False,
+        "developer_data": False,
+        "sparkline": True,
+    }
+
+
+def _unavailable(exc: Exception) -> HTTPException:
+    """Map an upstream failure to the public 503 error."""
+    return HTTPException(status_code=503, detail=f"CoinGecko API unavailable: {exc}")
+
+
+class Priority(IntEnum):
+    """Upstream call priority; lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_priority: ContextVar[Priority] = ContextVar(
+    "coingecko_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Mark upstream calls made in this context, and tasks it starts, as
+    background work.
+    """
+    token = _priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimited(Exception):
+    """The upstream request budget cannot serve a call in time."""
+
+
+class RateGovernor:
+    """Token bucket shared by every upstream call of the pooled client.
+
+    The bucket holds up to ``burst`` tokens and refills at
+    ``per_minute / 60`` tokens a second. Background calls leave ``reserve``
+    tokens for interactive ones and wait while interactive calls are queued.
+    A 429 empties the bucket and pauses all calls for ``Retry-After``
+    seconds, or an exponential backoff when the header is missing, plus
+    jitter so workers do not retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+        reserve: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize a full bucket; limits default to the settings values."""
+        self.rate = (per_minute or settings.COINGECKO_RATE_LIMIT_PER_MINUTE) / 60
+        self.burst = burst or settings.COINGECKO_RATE_LIMIT_BURST
+        if reserve is None:
+            reserve = settings.COINGECKO_RATE_LIMIT_RESERVE
+        self.reserve = min(reserve, self.burst - 1)
+        if max_wait is None:
+            max_wait = settings.COINGECKO_RATE_LIMIT_MAX_WAIT_SECONDS
+        self.max_wait = max_wait
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._throttles_in_row = 0
+        self._waiting = {priority: 0 for priority in Priority}
+        self.acquired = {priority: 0 for priority in Priority}
+        self.rejected = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        elapsed = max(now - self._updated, 0.0)
+        self._tokens = min(self._tokens + elapsed * self.rate, float(self.burst))
+        self._updated = now
+
+    def _delay(self, priority: Priority) -> float:
+        """Take a token and return 0, or return how long to wait first."""
+        now = self._clock()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        needed = 1.0
+        if priority is Priority.BACKGROUND:
+            if self._waiting[Priority.INTERACTIVE]:
+                return 1 / self.rate
+            needed += self.reserve
+        if self._tokens >= needed:
+            self._tokens -= 1
+            return 0.0
+        return (needed - self._tokens) / self.rate
+
+    async def acquire(self, priority: Optional[Priority] = None) -> None:
+        """Wait for a token.
+
+        Interactive calls raise :class:`RateLimited` rather than wait more
+        than ``max_wait`` seconds in total; background calls wait as long as
+        needed.
+        """
+        priority = _priority.get() if priority is None else priority
+        started = self._clock()
+        self._waiting[priority] += 1
+        try:
+            while True:
+                delay = self._delay(priority)
+                if not delay:
+                    break
+                waited = self._clock() - started
+                if priority is Priority.INTERACTIVE and waited + delay > self.max_wait:
+                    self.rejected += 1
+                    raise RateLimited(
+                        f"upstream request budget exhausted, retry in {delay:.1f}s"
+                    )
+                await asyncio.sleep(delay)
+        finally:
+            self._waiting[priority] -= 1
+        self.acquired[priority] += 1
+        self.wait_seconds += self._clock() - started
+
+    def throttle(self, retry_after: Optional[float] = None) -> float:
+        """Pause every call after a 429 and return the pause in seconds."""
+        self.throttled += 1
+        self._throttles_in_row += 1
+        if retry_after is None:
+            retry_after = min(
+                settings.COINGECKO_BACKOFF_BASE_SECONDS
+                * 2 ** (self._throttles_in_row - 1),
+                settings.COINGECKO_BACKOFF_MAX_SECONDS,
+            )
+        pause = retry_after + random.uniform(0, retry_after * 0.25 + 0.1)
+        now = self._clock()
+        self._refill(now)
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, now + pause)
+        return pause
+
+    def succeeded(self) -> None:
+        """Record an upstream success, resetting the backoff exponent."""
+        self._throttles_in_row = 0
+
+    def info(self) -> Dict[str, Any]:
+        """Return budget usage counters."""
+        now = self._clock()
+        self._refill(now)
+        return {
+            "per_minute": round(self.rate * 60, 3),
+            "burst": self.burst,
+            "tokens": round(self._tokens, 3),
+            "paused_for_seconds": round(max(self._paused_until - now, 0.0), 3),
+            "acquired": {p.name.lower(): n for p, n in self.acquired.items()},
+            "waiting": {p.name.lower(): n for p, n in self._waiting.items()},
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+class CircuitOpen(Exception):
+    """CoinGecko is failing and calls are short-circuited."""
+
+
+class UpstreamError(Exception):
+    """A retryable upstream failure that persisted through every retry."""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker around upstream calls.
+
+    After ``failures`` consecutive failed calls the breaker opens and calls
+    fail fast. ``reset_after`` seconds later it half-opens and lets a single
+    probe through: success closes it, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    STATES = (CLOSED, OPEN, HALF_OPEN)
+
+    def __init__(
+        self,
+        failures: Optional[int] = None,
+        reset_after: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize a closed breaker; limits default to the settings values."""
+        self.threshold = failures or settings.COINGECKO_BREAKER_FAILURES
+        self.reset_after = reset_after or settings.COINGECKO_BREAKER_RESET_SECONDS
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        """Return the current state, half-opening once the reset time passed."""
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.reset_after
+        ):
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; half-open admits one probe."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call."""
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the breaker at the threshold."""
+        self._failures += 1
+        self._probing = False
+        if self._state == self.HALF_OPEN or self._failures >= self.threshold:
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self.opened += 1
+
+    def release(self) -> None:
+        """End a call whose outcome says nothing about upstream health."""
+        self._probing = False
+
+    def info(self) -> Dict[str, Any]:
+        """Return state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
+
+
+def _retry_delay(retry: int) -> float:
+    """Return the jittered exponential pause before the ``retry``-th retry."""
+    base: float = settings.COINGECKO_RETRY_BACKOFF_SECONDS * 2 ** (retry - 1)
+    return base * random.uniform(0.5, 1.5)
+
+
+def _timeout() -> httpx.Timeout:
+    """Build the pooled client timeouts from the settings."""
+    return httpx.Timeout(
+        settings.COINGECKO_TIMEOUT_SECONDS,
+        connect=settings.COINGECKO_CONNECT_TIMEOUT_SECONDS,
+        read=settings.COINGECKO_READ_TIMEOUT_SECONDS,
+    )
+
+
+# Upstream answers worth retrying: the request may succeed on another try
+_RETRY_STATUSES = frozenset({500, 502, 503, 504})
 
 
 class CoinGeckoService:
-    """Service for interacting with CoinGecko API."""
+    """Service for interacting with CoinGecko API.
+
+    The synchronous ``get_*`` methods use ``requests`` and are kept for
+    scripts and backwards compatibility. The ``*_async`` methods are what the
+    API handlers call: once :meth:`start` has opened the pooled
+    ``httpx.AsyncClient`` they reuse keep-alive connections, otherwise they
+    fall back to the synchronous methods in a worker thread so the event loop
+    is never blocked. Pooled requests spend tokens from a shared
+    :class:`RateGovernor`, retry transient failures and go through a
+    :class:`CircuitBreaker` that fails fast while CoinGecko is down.
+    """
 
     def __init__(self):
         """Initialize service."""
         self.base_url = settings.COINGECKO_API_URL
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.governor = RateGovernor()
+        self.breaker = CircuitBreaker()
 
-    def get_coins_market(
-        self, vs_currency: str = "inr", page: int = 1, per_page: int = 10
-    ) -> List[Dict[str, Any]]:
-        """Fetch coins market data from CoinGecko API."""
+    @property
+    def is_started(self) -> bool:
+        """Whether the pooled async client is open."""
+        return self._client is not None
+
+    async def start(self, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        """Open the pooled async HTTP client."""
+        if self._client is not None:
+            return
+        limits = httpx.Limits(
+            max_connections=settings.COINGECKO_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.COINGECKO_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.COINGECKO_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        self._host_limits = {}
+        self._client = httpx.AsyncClient(
+            timeout=_timeout(),
+            limits=limits,
+            transport=transport,
+        )
+
+    async def close(self) -> None:
+        """Close the pooled async HTTP client."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Return the concurrency cap for the host serving ``url``."""
+        host = urlsplit(url).netloc
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.COINGECKO_MAX_CONCURRENCY_PER_HOST)
+            self._host_limits[host] = semaphore
+        return semaphore
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Perform a blocking GET request and decode the JSON body."""
         try:
-            url = f"{self.base_url}/coins/markets"
-            params = {
-                "vs_currency": vs_currency,
-                "order": "market_cap_desc",
-                "per_page": per_page,
-                "page": page,
-                "sparkline": True,
-            }
-            response = requests.get(url, params=params, timeout=10)
+            response = requests.get(
+                f"{self.base_url}{path}",
+                params=params,
+                timeout=(
+                    settings.COINGECKO_CONNECT_TIMEOUT_SECONDS,
+                    settings.COINGECKO_READ_TIMEOUT_SECONDS,
+                ),
+            )
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
-            raise HTTPException(
-                status_code=503, detail=f"CoinGecko API unavailable: {str(e)}"
+            raise _unavailable(e)
+
+    async def _send(
+        self, url: str, params: Optional[Dict[str, Any]], endpoint: str
+    ) -> Any:
+        """GET ``url`` within the request budget, retrying transient failures.
+
+        A 429 pauses the governor and is retried up to
+        ``COINGECKO_RATE_LIMIT_RETRIES`` times. Connection errors and 5xx
+        answers are retried up to ``COINGECKO_RETRIES`` times with jittered
+        exponential backoff; read timeouts are not, as they already cost a
+        full read timeout. Other errors fail at once. Every attempt is
+        recorded in the upstream metrics under the ``endpoint`` template.
+        """
+        client = self._client
+        if client is None:
+            raise RuntimeError("The pooled CoinGecko client is not started")
+        throttles = retries = 0
+        error: Optional[Exception]
+        while True:
+            try:
+                await self.governor.acquire()
+            except RateLimited as e:
+                raise _unavailable(e)
+            async with self._host_semaphore(url):
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url, params=params)
+                except httpx.ReadTimeout as e:
+                    self._observe(endpoint, started, "timeout")
+                    raise UpstreamError(e)
+                except httpx.TransportError as e:
+                    self._observe(endpoint, started, "error")
+                    error = e
+                else:
+                    self._observe(endpoint, started, str(response.status_code))
+                    if response.status_code == 429:
+                        error = None
+                    elif response.status_code in _RETRY_STATUSES:
+                        error = UpstreamError(f"HTTP {response.status_code}")
+                    else:
+                        try:
+                            response.raise_for_status()
+                        except httpx.HTTPError as e:
+                            raise _unavailable(e)
+                        self.governor.succeeded()
+                        return response.json()
+            if error is None:
+                self.governor.throttle(
+                    _retry_after(response.headers.get("Retry-After"))
+                )
+                throttles += 1
+                if throttles > settings.COINGECKO_RATE_LIMIT_RETRIES:
+                    raise _unavailable(Exception("rate limited by CoinGecko (429)"))
+                continue
+            retries += 1
+            if retries > settings.COINGECKO_RETRIES:
+                raise UpstreamError(error)
+            upstream_retries.inc(endpoint)
+            await asyncio.sleep(_retry_delay(retries))
+
+    @staticmethod
+    def _observe(endpoint: str, started: float, status: str) -> None:
+        """Record the latency and outcome of one upstream attempt."""
+        upstream_duration.observe(time.perf_counter() - started, endpoint)
+        upstream_requests.inc(endpoint, status)
+
+    async def _get_async(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        endpoint: Optional[str] = None,
+    ) -> Any:
+        """Perform a GET request on the pooled client and decode the JSON body.
+
+        Calls fail fast with 503 while the circuit breaker is open.
+        ``endpoint`` labels metrics when ``path`` embeds an identifier.
+        """
+        if not self.breaker.allow():
+            raise _unavailable(CircuitOpen("circuit breaker open"))
+        try:
+            result = await self._send(
+                f"{self.base_url}{path}", params, endpoint or path
             )
+        except UpstreamError as e:
+            self.breaker.record_failure()
+            raise _unavailable(e)
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def get_coins_market(
+        self, vs_currency: str = "inr", page: int = 1, per_page: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Fetch coins market data from CoinGecko API."""
+        rows: List[Dict[str, Any]] = self._get(
+            "/coins/markets", _coins_market_params(vs_currency, page, per_page)
+        )
+        return rows
+
+    def get_coins_markets_by_ids(
+        self, vs_currency: str, coin_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Fetch the markets rows of ``coin_ids`` in one call."""
+        rows: List[Dict[str, Any]] = self._get(
+            "/coins/markets", _coins_by_ids_params(vs_currency, coin_ids)
+        )
+        return rows
 
     def get_categories(self) -> List[Dict[str, Any]]:
         """Fetch categories from CoinGecko API."""
-        try:
-            url = f"{self.base_url}/coins/categories"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            raise HTTPException(
-                status_code=503, detail=f"CoinGecko API unavailable: {str(e)}"
-            )
+        categories: List[Dict[str, Any]] = self._get("/coins/categories")
+        return categories
 
     def get_coin_details(self, coin_id: str) -> Dict[str, Any]:
         """Fetch detailed coin information from CoinGecko API."""
-        try:
-            url = f"{self.base_url}/coins/{coin_id}"
-            params = {
-                "localization": False,
-                "tickers": False,
-                "market_data": True,
-                "community_data": False,
-                "developer_data": False,
-                "sparkline": True,
-            }
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            raise HTTPException(
-                status_code=503, detail=f"CoinGecko API unavailable: {str(e)}"
+        details: Dict[str, Any] = self._get(f"/coins/{coin_id}", _coin_details_params())
+        return details
+
+    def get_coins_list(self) -> List[Dict[str, Any]]:
+        """Fetch the id, symbol and name of every coin from CoinGecko API."""
+        coins: List[Dict[str, Any]] = self._get("/coins/list")
+        return coins
+
+    async def get_coins_market_async(
+        self, vs_currency: str = "inr", page: int = 1, per_page: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Fetch coins market data without blocking the event loop."""
+        if self._client is None:
+            return await run_in_threadpool(
+                self.get_coins_market, vs_currency, page, per_page
             )
+        rows: List[Dict[str, Any]] = await self._get_async(
+            "/coins/markets", _coins_market_params(vs_currency, page, per_page)
+        )
+        return rows
+
+    async def get_coins_markets_by_ids_async(
+        self, vs_currency: str, coin_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Fetch the markets rows of ``coin_ids`` without blocking the event loop."""
+        if self._client is None:
+            return await run_in_threadpool(
+                self.get_coins_markets_by_ids, vs_currency, coin_ids
+            )
+        rows: List[Dict[str, Any]] = await self._get_async(
+            "/coins/markets", _coins_by_ids_params(vs_currency, coin_ids)
+        )
+        return rows
+
+    async def get_categories_async(self) -> List[Dict[str, Any]]:
+        """Fetch categories without blocking the event loop."""
+        if self._client is None:
+            return await run_in_threadpool(self.get_categories)
+        categories: List[Dict[str, Any]] = await self._get_async("/coins/categories")
+        return categories
+
+    async def get_coin_details_async(self, coin_id: str) -> Dict[str, Any]:
+        """Fetch detailed coin information without blocking the event loop."""
+        if self._client is None:
+            return await run_in_threadpool(self.get_coin_details, coin_id)
+        details: Dict[str, Any] = await self._get_async(
+            f"/coins/{coin_id}", _coin_details_params(), "/coins/{id}"
+        )
+        return details
+
+    async def get_coins_list_async(self) -> List[Dict[str, Any]]:
+        """Fetch the list of every coin without blocking the event loop."""
+        if self._client is None:
+            return await run_in_threadpool(self.get_coins_list)
+        coins: List[Dict[str, Any]] = await self._get_async("/coins/list")
+        return coins
 
 
 coingecko_service = CoinGeckoService()
@@ -0,0 +1,70 @@
+"""Compact in-memory encoding of cached market values."""
+
+from array import array
+from typing import Any, Callable, Optional, Tuple
+
+# Marks a field a row did not have, so it is left out when decoding.
+ABSENT: Any = type("Absent", (), {"__repr__": lambda self: "ABSENT"})()
+
+
+def encode_value(value: Any) -> Any:
+    """Pack sparkline-like ``{"price": [float, ...]}`` values into an array.
+
+    Every other value is returned unchanged.
+    """
+    if isinstance(value, dict) and len(value) == 1:
+        prices = value.get("price")
+        if isinstance(prices, list) and all(type(p) is float for p in prices):
+            return array("d", prices)
+    return value
+
+
+def decode_value(value: Any) -> Any:
+    """Reverse :func:`encode_value`."""
+    if isinstance(value, array):
+        return {"price": value.tolist()}
+    return value
+
+
+def encode_document(document: Any) -> Any:
+    """Apply :func:`encode_value` to every nested value of a JSON document."""
+    encoded = encode_value(document)
+    if encoded is not document:
+        return encoded
+    if isinstance(document, dict):
+        return {key: encode_document(value) for key, value in document.items()}
+    if isinstance(document, list):
+        return [encode_document(value) for value in document]
+    return document
+
+
+def decode_document(
+    document: Any, decode_array: Callable[[array], Any] = decode_value
+) -> Any:
+    """Reverse :func:`encode_document`, decoding arrays with ``decode_array``."""
+    if isinstance(document, array):
+        return decode_array(document)
+    if isinstance(document, dict):
+        return {
+            key: decode_document(value, decode_array) for key, value in document.items()
+        }
+    if isinstance(document, list):
+        return [decode_document(value, decode_array) for value in document]
+    return document
+
+
+class CoinRecord:
+    """Slotted storage for one coin's field values.
+
+    ``shared`` holds the values that are the same in every currency, and
+    ``quotes`` one tuple of currency-dependent values per currency (``None``
+    when the coin was not listed in that currency). Field names live once in
+    the owning dataset's layout instead of in every row.
+    """
+
+    __slots__ = ("shared", "quotes")
+
+    def __init__(self, shared: Tuple[Any, ...], quotes: Tuple[Optional[tuple], ...]):
+        """Initialize record."""
+        self.shared = shared
+        self.quotes = quotes
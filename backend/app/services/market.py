@@ -0,0 +1,910 @@
+"""Cached market data access in front of the CoinGecko service."""
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.responses import Payload
+from app.core.shared_cache import SharedCache
+from app.core.singleflight import SingleFlight
+from app.db.database import SessionLocal
+from app.db.repository import HISTORY_RANGES, HistoryStore, SnapshotStore
+from app.services.category_index import CategoryIndex
+from app.services.coin_index import MARKET_CAP_DESC, CoinIndex
+from app.services.coin_search import CoinSearch
+from app.services.compact import decode_document, encode_document
+from app.services.coingecko import (
+    CoinGeckoService,
+    background_priority,
+    coingecko_service,
+)
+from app.services.multicurrency import MergedMarkets
+from app.services.projection import Projection
+
+logger = logging.getLogger(__name__)
+
+Fetch = Callable[[], Awaitable[Any]]
+# A view built from a cached value
+V = TypeVar("V")
+# A cached source value, the key of a view cut from it and the view builder
+View = Tuple[Any, Tuple[Hashable, ...], Callable[[], Any]]
+
+COIN_INDEX_PAGE_SIZE = 250
+
+# Views of a batch request: markets rows or full coin details
+BATCH_VIEWS = ("market", "details")
+# Most coins one upstream ``/coins/markets?ids=`` call may select
+MARKETS_IDS_PER_CALL = 250
+
+# Stands in for the coin list while it cannot be fetched
+_NO_COINS: Tuple[Dict[str, Any], ...] = ()
+
+# Set when the current request served data past its TTL
+_stale: ContextVar[bool] = ContextVar("market_data_stale", default=False)
+# Set while the refresher re-fetches data, so it skips the shared cache
+_refreshing: ContextVar[bool] = ContextVar("market_data_refreshing", default=False)
+
+
+def _ttl(override: Optional[int]) -> int:
+    """Resolve an endpoint TTL, falling back to ``CACHE_TTL_SECONDS``."""
+    return settings.CACHE_TTL_SECONDS if override is None else override
+
+
+def _grace(ttl: int) -> int:
+    """Return how long past ``ttl`` an entry may still be served stale."""
+    return max(settings.CACHE_HARD_TTL_SECONDS - ttl, 0)
+
+
+def served_stale() -> bool:
+    """Whether the current request was answered with data past its TTL."""
+    return _stale.get()
+
+
+def _batch_error(e: HTTPException) -> Dict[str, Any]:
+    """Describe why one coin of a batch could not be served."""
+    return {"status": e.status_code, "detail": e.detail}
+
+
+def _market_currencies() -> Tuple[str, ...]:
+    """Return the currencies fetched together for every markets page."""
+    return tuple(currency.lower() for currency in settings.MARKET_CURRENCIES)
+
+
+class MarketDataService:
+    """Serve CoinGecko data through a bounded in-process TTL cache.
+
+    Entries past their TTL are served stale while a background revalidation
+    runs, until ``CACHE_HARD_TTL_SECONDS`` after they were fetched. With a
+    :class:`SnapshotStore` attached, markets pages and categories are also
+    read from and written through to the database, so other workers and
+    restarted processes can warm up without calling CoinGecko. With a
+    :class:`SharedCache`, raw upstream responses are shared by every worker,
+    so only the refresher leader has to call CoinGecko; each worker still
+    decodes them into its own cache. With a
+    :class:`HistoryStore`, every refresh of the coin index is recorded as
+    price history.
+    """
+
+    def __init__(
+        self,
+        client: CoinGeckoService = coingecko_service,
+        cache: Optional[TTLCache] = None,
+        store: Optional[SnapshotStore] = None,
+        shared: Optional[SharedCache] = None,
+        history: Optional[HistoryStore] = None,
+    ):
+        """Initialize service."""
+        self.client = client
+        self.store = store
+        self.shared = shared
+        self.history = history
+        if cache is None:
+            cache = TTLCache(maxsize=settings.CACHE_MAX_ENTRIES)
+        self.cache = cache
+        self.views = TTLCache(maxsize=settings.CACHE_MAX_ENTRIES)
+        # Keys include client-chosen parameters, so payloads are capped by size
+        self.payloads = TTLCache(
+            maxsize=settings.CACHE_MAX_ENTRIES,
+            maxbytes=settings.CACHE_PAYLOAD_MAX_BYTES,
+            weigh=lambda view: view[-1].footprint,
+        )
+        self.last_good = TTLCache(maxsize=settings.CACHE_MAX_ENTRIES, clock=cache.now)
+        self.flights = SingleFlight()
+        self._revalidations: Set["asyncio.Task[Any]"] = set()
+
+    def _store(self, key: Hashable, ttl: int, fetch: Fetch) -> Awaitable[Any]:
+        """Fetch ``key`` once for all concurrent callers and cache the result."""
+
+        async def fetch_and_store() -> Any:
+            value = await fetch()
+            previous = self.last_good.peek(key)
+            self.cache.set(key, value, ttl, grace=_grace(ttl))
+            self.last_good.set(key, value, settings.CACHE_LAST_GOOD_TTL_SECONDS)
+            if previous is not None and previous is not value:
+                self._forget_views(previous)
+            return value
+
+        return self.flights.do(key, fetch_and_store)
+
+    def _revalidate(self, key: Hashable, ttl: int, fetch: Fetch) -> None:
+        """Refresh a stale entry in the background, at background priority."""
+
+        async def run() -> None:
+            try:
+                await self._store(key, ttl, fetch)
+            except Exception as e:  # stale data keeps being served
+                logger.warning("Revalidation of %s failed: %s", key, e)
+
+        with background_priority():
+            task = asyncio.ensure_future(run())
+        self._revalidations.add(task)
+        task.add_done_callback(self._revalidations.discard)
+
+    def _persisted(
+        self,
+        fetch: Fetch,
+        load: Callable[[SnapshotStore], Any],
+        save: Callable[[SnapshotStore, Any], None],
+    ) -> Fetch:
+        """Wrap ``fetch`` with a database read-through and write-through.
+
+        Database errors are logged and never fail the request.
+        """
+        store = self.store
+        if store is None:
+            return fetch
+
+        async def fetch_persisted() -> Any:
+            try:
+                value = await run_in_threadpool(load, store)
+            except Exception as e:
+                logger.warning("Snapshot read failed: %s", e)
+                value = None
+            if value is not None:
+                return value
+            value = await fetch()
+            try:
+                await run_in_threadpool(save, store, value)
+            except Exception as e:
+                logger.warning("Snapshot write failed: %s", e)
+            return value
+
+        return fetch_persisted
+
+    def _shared(self, key: Hashable, ttl: int, fetch: Fetch) -> Fetch:
+        """Wrap ``fetch`` with a read-through and write-through of the shared cache.
+
+        The refresher always fetches, so it keeps the shared copy fresh for
+        the other workers. Reads, writes and their JSON coding run in the
+        threadpool. Shared cache errors are logged and never fail the
+        request.
+        """
+        shared = self.shared
+        if shared is None:
+            return fetch
+
+        async def fetch_shared() -> Any:
+            if not _refreshing.get():
+                try:
+                    value = await run_in_threadpool(shared.get, key, ttl)
+                except Exception as e:
+                    logger.warning("Shared cache read failed: %s", e)
+                    value = None
+                if value is not None:
+                    return value
+            value = await fetch()
+            try:
+                await run_in_threadpool(shared.set, key, value)
+            except Exception as e:
+                logger.warning("Shared cache write failed: %s", e)
+            return value
+
+        return fetch_shared
+
+    async def _cached(self, key: Hashable, ttl: int, fetch: Fetch) -> Any:
+        """Return the cached value for ``key`` or fetch and store it.
+
+        Concurrent misses for the same key share a single upstream fetch. If
+        the fetch fails with 503, e.g. while the circuit breaker is open, the
+        last good value is served instead when there is one. Serving a value
+        past its TTL marks the request as stale, see :func:`served_stale`.
+        """
+        entry = self.cache.lookup(key)
+        if entry is None:
+            try:
+                return await self._store(key, ttl, fetch)
+            except HTTPException as e:
+                last_good = self.last_good.get(key)
+                if e.status_code != 503 or last_good is None:
+                    raise
+                logger.warning("Serving last good %s: %s", key, e.detail)
+                _stale.set(True)
+                return last_good
+        if entry.is_stale(self.cache.now()):
+            _stale.set(True)
+            self._revalidate(key, ttl, fetch)
+        return entry.value
+
+    def _forget_views(self, source: Any) -> None:
+        """Drop every view cut from ``source``, which has been replaced.
+
+        Views hold their sources, so without this every replaced value would
+        stay in memory as long as any view of it was not requested again.
+        """
+        for views in (self.views, self.payloads):
+            views.prune(lambda view: any(part is source for part in view[:-1]))
+
+    def _view(
+        self,
+        source: Any,
+        key: Hashable,
+        build: Callable[[], V],
+        views: Optional[TTLCache] = None,
+    ) -> V:
+        """Return the projection of ``source`` stored under ``key``, or build it.
+
+        Views are kept only as long as the cached value they were cut from;
+        a refreshed ``source`` rebuilds them on first use. They are stored in
+        ``views``, by default :attr:`views`.
+        """
+        views = self.views if views is None else views
+        view = views.get(key)
+        if view is not None and view[0] is source:
+            built: V = view[1]
+            return built
+        value = build()
+        views.set(key, (source, value), settings.CACHE_HARD_TTL_SECONDS)
+        return value
+
+    def _payload(self, source: Any, key: Hashable, build: Callable[[], Any]) -> Payload:
+        """Return the JSON encoding of a view, encoded once per ``source``."""
+        return self._view(source, key, lambda: Payload.encode(build()), self.payloads)
+
+    def info(self) -> Dict[str, Any]:
+        """Return cache and request coalescing counters."""
+        info = {
+            "cache": self.cache.info(),
+            "views": self.views.info(),
+            "payloads": self.payloads.info(),
+            "singleflight": self.flights.info(),
+        }
+        if self.shared is not None:
+            info["shared"] = self.shared.info()
+        return info
+
+    def _coins_market_request(self, vs_currency: str, page: int, per_page: int):
+        """Return the cache key, TTL and fetcher for a markets page."""
+        vs_currency = vs_currency.lower()
+        ttl = _ttl(settings.CACHE_MARKETS_TTL_SECONDS)
+        key = ("coins_market", vs_currency, page, per_page)
+        fetch = self._persisted(
+            lambda: self.client.get_coins_market_async(
+                vs_currency=vs_currency, page=page, per_page=per_page
+            ),
+            lambda store: store.load_coins_market(vs_currency, page, per_page, ttl),
+            lambda store, rows: store.save_coins_market(vs_currency, rows),
+        )
+        return key, ttl, self._shared(key, ttl, fetch)
+
+    def _markets_pages_fetch(self, page: int, per_page: int) -> Fetch:
+        """Return a fetcher for one page in every ``MARKET_CURRENCIES`` entry.
+
+        The currencies are fetched concurrently and read from / written to
+        the shared cache and snapshot store as one unit.
+        """
+        currencies = _market_currencies()
+        ttl = _ttl(settings.CACHE_MARKETS_TTL_SECONDS)
+
+        async def fetch_pages() -> Dict[str, List[Dict[str, Any]]]:
+            pages = await asyncio.gather(
+                *(
+                    self.client.get_coins_market_async(
+                        vs_currency=currency, page=page, per_page=per_page
+                    )
+                    for currency in currencies
+                )
+            )
+            return dict(zip(currencies, pages))
+
+        return self._shared(
+            ("coins_markets", currencies, page, per_page),
+            ttl,
+            self._persisted(
+                fetch_pages,
+                lambda store: store.load_coins_markets(currencies, page, per_page, ttl),
+                lambda store, pages: store.save_coins_markets(pages),
+            ),
+        )
+
+    def _merged_markets_request(self, page: int, per_page: int):
+        """Return the cache key, TTL and fetcher for a multi-currency page."""
+        fetch = self._markets_pages_fetch(page, per_page)
+
+        async def fetch_merged() -> MergedMarkets:
+            return MergedMarkets(await fetch())
+
+        return (
+            ("coins_markets", _market_currencies(), page, per_page),
+            _ttl(settings.CACHE_MARKETS_TTL_SECONDS),
+            fetch_merged,
+        )
+
+    def _coin_index_request(self):
+        """Return the cache key, TTL and fetcher for the top coins index.
+
+        The index is built from ``COIN_INDEX_PAGE_SIZE`` pages covering the
+        top ``COIN_INDEX_SIZE`` coins in every ``MARKET_CURRENCIES`` entry.
+        """
+        size = settings.COIN_INDEX_SIZE
+        pages = -(-size // COIN_INDEX_PAGE_SIZE)
+
+        async def fetch_index() -> CoinIndex:
+            fetched = await asyncio.gather(
+                *(
+                    self._markets_pages_fetch(page, COIN_INDEX_PAGE_SIZE)()
+                    for page in range(1, pages + 1)
+                )
+            )
+            combined = {
+                currency: [row for page in fetched for row in page[currency]][:size]
+                for currency in _market_currencies()
+            }
+            return CoinIndex(MergedMarkets(combined))
+
+        return (
+            ("coin_index", _market_currencies(), size),
+            _ttl(settings.CACHE_MARKETS_TTL_SECONDS),
+            fetch_index,
+        )
+
+    def _categories_request(self):
+        """Return the cache key, TTL and fetcher for the category list."""
+        ttl = _ttl(settings.CACHE_CATEGORIES_TTL_SECONDS)
+        fetch = self._persisted(
+            self.client.get_categories_async,
+            lambda store: store.load_categories(ttl),
+            lambda store, rows: store.save_categories(rows),
+        )
+        return ("categories",), ttl, self._shared(("categories",), ttl, fetch)
+
+    def _coin_list_request(self):
+        """Return the cache key, TTL and fetcher for the list of every coin."""
+        key = ("coin_list",)
+        ttl = _ttl(settings.CACHE_COIN_LIST_TTL_SECONDS)
+        return key, ttl, self._shared(key, ttl, self.client.get_coins_list_async)
+
+    def _coin_details_request(
+        self, coin_id: str, limit: Optional[asyncio.Semaphore] = None
+    ):
+        """Return the cache key, TTL and fetcher for one coin's details.
+
+        With a ``limit``, the fetch waits for the semaphore first.
+        """
+        coin_id = coin_id.lower()
+
+        async def fetch() -> Dict[str, Any]:
+            if limit is None:
+                return await self._compact_details(coin_id)
+            async with limit:
+                return await self._compact_details(coin_id)
+
+        return (
+            ("coin_details", coin_id),
+            _ttl(settings.CACHE_COIN_DETAILS_TTL_SECONDS),
+            fetch,
+        )
+
+    async def _compact_details(self, coin_id: str) -> Dict[str, Any]:
+        """Fetch one coin's details with its sparkline packed for caching."""
+        fetch = self._shared(
+            ("coin_details", coin_id),
+            _ttl(settings.CACHE_COIN_DETAILS_TTL_SECONDS),
+            lambda: self.client.get_coin_details_async(coin_id),
+        )
+        details: Dict[str, Any] = encode_document(await fetch())
+        return details
+
+    async def _coins_market_view(
+        self,
+        vs_currency: str,
+        page: int,
+        per_page: int,
+        order: Optional[str],
+        symbol_prefix: Optional[str],
+        projection: Optional[Projection],
+    ) -> View:
+        """Resolve a markets page to its cached source, view key and builder.
+
+        For currencies listed in ``MARKET_CURRENCIES``, pages within the top
+        ``COIN_INDEX_SIZE`` coins, and any sorted or filtered page, are cut
+        from the coin index; deeper pages come from a shared multi-currency
+        page. Other currencies are fetched on their own and cannot be sorted
+        or filtered.
+        """
+        vs_currency = vs_currency.lower()
+        projection = projection or None
+        projected = None if projection is None else projection.key
+        if vs_currency not in _market_currencies():
+            if order or symbol_prefix:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Sorting and filtering are only supported for "
+                    + ", ".join(_market_currencies()),
+                )
+            rows = await self._cached(
+                *self._coins_market_request(vs_currency, page, per_page)
+            )
+            return (
+                rows,
+                ("coins_market", vs_currency, page, per_page, projected),
+                lambda: (
+                    rows
+                    if projection is None
+                    else [projection.row(row) for row in rows]
+                ),
+            )
+        if order or symbol_prefix or page * per_page <= settings.COIN_INDEX_SIZE:
+            index = await self.get_coin_index()
+            order = order or MARKET_CAP_DESC
+            return (
+                index,
+                ("coin_index", vs_currency, page, per_page, order, symbol_prefix)
+                + (projected,),
+                lambda: index.query(
+                    vs_currency, page, per_page, order, symbol_prefix, projection
+                ),
+            )
+        merged = await self.get_coins_markets(page, per_page)
+        return (
+            merged,
+            ("coins_markets", vs_currency, page, per_page, projected),
+            lambda: merged.project(vs_currency, projection),
+        )
+
+    async def get_coins_market(
+        self,
+        vs_currency: str = "inr",
+        page: int = 1,
+        per_page: int = 10,
+        order: Optional[str] = None,
+        symbol_prefix: Optional[str] = None,
+        projection: Optional[Projection] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return one page of market data; projected pages are cached."""
+        source, key, build = await self._coins_market_view(
+            vs_currency, page, per_page, order, symbol_prefix, projection
+        )
+        rows: List[Dict[str, Any]] = (
+            self._view(source, key, build) if projection else build()
+        )
+        return rows
+
+    async def get_coins_market_payload(
+        self,
+        vs_currency: str = "inr",
+        page: int = 1,
+        per_page: int = 10,
+        order: Optional[str] = None,
+        symbol_prefix: Optional[str] = None,
+        projection: Optional[Projection] = None,
+    ) -> Payload:
+        """Return one page of market data serialized once per refresh."""
+        _stale.set(False)
+        return self._payload(
+            *await self._coins_market_view(
+                vs_currency, page, per_page, order, symbol_prefix, projection
+            )
+        )
+
+    async def get_coins_markets(
+        self, page: int = 1, per_page: int = 10
+    ) -> MergedMarkets:
+        """Return one page of market data for every ``MARKET_CURRENCIES`` entry."""
+        markets: MergedMarkets = await self._cached(
+            *self._merged_markets_request(page, per_page)
+        )
+        return markets
+
+    async def get_coin_index(self) -> CoinIndex:
+        """Return the index of the top ``COIN_INDEX_SIZE`` coins."""
+        index: CoinIndex = await self._cached(*self._coin_index_request())
+        return index
+
+    async def _coin_search(self) -> Tuple[Any, CoinIndex, CoinSearch]:
+        """Return the coin list, the coin index and the search built from them.
+
+        The search covers the coin list and the coin index, which ranks it.
+        Without the coin list, e.g. while CoinGecko is down on a cold start,
+        the coins of the coin index are still searchable and the response
+        is marked stale. Building runs in the threadpool, once for all
+        concurrent callers.
+        """
+        index = await self.get_coin_index()
+        try:
+            coins = await self._cached(*self._coin_list_request())
+        except HTTPException as e:
+            logger.warning("Searching without the coin list: %s", e.detail)
+            _stale.set(True)
+            coins = _NO_COINS
+        view = self.views.get(("coin_search",))
+        if view is not None and view[0] is coins and view[1] is index:
+            built: CoinSearch = view[2]
+            return coins, index, built
+
+        async def build() -> CoinSearch:
+            search = await run_in_threadpool(CoinSearch, coins, index)
+            self.views.set(
+                ("coin_search",),
+                (coins, index, search),
+                settings.CACHE_HARD_TTL_SECONDS,
+            )
+            return search
+
+        search: CoinSearch = await self.flights.do(
+            ("coin_search", id(coins), id(index)), build
+        )
+        return coins, index, search
+
+    async def get_coin_search(self) -> CoinSearch:
+        """Return the coin search index, rebuilt when its sources change."""
+        _, _, search = await self._coin_search()
+        return search
+
+    async def search_coins_payload(self, query: str, limit: int = 10) -> Payload:
+        """Return the coins matching ``query``, serialized once per refresh.
+
+        Payloads are stored with the coin list and index the search was
+        built from, so replacing either drops them with the search.
+        """
+        _stale.set(False)
+        coins, index, search = await self._coin_search()
+        prefix = query.strip().lower()
+        key = ("coin_search", prefix, limit)
+        view = self.payloads.get(key)
+        if view is not None and view[2] is search:
+            payload: Payload = view[3]
+            return payload
+        payload = Payload.encode(search.search(prefix, limit))
+        self.payloads.set(
+            key, (coins, index, search, payload), settings.CACHE_HARD_TTL_SECONDS
+        )
+        return payload
+
+    def _history_request(
+        self, history: HistoryStore, coin_id: str, vs_currency: str, range_: str
+    ):
+        """Return the cache key, TTL and loader for one chart range."""
+
+        async def load() -> List[List[float]]:
+            try:
+                return await run_in_threadpool(
+                    history.load, coin_id, vs_currency, range_
+                )
+            except Exception as e:
+                logger.warning("History read failed: %s", e)
+                raise HTTPException(
+                    status_code=503, detail="Price history is unavailable"
+                )
+
+        return (
+            ("history", coin_id, vs_currency, range_),
+            _ttl(settings.CACHE_MARKETS_TTL_SECONDS),
+            load,
+        )
+
+    async def get_coin_history_payload(
+        self, coin_id: str, vs_currency: str = "inr", range_: str = "7d"
+    ) -> Payload:
+        """Return the OHLC candles of one coin over ``range_``, serialized."""
+        _stale.set(False)
+        history = self.history
+        if history is None:
+            raise HTTPException(status_code=404, detail="Price history is not enabled")
+        coin_id, vs_currency = coin_id.lower(), vs_currency.lower()
+        candles = await self._cached(
+            *self._history_request(history, coin_id, vs_currency, range_)
+        )
+        if not candles:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No price history for {coin_id} in {vs_currency}",
+            )
+        resolution, _ = HISTORY_RANGES[range_]
+        return self._payload(
+            candles,
+            ("history", coin_id, vs_currency, range_),
+            lambda: {
+                "id": coin_id,
+                "vs_currency": vs_currency,
+                "range": range_,
+                "resolution_seconds": resolution,
+                "candles": candles,
+            },
+        )
+
+    async def get_categories(self) -> List[Dict[str, Any]]:
+        """Return all coin categories."""
+        categories: List[Dict[str, Any]] = await self._cached(
+            *self._categories_request()
+        )
+        return categories
+
+    def _category_index(self, categories: List[Dict[str, Any]]) -> CategoryIndex:
+        """Return the category index of ``categories``, built once per refresh."""
+        return self._view(
+            categories, ("category_index",), lambda: CategoryIndex(categories)
+        )
+
+    async def get_category_index(self) -> CategoryIndex:
+        """Return the sorted, encoded index of all coin categories."""
+        return self._category_index(await self.get_categories())
+
+    async def get_categories_payload(
+        self,
+        sort: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Payload:
+        """Return one sorted, filtered page of categories, cut from the index."""
+        _stale.set(False)
+        categories = await self.get_categories()
+        index = self._category_index(categories)
+        search = search.lower() if search else None
+        return self._view(
+            categories,
+            ("categories", sort, search, limit, offset),
+            lambda: Payload(index.query(sort, search, limit, offset)),
+            self.payloads,
+        )
+
+    async def _coin_details_view(
+        self,
+        coin_id: str,
+        projection: Optional[Projection],
+        limit: Optional[asyncio.Semaphore] = None,
+    ) -> View:
+        """Resolve coin details to their cached source, view key and builder."""
+        key, ttl, fetch = self._coin_details_request(coin_id, limit)
+        details = await self._cached(key, ttl, fetch)
+        if not projection:
+            return details, key + (None,), lambda: decode_document(details)
+        return (
+            details,
+            key + (projection.key,),
+            lambda: projection.document(details),
+        )
+
+    async def get_coin_details(
+        self, coin_id: str, projection: Optional[Projection] = None
+    ) -> Dict[str, Any]:
+        """Return the details of one coin, projected if requested."""
+        source, key, build = await self._coin_details_view(coin_id, projection)
+        details: Dict[str, Any] = (
+            self._view(source, key, build) if projection else build()
+        )
+        return details
+
+    async def get_coin_details_payload(
+        self, coin_id: str, projection: Optional[Projection] = None
+    ) -> Payload:
+        """Return the details of one coin serialized once per refresh."""
+        _stale.set(False)
+        return self._payload(*await self._coin_details_view(coin_id, projection))
+
+    async def _fetch_market_rows(
+        self, vs_currency: str, coin_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch the markets rows of ``coin_ids`` in one call and cache each."""
+        ttl = _ttl(settings.CACHE_MARKETS_TTL_SECONDS)
+        rows = await self.client.get_coins_markets_by_ids_async(vs_currency, coin_ids)
+        found = {}
+        for row in rows:
+            key = ("coin_market", vs_currency, row["id"])
+            self.cache.set(key, row, ttl, grace=_grace(ttl))
+            self.last_good.set(key, row, settings.CACHE_LAST_GOOD_TTL_SECONDS)
+            found[row["id"]] = row
+        return found
+
+    async def _batch_market(
+        self, coin_ids: List[str], vs_currency: str, projection: Optional[Projection]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return markets rows and per-id errors for ``coin_ids``.
+
+        Coins in a fresh coin index, or cached by an earlier batch, are served
+        locally; the rest are selected with ``/coins/markets?ids=`` calls of
+        up to ``MARKETS_IDS_PER_CALL`` coins, sent concurrently.
+        """
+        project = (lambda row: row) if projection is None else projection.row
+        index = None
+        if vs_currency in _market_currencies():
+            index = self.cache.get(self._coin_index_request()[0])
+        data: Dict[str, Any] = {}
+        missing = []
+        for coin_id in coin_ids:
+            if index is not None and index.markets.quoted(coin_id, vs_currency):
+                data[coin_id] = index.markets.row(coin_id, vs_currency, projection)
+                continue
+            row = self.cache.get(("coin_market", vs_currency, coin_id))
+            if row is None:
+                missing.append(coin_id)
+            else:
+                data[coin_id] = project(row)
+
+        async def fetch(chunk: List[str]) -> Any:
+            try:
+                return await self._fetch_market_rows(vs_currency, chunk)
+            except HTTPException as e:
+                return e
+
+        chunks = [
+            missing[start : start + MARKETS_IDS_PER_CALL]
+            for start in range(0, len(missing), MARKETS_IDS_PER_CALL)
+        ]
+        errors: Dict[str, Any] = {}
+        for chunk, found in zip(chunks, await asyncio.gather(*map(fetch, chunks))):
+            for coin_id in chunk:
+                if isinstance(found, HTTPException):
+                    row = self.last_good.get(("coin_market", vs_currency, coin_id))
+                    if found.status_code == 503 and row is not None:
+                        _stale.set(True)
+                        data[coin_id] = project(row)
+                    else:
+                        errors[coin_id] = _batch_error(found)
+                elif coin_id in found:
+                    data[coin_id] = project(found[coin_id])
+                else:
+                    errors[coin_id] = {"status": 404, "detail": "Coin not found"}
+        return {
+            coin_id: data[coin_id] for coin_id in coin_ids if coin_id in data
+        }, errors
+
+    async def _batch_details(
+        self, coin_ids: List[str], projection: Optional[Projection]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Return coin details and per-id errors for ``coin_ids``.
+
+        Cached details are served at once; misses are fetched concurrently,
+        at most ``BATCH_MAX_CONCURRENCY`` at a time.
+        """
+        limit = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+        async def one(coin_id: str) -> Tuple[Any, bool]:
+            try:
+                view = await self._coin_details_view(coin_id, projection, limit)
+            except HTTPException as e:
+                return e, False
+            # Each coin runs in its own task, so report staleness back
+            return self._view(*view), served_stale()
+
+        data: Dict[str, Any] = {}
+        errors: Dict[str, Any] = {}
+        results = await asyncio.gather(*map(one, coin_ids))
+        for coin_id, (result, stale) in zip(coin_ids, results):
+            if isinstance(result, HTTPException):
+                errors[coin_id] = _batch_error(result)
+                continue
+            data[coin_id] = result
+            if stale:
+                _stale.set(True)
+        return data, errors
+
+    async def get_coins_batch(
+        self,
+        coin_ids: List[str],
+        vs_currency: str = "inr",
+        view: str = "market",
+        projection: Optional[Projection] = None,
+    ) -> Dict[str, Any]:
+        """Return many coins at once, with an error entry per coin that failed.
+
+        ``view`` selects markets rows in ``vs_currency`` or full coin details.
+        """
+        if view not in BATCH_VIEWS:
+            raise ValueError(f"Unknown batch view: {view}")
+        coin_ids = list(dict.fromkeys(coin_id.lower() for coin_id in coin_ids))
+        projection = projection or None
+        if view == "details":
+            data, errors = await self._batch_details(coin_ids, projection)
+        else:
+            data, errors = await self._batch_market(
+                coin_ids, vs_currency.lower(), projection
+            )
+        return {"data": data, "errors": errors}
+
+    async def get_coins_batch_payload(
+        self,
+        coin_ids: List[str],
+        vs_currency: str = "inr",
+        view: str = "market",
+        projection: Optional[Projection] = None,
+    ) -> Payload:
+        """Return many coins at once, serialized."""
+        _stale.set(False)
+        return Payload.encode(
+            await self.get_coins_batch(coin_ids, vs_currency, view, projection)
+        )
+
+    async def refresh_coin_index(self) -> CoinIndex:
+        """Rebuild the top coins index from upstream and record its prices."""
+        token = _refreshing.set(True)
+        try:
+            index: CoinIndex = await self._store(*self._coin_index_request())
+        finally:
+            _refreshing.reset(token)
+        if self.history is not None:
+            await self._record_history(self.history, index)
+        return index
+
+    async def _record_history(self, history: HistoryStore, index: CoinIndex) -> None:
+        """Append the current price of every indexed coin to the history.
+
+        History errors are logged and never fail the refresh.
+        """
+        markets = index.markets
+        points = [
+            (coin_id, currency, markets.get(coin_id, currency, "current_price"))
+            for currency in markets.currencies
+            for coin_id in markets.order[currency]
+        ]
+        try:
+            await run_in_threadpool(history.append, points)
+        except Exception as e:
+            logger.warning("History write failed: %s", e)
+
+    async def refresh_coin_search(self) -> CoinSearch:
+        """Rebuild the coin search index if the coin list or index changed."""
+        return await self.get_coin_search()
+
+    async def refresh_categories(self) -> List[Dict[str, Any]]:
+        """Re-fetch the category list into the cache and rebuild its index."""
+        token = _refreshing.set(True)
+        try:
+            categories: List[Dict[str, Any]] = await self._store(
+                *self._categories_request()
+            )
+        finally:
+            _refreshing.reset(token)
+        self._category_index(categories)
+        return categories
+
+    async def purge_shared(self) -> int:
+        """Delete shared snapshots older than ``CACHE_HARD_TTL_SECONDS``.
+
+        Returns how many were deleted. Shared cache errors are logged.
+        """
+        if self.shared is None:
+            return 0
+        try:
+            return await run_in_threadpool(
+                self.shared.purge, settings.CACHE_HARD_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.warning("Shared cache purge failed: %s", e)
+            return 0
+
+
+market_service = MarketDataService(
+    store=SnapshotStore(SessionLocal) if settings.CACHE_L2_ENABLED else None,
+    shared=(
+        SharedCache.from_directory(settings.SHARED_CACHE_DIR)
+        if settings.SHARED_CACHE_DIR
+        else None
+    ),
+    history=HistoryStore(SessionLocal) if settings.HISTORY_ENABLED else None,
+)
@@ -0,0 +1,146 @@
+"""Merge per-currency market pages into one compact dataset."""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from app.services.compact import ABSENT, CoinRecord, decode_value, encode_value
+from app.services.projection import Projection
+
+Row = Dict[str, Any]
+
+
+def _varies(rows: Mapping[str, Row], field: str) -> bool:
+    """Whether ``field`` differs between the per-currency rows of a coin."""
+    values = [row.get(field, ABSENT) for row in rows.values()]
+    return any(value != values[0] for value in values[1:])
+
+
+class MergedMarkets:
+    """Market rows for several currencies merged per coin id.
+
+    Fields that are identical in every currency for every coin are stored
+    once per coin; currency-dependent fields (prices, market caps,
+    sparklines, ...) once per coin and currency. Rows are kept as slotted
+    :class:`CoinRecord` tuples with sparklines packed into float arrays, and
+    are only turned back into the upstream JSON shape by :meth:`row` and
+    :meth:`project`.
+    """
+
+    __slots__ = ("currencies", "order", "fields", "records", "_slots", "_layout")
+
+    def __init__(self, pages: Mapping[str, Sequence[Row]]):
+        """Merge ``pages``, a mapping of currency to upstream markets rows."""
+        self.currencies: Tuple[str, ...] = tuple(pages)
+        self.order: Dict[str, Tuple[str, ...]] = {}
+        by_id: Dict[str, Dict[str, Row]] = {}
+        fields: Dict[str, None] = {}
+        for currency, page in pages.items():
+            order = []
+            for row in page:
+                quotes = by_id.setdefault(row["id"], {})
+                if currency not in quotes:
+                    quotes[currency] = row
+                    order.append(row["id"])
+                    fields.update(dict.fromkeys(row))
+            self.order[currency] = tuple(order)
+
+        self.fields: Tuple[str, ...] = tuple(fields)
+        quoted = {
+            field
+            for field in self.fields
+            if any(_varies(coin_rows, field) for coin_rows in by_id.values())
+        }
+        shared_fields = [field for field in self.fields if field not in quoted]
+        quote_fields = [field for field in self.fields if field in quoted]
+        self._slots = {currency: slot for slot, currency in enumerate(self.currencies)}
+        # field -> (stored per currency, position in its value tuple)
+        self._layout: Dict[str, Tuple[bool, int]] = {}
+        for field in self.fields:
+            if field in quoted:
+                self._layout[field] = (True, quote_fields.index(field))
+            else:
+                self._layout[field] = (False, shared_fields.index(field))
+
+        self.records: Dict[str, CoinRecord] = {}
+        for coin_id, coin_rows in by_id.items():
+            base = next(iter(coin_rows.values()))
+            shared = tuple(
+                encode_value(base.get(field, ABSENT)) for field in shared_fields
+            )
+            quote_values = tuple(
+                (
+                    tuple(
+                        encode_value(coin_rows[currency].get(field, ABSENT))
+                        for field in quote_fields
+                    )
+                    if currency in coin_rows
+                    else None
+                )
+                for currency in self.currencies
+            )
+            self.records[coin_id] = CoinRecord(shared, quote_values)
+
+    def __contains__(self, currency: str) -> bool:
+        """Whether ``currency`` was part of the merge."""
+        return currency in self.order
+
+    def __len__(self) -> int:
+        """Return the number of distinct coins."""
+        return len(self.records)
+
+    def quoted(self, coin_id: str, currency: str) -> bool:
+        """Whether ``coin_id`` was listed in ``currency``."""
+        record = self.records.get(coin_id)
+        slot = self._slots.get(currency)
+        return (
+            record is not None and slot is not None and record.quotes[slot] is not None
+        )
+
+    def get(self, coin_id: str, currency: str, field: str, default: Any = None) -> Any:
+        """Return one field of a coin in ``currency`` without building the row."""
+        placement = self._layout.get(field)
+        if placement is None:
+            return default
+        quoted, index = placement
+        record = self.records[coin_id]
+        values = record.quotes[self._slots[currency]] if quoted else record.shared
+        if values is None:
+            return default
+        value = values[index]
+        return default if value is ABSENT else decode_value(value)
+
+    def row(
+        self, coin_id: str, currency: str, projection: Optional[Projection] = None
+    ) -> Row:
+        """Return the upstream row of one coin in ``currency``.
+
+        With a ``projection`` only its fields are decoded, and sparklines are
+        downsampled straight from the packed arrays.
+        """
+        record = self.records[coin_id]
+        quote = record.quotes[self._slots[currency]]
+        if quote is None:
+            raise KeyError(f"{coin_id} is not listed in {currency}")
+        decode = decode_value if projection is None else projection.value
+        row = {}
+        for field, (quoted, index) in self._layout.items():
+            if projection is not None and not projection.includes(field):
+                continue
+            value = quote[index] if quoted else record.shared[index]
+            if value is not ABSENT:
+                row[field] = decode(value)
+        return row
+
+    def project(
+        self, currency: str, projection: Optional[Projection] = None
+    ) -> List[Row]:
+        """Return the rows for ``currency`` in upstream order.
+
+        A coin listed more than once, e.g. when ranks shift between two
+        fetched pages, is kept at its first position.
+        """
+        return [
+            self.row(coin_id, currency, projection) for coin_id in self.order[currency]
+        ]
+
+    def pages(self) -> Dict[str, List[Row]]:
+        """Return the rows for every merged currency."""
+        return {currency: self.project(currency) for currency in self.currencies}
@@ -0,0 +1,126 @@
+"""Field projection and sparkline downsampling of market responses."""
+
+from array import array
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence
+from app.services.compact import decode_document, decode_value, encode_value
+
+SPARKLINE_MODES = ("lttb", "stride")
+
+
+def stride(points: Sequence[float], count: int) -> List[float]:
+    """Keep ``count`` evenly spaced points, always including both ends."""
+    if count >= len(points) or count < 2:
+        return list(points)
+    step = (len(points) - 1) / (count - 1)
+    return [points[round(i * step)] for i in range(count)]
+
+
+def lttb(points: Sequence[float], count: int) -> List[float]:
+    """Keep ``count`` points chosen by Largest-Triangle-Three-Buckets.
+
+    Points are spaced evenly in time, so their index serves as the x value.
+    The first and last points are always kept; of every bucket in between,
+    the point forming the largest triangle with the previously kept point
+    and the average of the next bucket is kept.
+    """
+    size = len(points)
+    if count >= size or count < 3:
+        return stride(points, count)
+    bucket = (size - 2) / (count - 2)
+    kept = [points[0]]
+    previous = 0
+    for i in range(count - 2):
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, size)
+        avg_x = (end + next_end - 1) / 2
+        avg_y = sum(points[end:next_end]) / (next_end - end)
+        prev_y = points[previous]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (previous - avg_x) * (points[j] - prev_y)
+                - (previous - j) * (avg_y - prev_y)
+            )
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(points[best])
+        previous = best
+    kept.append(points[-1])
+    return kept
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma separated ``fields`` query value."""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()] or None
+
+
+class Projection:
+    """Which fields of a response to keep and how far to thin sparklines.
+
+    ``id`` is always kept so clients can still key the rows. Sparklines are
+    stored as float arrays (see :mod:`app.services.compact`) and are
+    downsampled from those arrays directly.
+    """
+
+    __slots__ = ("fields", "sparkline_points", "sparkline_mode")
+
+    def __init__(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        sparkline_points: Optional[int] = None,
+        sparkline_mode: str = "lttb",
+    ):
+        """Initialize projection; ``None`` keeps every field or point."""
+        if sparkline_mode not in SPARKLINE_MODES:
+            raise ValueError(f"Unknown sparkline mode: {sparkline_mode}")
+        self.fields = None if fields is None else frozenset(fields) | {"id"}
+        self.sparkline_points = sparkline_points
+        self.sparkline_mode = sparkline_mode
+
+    def __bool__(self) -> bool:
+        """Whether the projection changes anything."""
+        return self.fields is not None or self.sparkline_points is not None
+
+    @property
+    def key(self) -> Hashable:
+        """Return a cache key component identifying this projection."""
+        fields = None if self.fields is None else tuple(sorted(self.fields))
+        points = self.sparkline_points
+        return fields, points, self.sparkline_mode if points else None
+
+    def includes(self, field: str) -> bool:
+        """Whether ``field`` is kept."""
+        return self.fields is None or field in self.fields
+
+    def _decode_array(self, series: array) -> Dict[str, List[float]]:
+        """Decode a packed price series, downsampled if requested."""
+        if self.sparkline_points is None:
+            decoded: Dict[str, List[float]] = decode_value(series)
+            return decoded
+        thin = lttb if self.sparkline_mode == "lttb" else stride
+        return {"price": thin(series, self.sparkline_points)}
+
+    def value(self, value: Any) -> Any:
+        """Decode one compact field value."""
+        if isinstance(value, array):
+            return self._decode_array(value)
+        return value
+
+    def row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Project a plain upstream markets row."""
+        return {
+            field: self.value(encode_value(value))
+            for field, value in row.items()
+            if self.includes(field)
+        }
+
+    def document(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Project a compact document such as cached coin details."""
+        return {
+            field: decode_document(value, self._decode_array)
+            for field, value in document.items()
+            if self.includes(field)
+        }
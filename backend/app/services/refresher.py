@@ -0,0 +1,85 @@
+"""Background refresh of hot market datasets."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, List, Optional
+from app.core.config import settings
+from app.services.coingecko import background_priority
+from app.services.market import MarketDataService, market_service
+
+logger = logging.getLogger(__name__)
+
+
+class MarketRefresher:
+    """Periodically re-fetch hot datasets so handlers answer from memory.
+
+    Refreshes run at background priority, so they yield the upstream request
+    budget to interactive cache misses.
+    """
+
+    def __init__(
+        self,
+        market: MarketDataService = market_service,
+        interval: Optional[float] = None,
+    ):
+        """Initialize refresher; the interval defaults to the settings value."""
+        self.market = market
+        self.interval = interval or settings.REFRESH_INTERVAL_SECONDS
+        self.runs = 0
+        self.failures = 0
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the refresh loop is active."""
+        return self._task is not None and not self._task.done()
+
+    async def _refresh_coins(self) -> None:
+        """Refresh the coin index, then the coin search ranked by it.
+
+        Building the search while the index is being replaced would rank it
+        by the old index, leaving the first search to rebuild it inline.
+        """
+        await self.market.refresh_coin_index()
+        await self.market.refresh_coin_search()
+
+    def _jobs(self) -> List[Awaitable[Any]]:
+        """Build one refresh coroutine per hot dataset."""
+        return [self._refresh_coins(), self.market.refresh_categories()]
+
+    async def refresh_once(self) -> int:
+        """Refresh every hot dataset once and return the number that failed."""
+        with background_priority():
+            results = await asyncio.gather(*self._jobs(), return_exceptions=True)
+        failed = [result for result in results if isinstance(result, Exception)]
+        for error in failed:
+            logger.warning("Market refresh failed: %s", error)
+        await self.market.purge_shared()
+        self.runs += 1
+        self.failures += len(failed)
+        return len(failed)
+
+    async def _run(self) -> None:
+        """Refresh forever on the configured interval."""
+        while True:
+            await self.refresh_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the refresh loop on the running event loop."""
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the refresh loop and wait for it to finish."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+market_refresher = MarketRefresher()
@@ -0,0 +1,228 @@
+"""Price streaming: one shared poller fanning diffs out to subscribers."""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+import orjson
+from app.core.config import settings
+from app.services.coingecko import background_priority
+from app.services.market import MarketDataService, market_service
+from app.services.projection import Projection
+
+logger = logging.getLogger(__name__)
+
+Row = Dict[str, Any]
+
+# Fields streamed unless a subscriber asks for others
+STREAM_FIELDS = (
+    "id",
+    "symbol",
+    "name",
+    "current_price",
+    "market_cap",
+    "market_cap_rank",
+    "total_volume",
+    "price_change_percentage_24h",
+    "last_updated",
+)
+
+
+class StreamKey(NamedTuple):
+    """What a subscriber watches: coin ids, or else a page, in a currency."""
+
+    currency: str
+    ids: Optional[Tuple[str, ...]] = None
+    page: int = 1
+    per_page: int = 10
+    fields: Tuple[str, ...] = STREAM_FIELDS
+
+
+def _encode(message: Dict[str, Any]) -> str:
+    """Encode a message as JSON text."""
+    return orjson.dumps(message).decode()
+
+
+def _snapshot(rows: Dict[str, Row]) -> str:
+    """Encode the full state of a stream."""
+    return _encode({"type": "snapshot", "data": list(rows.values())})
+
+
+def _diff(old: Dict[str, Row], new: Dict[str, Row]) -> Optional[Dict[str, Any]]:
+    """Describe how ``new`` differs from ``old``, or ``None`` if it does not.
+
+    New coins are sent whole, known coins only with their changed fields
+    plus ``id``. ``order`` is included when the coin order changed.
+    """
+    changed: List[Row] = []
+    for coin_id, row in new.items():
+        previous = old.get(coin_id)
+        if previous is None:
+            changed.append(row)
+            continue
+        fields = {
+            field: value
+            for field, value in row.items()
+            if field not in previous or previous[field] != value
+        }
+        if fields:
+            changed.append({"id": coin_id, **fields})
+    removed = [coin_id for coin_id in old if coin_id not in new]
+    reordered = list(old) != list(new)
+    if not changed and not removed and not reordered:
+        return None
+    message: Dict[str, Any] = {"type": "diff", "changed": changed, "removed": removed}
+    if reordered:
+        message["order"] = list(new)
+    return message
+
+
+class Subscription:
+    """A subscriber's bounded queue of encoded messages."""
+
+    __slots__ = ("key", "queue")
+
+    def __init__(self, key: StreamKey, size: int):
+        """Initialize an empty queue holding up to ``size`` messages."""
+        self.key = key
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=size)
+
+    def offer(self, message: str) -> bool:
+        """Queue ``message`` unless the subscriber is too far behind."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def resync(self, snapshot: str) -> None:
+        """Replace every pending message with one full ``snapshot``."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(snapshot)
+
+
+class PriceStreamer:
+    """Poll market data once per interval and push diffs to subscribers.
+
+    Subscribers watching the same :class:`StreamKey` share one fetch, one
+    diff and one encoded message per tick. Fetches go through the market
+    service cache at background priority, so the number of CoinGecko calls
+    does not grow with the number of clients. A subscriber whose queue is
+    full is not waited for: its pending diffs are dropped and replaced by a
+    snapshot of the current state.
+    """
+
+    def __init__(
+        self,
+        market: MarketDataService = market_service,
+        interval: Optional[float] = None,
+        queue_size: Optional[int] = None,
+    ):
+        """Initialize streamer; limits default to the settings values."""
+        self.market = market
+        self.interval = interval or settings.STREAM_INTERVAL_SECONDS
+        self.queue_size = queue_size or settings.STREAM_QUEUE_SIZE
+        self.polls = 0
+        self.resyncs = 0
+        self._states: Dict[StreamKey, Dict[str, Row]] = {}
+        self._subscribers: Dict[StreamKey, Set[Subscription]] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the poll loop is active."""
+        return self._task is not None and not self._task.done()
+
+    async def _fetch(self, key: StreamKey) -> Dict[str, Row]:
+        """Return the current rows for ``key`` by coin id, in stream order."""
+        projection = Projection(key.fields)
+        if key.ids is not None:
+            result = await self.market.get_coins_batch(
+                list(key.ids), key.currency, "market", projection
+            )
+            data: Dict[str, Row] = result["data"]
+            return data
+        rows = await self.market.get_coins_market(
+            key.currency, key.page, key.per_page, projection=projection
+        )
+        return {row["id"]: row for row in rows}
+
+    async def subscribe(self, key: StreamKey) -> Subscription:
+        """Register a subscriber and queue a snapshot of its stream."""
+        state = self._states.get(key)
+        if state is None:
+            state = await self._fetch(key)
+            state = self._states.setdefault(key, state)
+        subscription = Subscription(key, self.queue_size)
+        subscription.offer(_snapshot(state))
+        self._subscribers.setdefault(key, set()).add(subscription)
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber; streams nobody watches are forgotten."""
+        key = subscription.key
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[key]
+            self._states.pop(key, None)
+
+    async def poll_once(self) -> None:
+        """Fetch every watched stream once and push the changes."""
+        keys = list(self._subscribers)
+        with background_priority():
+            results = await asyncio.gather(
+                *map(self._fetch, keys), return_exceptions=True
+            )
+        self.polls += 1
+        for key, rows in zip(keys, results):
+            if isinstance(rows, BaseException):
+                logger.warning("Stream poll of %s failed: %s", key, rows)
+                continue
+            subscribers = self._subscribers.get(key)
+            if not subscribers:
+                continue
+            message = _diff(self._states[key], rows)
+            self._states[key] = rows
+            if message is None:
+                continue
+            encoded = _encode(message)
+            snapshot = None
+            for subscription in subscribers:
+                if not subscription.offer(encoded):
+                    snapshot = snapshot or _snapshot(rows)
+                    subscription.resync(snapshot)
+                    self.resyncs += 1
+
+    async def _run(self) -> None:
+        """Poll on the configured interval while anybody is subscribed."""
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            await self.poll_once()
+
+    async def stop(self) -> None:
+        """Cancel the poll loop and wait for it to finish."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def info(self) -> Dict[str, Any]:
+        """Return subscriber and poll counters."""
+        return {
+            "streams": len(self._subscribers),
+            "subscribers": sum(map(len, self._subscribers.values())),
+            "polls": self.polls,
+            "resyncs": self.resyncs,
+        }
+
+
+price_streamer = PriceStreamer()
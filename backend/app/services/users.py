@@ -0,0 +1,101 @@
+"""User accounts backing token issuance."""
+
+import logging
+from typing import Any, Callable, Optional, TypeVar, cast
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.security import hash_password_async, verify_password_async
+from app.db.database import SessionLocal
+from app.db.models import User
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class UserService:
+    """Look up and create users; password hashing runs in the password pool."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        """Initialize service with a session factory such as ``SessionLocal``."""
+        self.session_factory = session_factory
+        self._table_ready = False
+        # Checked for unknown users so they take as long as known ones
+        self._placeholder_hash: Optional[str] = None
+
+    async def start(self) -> None:
+        """Create the users table and hash the placeholder password.
+
+        A database that is down is only logged; the table is created again
+        on first use and logins answer 503 until then.
+        """
+        await self._placeholder()
+        try:
+            await run_in_threadpool(self._create_table)
+        except SQLAlchemyError as e:
+            logger.warning("Could not create the users table: %s", e)
+
+    async def _placeholder(self) -> str:
+        """Return the placeholder hash, computing it in the password pool."""
+        if self._placeholder_hash is None:
+            self._placeholder_hash = await hash_password_async("placeholder-password")
+        return self._placeholder_hash
+
+    def _create_table(self) -> None:
+        """Create the users table unless it exists."""
+        with self.session_factory() as session:
+            User.__table__.create(bind=session.get_bind(), checkfirst=True)
+        self._table_ready = True
+
+    async def _run(self, query: Callable[..., T], *args: Any) -> T:
+        """Run ``query`` in the threadpool; database errors become 503."""
+        try:
+            if not self._table_ready:
+                await run_in_threadpool(self._create_table)
+            return await run_in_threadpool(query, *args)
+        except SQLAlchemyError as e:
+            logger.warning("User store unavailable: %s", e)
+            raise HTTPException(status_code=503, detail="User store is unavailable")
+
+    def _get(self, username: str) -> Optional[User]:
+        """Load the user named ``username``."""
+        with self.session_factory() as session:
+            return session.scalar(select(User).where(User.username == username))
+
+    def _add(self, username: str, hashed_password: str) -> User:
+        """Insert a user."""
+        with self.session_factory() as session:
+            user = User(username=username, hashed_password=hashed_password)
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+            return user
+
+    async def get(self, username: str) -> Optional[User]:
+        """Return the user named ``username`` if there is one."""
+        return await self._run(self._get, username)
+
+    async def create(self, username: str, password: str) -> User:
+        """Create a user with a freshly hashed password."""
+        hashed_password = await hash_password_async(password)
+        return await self._run(self._add, username, hashed_password)
+
+    async def ensure(self, username: str, password: str) -> User:
+        """Create the user unless it already exists."""
+        return await self.get(username) or await self.create(username, password)
+
+    async def authenticate(self, username: str, password: str) -> Optional[User]:
+        """Return the active user matching the credentials, else ``None``."""
+        user = await self.get(username)
+        if user is None or not user.is_active:
+            await verify_password_async(password, await self._placeholder())
+            return None
+        if await verify_password_async(password, cast(str, user.hashed_password)):
+            return user
+        return None
+
+
+user_service = UserService()
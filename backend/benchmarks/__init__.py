@@ -0,0 +1 @@
+"""Performance benchmarks for the Vetty Crypto API."""
@@ -0,0 +1,50 @@
+"""Benchmark per-request bearer token verification.
+
+Compares a full python-jose decode, which every protected request paid
+before, with the verified-token cache. Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_auth
+"""
+
+import asyncio
+import json
+import timeit
+from typing import Any, Dict
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from app.core.config import settings
+from app.core.security import create_access_token, verified_tokens, verify_token
+
+
+def run(number: int = 10000) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    token = create_access_token({"sub": "bench"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def full_decode() -> Any:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    def cached_verify() -> Any:
+        # verify_token never awaits, so one send runs it to completion
+        coroutine = verify_token(credentials)
+        try:
+            coroutine.send(None)
+        except StopIteration as done:
+            return done.value
+
+    verified_tokens.clear()
+    asyncio.run(verify_token(credentials))
+    timings = {
+        "jose_decode_us": min(timeit.repeat(full_decode, number=number, repeat=5)),
+        "cached_verify_us": min(timeit.repeat(cached_verify, number=number, repeat=5)),
+    }
+    results = {name: round(t / number * 1e6, 2) for name, t in timings.items()}
+    return {
+        "benchmark": "auth",
+        **results,
+        "speedup": round(results["jose_decode_us"] / results["cached_verify_us"], 1),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
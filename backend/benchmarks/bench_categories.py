@@ -0,0 +1,52 @@
+"""Benchmark serving a sorted page of categories.
+
+Compares sorting and encoding all 600 categories per request, as a client
+or handler without an index would, with slicing the pre-sorted, pre-encoded
+:class:`CategoryIndex`. Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_categories
+"""
+
+import json
+import timeit
+from typing import Any, Dict
+import orjson
+from app.services.category_index import CategoryIndex
+from benchmarks.fixtures import category_rows
+
+LIMIT = 20
+
+
+def run(repeat: int = 50) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    categories = category_rows()
+    index = CategoryIndex(categories)
+
+    def sort_and_encode() -> bytes:
+        ordered = sorted(categories, key=lambda c: c["market_cap"], reverse=True)
+        return orjson.dumps(ordered[:LIMIT])
+
+    timings = {
+        "full_list_encode_ms": lambda: orjson.dumps(categories),
+        "sort_and_encode_page_ms": sort_and_encode,
+        "index_page_ms": lambda: index.query("market_cap", limit=LIMIT),
+        "index_search_page_ms": lambda: index.query(
+            "market_cap", search="category 1", limit=LIMIT
+        ),
+        "index_build_ms": lambda: CategoryIndex(categories),
+    }
+    return {
+        "benchmark": "categories",
+        "categories": len(categories),
+        "limit": LIMIT,
+        "full_list_bytes": len(orjson.dumps(categories)),
+        "page_bytes": len(index.query("market_cap", limit=LIMIT)),
+        **{
+            name: round(min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000, 4)
+            for name, fn in timings.items()
+        },
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,46 @@
+"""Benchmark compact market storage against plain dict-of-lists rows.
+
+Both forms hold the same single-currency page of coins with 168-point 7d
+sparklines. Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_compact
+"""
+
+import json
+import timeit
+from typing import Any, Dict
+from app.services.multicurrency import MergedMarkets
+from benchmarks.bench_multicurrency import _retained_bytes
+from benchmarks.fixtures import market_rows
+
+COINS = 1000
+
+
+def run(repeat: int = 20) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    rows = market_rows("usd", COINS)
+    compact = MergedMarkets({"usd": rows})
+    dict_bytes = _retained_bytes(lambda: market_rows("usd", COINS))
+    compact_bytes = _retained_bytes(
+        lambda: MergedMarkets({"usd": market_rows("usd", COINS)})
+    )
+    encode_seconds = min(
+        timeit.repeat(lambda: MergedMarkets({"usd": rows}), number=1, repeat=repeat)
+    )
+    decode_seconds = min(
+        timeit.repeat(lambda: compact.project("usd"), number=1, repeat=repeat)
+    )
+    return {
+        "benchmark": "compact",
+        "coins": COINS,
+        "sparkline_points": len(rows[0]["sparkline_in_7d"]["price"]),
+        "dict_of_lists_bytes": dict_bytes,
+        "compact_bytes": compact_bytes,
+        "memory_saved_pct": round(100 * (1 - compact_bytes / dict_bytes), 1),
+        "encode_ms": round(encode_seconds * 1000, 3),
+        "decode_all_rows_ms": round(decode_seconds * 1000, 3),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,109 @@
+"""Benchmark bytes on the wire and CPU per request with compressed responses.
+
+Serves ``/api/coins`` pages of 100 coins with sparklines and the full
+``/api/categories`` list from warm caches to 64 concurrent clients, once
+per strategy: uncompressed, generic ``GZipMiddleware`` recompressing every
+response, and the pre-compressed gzip and brotli variants negotiated by
+``payload_response``. Raw response bytes are counted without decoding them.
+CPU is the process time per request, client included, so differences
+between strategies are what the server spends. Run from the ``backend``
+directory::
+
+    python -m benchmarks.bench_compression
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict
+from unittest.mock import patch
+import httpx
+from starlette.middleware.gzip import GZipMiddleware
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.main import app
+from app.services.coingecko import coingecko_service
+from benchmarks.fake_coingecko import FakeCoinGecko
+
+CONCURRENCY = 64
+REQUESTS = 1000
+PATHS = {
+    "coins_page": "/api/coins?per_page=100&vs_currency=usd",
+    "categories": "/api/categories",
+}
+# Strategy -> (Accept-Encoding, wrap the app in GZipMiddleware)
+STRATEGIES: Dict[str, Any] = {
+    "identity": ("identity", False),
+    "gzip_middleware": ("gzip", True),
+    "precompressed_gzip": ("gzip", False),
+    "precompressed_br": ("br", False),
+}
+
+
+async def _drive(client: httpx.AsyncClient, path: str, encoding: str) -> Dict[str, Any]:
+    """Send ``REQUESTS`` requests from ``CONCURRENCY`` workers."""
+    remaining = REQUESTS
+    wire = 0
+
+    async def worker() -> None:
+        nonlocal remaining, wire
+        while remaining > 0:
+            remaining -= 1
+            async with client.stream(
+                "GET", path, headers={"Accept-Encoding": encoding}
+            ) as response:
+                assert response.status_code == 200
+                async for chunk in response.aiter_raw():
+                    wire += len(chunk)
+
+    cpu, started = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu
+    return {
+        "bytes_per_response": wire // REQUESTS,
+        "cpu_ms_per_request": round(cpu / REQUESTS * 1000, 3),
+        "rps": round(REQUESTS / elapsed, 1),
+    }
+
+
+async def _run() -> Dict[str, Any]:
+    """Run every strategy against every path."""
+    fake = FakeCoinGecko(latency=0.0)
+    await coingecko_service.start(transport=httpx.ASGITransport(app=fake.app))
+    token = create_access_token({"sub": "bench"})
+    results: Dict[str, Any] = {}
+    try:
+        for strategy, (encoding, middleware) in STRATEGIES.items():
+            served: Any = GZipMiddleware(app, minimum_size=1024) if middleware else app
+            # Behind the middleware the app sends plain bodies, as before
+            min_bytes = float("inf") if middleware else settings.COMPRESSION_MIN_BYTES
+            with patch.object(settings, "COMPRESSION_MIN_BYTES", min_bytes):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=served),
+                    base_url="http://bench",
+                    headers={"Authorization": f"Bearer {token}"},
+                    timeout=None,
+                ) as client:
+                    for name, path in PATHS.items():
+                        # Warm the data and the compressed variants
+                        await client.get(path, headers={"Accept-Encoding": encoding})
+                        results.setdefault(name, {})[strategy] = await _drive(
+                            client, path, encoding
+                        )
+    finally:
+        await coingecko_service.close()
+    return results
+
+
+def run() -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    return {
+        "benchmark": "compression",
+        "concurrency": CONCURRENCY,
+        "requests": REQUESTS,
+        **asyncio.run(_run()),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,120 @@
+"""Benchmark concurrent cached-coin reads from async handlers.
+
+Seeds a SQLite file with 2000 coins, then serves many concurrent
+"requests", each reading 25 coins by id, three ways: a sync session called
+straight from the coroutine (blocking the event loop), a sync session in
+the threadpool, and :class:`app.db.repository.CoinReader` on aiosqlite.
+Besides throughput, a ticker measures how late the event loop wakes up, the
+delay every other request on the worker would see. Run from the ``backend``
+directory::
+
+    python -m benchmarks.bench_db_concurrency
+"""
+
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.db.database import Base, async_url, engine_options
+from app.db.models import CachedCoin
+from app.db.repository import CoinReader, SnapshotStore
+from benchmarks.fixtures import market_rows
+
+COINS = 2000
+IDS_PER_REQUEST = 25
+REQUESTS = 400
+CONCURRENCY = 32
+
+
+async def _loop_lag(stop: asyncio.Event, lags: List[float]) -> None:
+    """Record how late 1 ms sleeps wake up until ``stop`` is set."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        scheduled = loop.time() + 0.001
+        await asyncio.sleep(0.001)
+        lags.append(max(loop.time() - scheduled, 0.0))
+
+
+async def _scenario(read: Callable[[List[str]], Awaitable[Any]]) -> Dict[str, float]:
+    """Serve ``REQUESTS`` reads from ``CONCURRENCY`` workers."""
+    rng = random.Random(7)
+    batches = [
+        [f"coin-{rng.randint(1, COINS)}" for _ in range(IDS_PER_REQUEST)]
+        for _ in range(REQUESTS)
+    ]
+    stop = asyncio.Event()
+    lags: List[float] = []
+    ticker = asyncio.create_task(_loop_lag(stop, lags))
+
+    async def worker() -> None:
+        while batches:
+            await read(batches.pop())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "requests_per_second": round(REQUESTS / elapsed, 1),
+        "loop_lag_p99_ms": round(lags[int(len(lags) * 0.99)] * 1000, 2),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 2),
+    }
+
+
+async def _run(url: str) -> Dict[str, Any]:
+    """Run every scenario against the database at ``url``."""
+    engine = create_engine(url, **engine_options(url))
+    sessions = sessionmaker(bind=engine)
+    async_engine = create_async_engine(async_url(url))
+    reader = CoinReader(async_sessionmaker(async_engine, expire_on_commit=False))
+
+    def read_sync(coin_ids: List[str]) -> List[CachedCoin]:
+        with sessions() as session:
+            return list(
+                session.scalars(select(CachedCoin).where(CachedCoin.id.in_(coin_ids)))
+            )
+
+    async def sync_inline(coin_ids: List[str]) -> List[CachedCoin]:
+        return read_sync(coin_ids)
+
+    async def sync_threadpool(coin_ids: List[str]) -> List[CachedCoin]:
+        return await run_in_threadpool(read_sync, coin_ids)
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        SnapshotStore(sessions).save_coins_market("usd", market_rows(count=COINS))
+        return {
+            "sync_session_inline": await _scenario(sync_inline),
+            "sync_session_threadpool": await _scenario(sync_threadpool),
+            "async_session": await _scenario(reader.by_ids),
+        }
+    finally:
+        engine.dispose()
+        await async_engine.dispose()
+
+
+def run() -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{Path(directory) / 'bench.db'}"
+        results = asyncio.run(_run(url))
+    return {
+        "benchmark": "db_concurrency",
+        "coins": COINS,
+        "ids_per_request": IDS_PER_REQUEST,
+        "concurrency": CONCURRENCY,
+        **results,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,101 @@
+"""Benchmark the price history store: refresh appends and chart reads.
+
+Fills a SQLite history for a few coins with points every 4 hours over a
+year, hourly over the last week and every 5 minutes over the last day.
+Then times appending one full refresh (500 coins in three currencies) and
+reading each chart range. Each range is compared with the number of raw
+points it would span if every refresh were stored as is. Run from the
+``backend`` directory::
+
+    python -m benchmarks.bench_history
+"""
+
+import json
+import random
+import tempfile
+import time
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.database import Base
+from app.db.models import PriceCandle
+from app.db.repository import HISTORY_RANGES, HistoryStore
+
+COINS = 5
+CURRENCIES = ("inr", "cad", "usd")
+REFRESH_COINS = 500
+
+
+def _walk(rng: random.Random, price: float) -> float:
+    """Move ``price`` by a random step of up to 1%."""
+    return price * (1 + rng.uniform(-0.01, 0.01))
+
+
+def _fill(store: HistoryStore, now: datetime) -> int:
+    """Append a year of history for ``COINS`` coins; return the appends made."""
+    rng = random.Random(7)
+    prices = [100.0 * (n + 1) for n in range(COINS)]
+    steps = [now - timedelta(hours=h) for h in range(365 * 24, 7 * 24, -4)]
+    steps += [now - timedelta(hours=h) for h in range(7 * 24, 24, -1)]
+    steps += [now - timedelta(minutes=m) for m in range(24 * 60, -1, -5)]
+    for at in steps:
+        prices = [_walk(rng, price) for price in prices]
+        store.append(
+            [(f"coin-{n}", "usd", price) for n, price in enumerate(prices)], at=at
+        )
+    return len(steps)
+
+
+def run(repeat: int = 20) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/history.db")
+        Base.metadata.create_all(bind=engine)
+        store = HistoryStore(sessionmaker(bind=engine))
+        now = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        appends = _fill(store, now)
+        fill = time.perf_counter() - started
+        refresh = [
+            (f"coin-{n}", currency, 1.0 + n)
+            for currency in CURRENCIES
+            for n in range(REFRESH_COINS)
+        ]
+        append = min(
+            timeit.repeat(lambda: store.append(refresh, at=now), number=1, repeat=5)
+        )
+        ranges = {}
+        for range_ in HISTORY_RANGES:
+            candles = store.load("coin-0", "usd", range_, at=now)
+            read = min(
+                timeit.repeat(
+                    lambda: store.load("coin-0", "usd", range_, at=now),
+                    number=1,
+                    repeat=repeat,
+                )
+            )
+            ranges[range_] = {
+                "candles": len(candles),
+                "read_ms": round(read * 1000, 3),
+                "raw_points_spanned": HISTORY_RANGES[range_][1]
+                // settings.REFRESH_INTERVAL_SECONDS,
+            }
+        with engine.connect() as connection:
+            stored = connection.scalar(select(func.count()).select_from(PriceCandle))
+        engine.dispose()
+    return {
+        "benchmark": "history",
+        "fill_appends": appends,
+        "fill_append_ms": round(fill / appends * 1000, 2),
+        "stored_candles": stored,
+        "refresh_points": len(refresh),
+        "append_refresh_ms": round(append * 1000, 1),
+        "ranges": ranges,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
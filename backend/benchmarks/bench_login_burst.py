@@ -0,0 +1,116 @@
+"""Load test: market data latency while a burst of logins is verified.
+
+Runs the app in-process against an in-memory SQLite user store and a warm
+category cache. Market requests are timed alone, throughout a login burst with
+bcrypt in the password pool, and during a burst with bcrypt run inline on
+the event loop, as a naive async handler would. Run from the ``backend``
+directory::
+
+    python -m benchmarks.bench_login_burst
+"""
+
+import asyncio
+import json
+import statistics
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock, patch
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core import security
+from app.core.security import create_access_token, get_password_hash
+from app.db.database import Base
+from app.main import app
+from app.services.market import market_service
+from app.services.users import UserService
+from benchmarks.fixtures import category_rows
+
+LOGINS = 24
+MARKET_REQUESTS = 100
+INTERVAL_SECONDS = 0.01
+
+
+def _user_service() -> UserService:
+    """Create a SQLite user store holding one account."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    users = UserService(sessionmaker(bind=engine))
+    users._add("admin", get_password_hash("admin123"))
+    return users
+
+
+async def _scenario(client: httpx.AsyncClient, token: str, logins: int) -> List[float]:
+    """Time market requests, in milliseconds, until ``logins`` logins finish."""
+    burst = asyncio.gather(
+        *(
+            client.post(
+                "/api/auth/token", json={"username": "admin", "password": "admin123"}
+            )
+            for _ in range(logins)
+        )
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies: List[float] = []
+    loop = asyncio.get_running_loop()
+    scheduled = loop.time()
+    while len(latencies) < MARKET_REQUESTS or not burst.done():
+        # Latency counts from the planned send time, so time spent with the
+        # event loop blocked before the request could even start is included.
+        scheduled += INTERVAL_SECONDS
+        await asyncio.sleep(max(scheduled - loop.time(), 0))
+        response = await client.get("/api/categories", headers=headers)
+        latencies.append((loop.time() - scheduled) * 1000)
+        assert response.status_code == 200
+    assert all(response.status_code == 200 for response in await burst)
+    return latencies
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds."""
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(quantiles[49], 2),
+        "p95_ms": round(quantiles[94], 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+async def _run() -> Dict[str, Any]:
+    """Run every scenario against the in-process app."""
+    token = create_access_token({"sub": "bench"})
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        await market_service.get_categories()
+        idle = await _scenario(c, token, 0)
+        pooled = await _scenario(c, token, LOGINS)
+
+        async def inline(plain: str, hashed: str) -> bool:
+            return security.verify_password(plain, hashed)
+
+        with patch("app.services.users.verify_password_async", inline):
+            blocking = await _scenario(c, token, LOGINS)
+    return {
+        "benchmark": "login_burst",
+        "logins": LOGINS,
+        "idle": _summary(idle),
+        "burst_password_pool": _summary(pooled),
+        "burst_inline_bcrypt": _summary(blocking),
+    }
+
+
+def run() -> Dict[str, Any]:
+    """Run the load test and return its results."""
+    categories = AsyncMock(return_value=category_rows())
+    with (
+        patch("app.api.auth.user_service", _user_service()),
+        patch.object(market_service.client, "get_categories_async", categories),
+    ):
+        return asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,83 @@
+"""Benchmark the cost of request and upstream instrumentation.
+
+Times a single histogram observation and counter increment, then drives a
+minimal ASGI app directly with and without :class:`MetricsMiddleware`, so
+the difference is the per-request overhead of the middleware alone. Run
+from the ``backend`` directory::
+
+    python -m benchmarks.bench_metrics
+"""
+
+import asyncio
+import json
+import time
+import timeit
+from typing import Any, Dict
+from app.core.metrics import MetricsMiddleware, Registry
+
+SCOPE = {"type": "http", "method": "GET", "path": "/api/categories"}
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"[]"}
+
+
+async def _app(scope: Dict[str, Any], receive: Any, send: Any) -> None:
+    """Answer every request with an empty JSON list."""
+    await send(START)
+    await send(BODY)
+
+
+async def _receive() -> Dict[str, Any]:
+    """Return an empty request body."""
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message: Dict[str, Any]) -> None:
+    """Discard a response message."""
+
+
+async def _requests_per_call(app: Any, number: int) -> float:
+    """Serve ``number`` requests and return microseconds per request."""
+    started = time.perf_counter()
+    for _ in range(number):
+        await app(dict(SCOPE), _receive, _send)
+    return (time.perf_counter() - started) / number * 1e6
+
+
+def run(number: int = 50000) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",))
+    counter = registry.counter("requests", "Requests.", ("route", "status"))
+    observe = min(
+        timeit.repeat(
+            lambda: histogram.observe(0.004, "/api/categories"),
+            number=number,
+            repeat=5,
+        )
+    )
+    inc = min(
+        timeit.repeat(
+            lambda: counter.inc("/api/categories", "200"), number=number, repeat=5
+        )
+    )
+
+    async def compare() -> Dict[str, float]:
+        middleware = MetricsMiddleware(_app)
+        bare = min([await _requests_per_call(_app, number) for _ in range(5)])
+        wrapped = min([await _requests_per_call(middleware, number) for _ in range(5)])
+        return {"bare_app_us": round(bare, 2), "with_middleware_us": round(wrapped, 2)}
+
+    requests = asyncio.run(compare())
+    return {
+        "benchmark": "metrics",
+        "histogram_observe_us": round(observe / number * 1e6, 3),
+        "counter_inc_us": round(inc / number * 1e6, 3),
+        **requests,
+        "middleware_overhead_us": round(
+            requests["with_middleware_us"] - requests["bare_app_us"], 2
+        ),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
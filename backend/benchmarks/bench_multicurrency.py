@@ -0,0 +1,60 @@
+"""Benchmark merging inr/cad/usd markets pages into one dataset.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_multicurrency
+"""
+
+import json
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict
+from app.services.multicurrency import MergedMarkets
+from benchmarks.fixtures import market_rows
+
+CURRENCIES = ("inr", "cad", "usd")
+PER_PAGE = 250
+
+
+def _retained_bytes(build: Callable[[], Any]) -> int:
+    """Return the bytes still allocated by the object ``build`` returns."""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def run(repeat: int = 20) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    pages = {currency: market_rows(currency, PER_PAGE) for currency in CURRENCIES}
+    merged = MergedMarkets(pages)
+    separate_bytes = _retained_bytes(
+        lambda: {currency: market_rows(currency, PER_PAGE) for currency in CURRENCIES}
+    )
+    merged_bytes = _retained_bytes(
+        lambda: MergedMarkets(
+            {currency: market_rows(currency, PER_PAGE) for currency in CURRENCIES}
+        )
+    )
+    merge_seconds = min(
+        timeit.repeat(lambda: MergedMarkets(pages), number=1, repeat=repeat)
+    )
+    project_seconds = min(
+        timeit.repeat(lambda: merged.project("inr"), number=1, repeat=repeat)
+    )
+    return {
+        "benchmark": "multicurrency",
+        "coins_per_page": PER_PAGE,
+        "currencies": list(CURRENCIES),
+        "separate_pages_bytes": separate_bytes,
+        "merged_bytes": merged_bytes,
+        "memory_saved_pct": round(100 * (1 - merged_bytes / separate_bytes), 1),
+        "merge_ms": round(merge_seconds * 1000, 3),
+        "project_one_currency_ms": round(project_seconds * 1000, 3),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
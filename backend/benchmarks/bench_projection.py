@@ -0,0 +1,46 @@
+"""Benchmark response size and encoding time of projected coin pages.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_projection
+"""
+
+import json
+import timeit
+from typing import Any, Dict
+from app.services.multicurrency import MergedMarkets
+from app.services.projection import Projection
+from benchmarks.fixtures import market_rows
+
+PER_PAGE = 100
+MOBILE_FIELDS = ("symbol", "name", "image", "current_price", "sparkline_in_7d")
+
+
+def run(repeat: int = 20) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    merged = MergedMarkets({"usd": market_rows("usd", PER_PAGE)})
+    variants = {
+        "full": None,
+        "lttb_24": Projection(sparkline_points=24),
+        "mobile_lttb_24": Projection(MOBILE_FIELDS, 24),
+        "mobile_stride_24": Projection(MOBILE_FIELDS, 24, "stride"),
+    }
+    results = {}
+    for name, projection in variants.items():
+        rows = merged.project("usd", projection)
+        build = min(
+            timeit.repeat(
+                lambda: merged.project("usd", projection), number=1, repeat=repeat
+            )
+        )
+        encode = min(timeit.repeat(lambda: json.dumps(rows), number=1, repeat=repeat))
+        results[name] = {
+            "response_bytes": len(json.dumps(rows).encode()),
+            "build_ms": round(build * 1000, 3),
+            "json_encode_ms": round(encode * 1000, 3),
+        }
+    return {"benchmark": "projection", "coins": PER_PAGE, "variants": results}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,69 @@
+"""Benchmark coin search lookups over a 15k coin list.
+
+Builds :class:`CoinSearch` from 15000 ``/coins/list`` entries ranked by a
+500 coin index and times lookups from one-letter prefixes, which match
+every coin, to near-exact ones. ``cold`` is the first lookup of a prefix,
+``warm`` a repeat. Linear scanning of the coin list is shown for
+comparison. Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_search
+"""
+
+import json
+import time
+import timeit
+from typing import Any, Dict, List
+from app.services.coin_index import CoinIndex
+from app.services.coin_search import CoinSearch
+from app.services.multicurrency import MergedMarkets
+from benchmarks.fixtures import coin_list, market_rows
+
+QUERIES = ("c", "c1", "c12", "c123", "coin", "coin 42", "coin-9999")
+LIMIT = 10
+
+
+def _scan(coins: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """Search without an index: test every coin, then take the first few."""
+    query = query.lower()
+    return [
+        coin
+        for coin in coins
+        if coin["symbol"].startswith(query)
+        or coin["name"].lower().startswith(query)
+        or coin["id"].startswith(query)
+    ][:LIMIT]
+
+
+def run(repeat: int = 50) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    coins = coin_list()
+    index = CoinIndex(
+        MergedMarkets({"usd": market_rows(count=250) + market_rows(count=250, page=2)})
+    )
+    started = time.perf_counter()
+    search = CoinSearch(coins, index)
+    build = time.perf_counter() - started
+    lookups = {}
+    for query in QUERIES:
+        started = time.perf_counter()
+        search.search(query, LIMIT)
+        cold = time.perf_counter() - started
+        warm = min(
+            timeit.repeat(lambda: search.search(query, LIMIT), number=1, repeat=repeat)
+        )
+        scan = min(timeit.repeat(lambda: _scan(coins, query), number=1, repeat=5))
+        lookups[query] = {
+            "cold_ms": round(cold * 1000, 4),
+            "warm_ms": round(warm * 1000, 4),
+            "linear_scan_ms": round(scan * 1000, 4),
+        }
+    return {
+        "benchmark": "search",
+        "coins": len(search),
+        "build_ms": round(build * 1000, 1),
+        "lookups": lookups,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,43 @@
+"""Benchmark per-request JSON encoding against pre-serialized payloads.
+
+Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_serialization
+"""
+
+import json
+import timeit
+from typing import Any, Dict
+from fastapi.encoders import jsonable_encoder
+from app.core.responses import Payload
+from benchmarks.fixtures import market_rows
+
+PER_PAGE = 100
+
+
+def run(repeat: int = 50) -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    rows = market_rows("usd", PER_PAGE)
+    payload = Payload.encode(rows)
+
+    def stdlib() -> bytes:
+        return json.dumps(jsonable_encoder(rows)).encode()
+
+    timings = {
+        "jsonable_encoder_json_ms": stdlib,
+        "orjson_encode_ms": lambda: Payload.encode(rows),
+        "preserialized_ms": lambda: payload.body,
+    }
+    return {
+        "benchmark": "serialization",
+        "coins": PER_PAGE,
+        "response_bytes": len(payload.body),
+        **{
+            name: round(min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000, 4)
+            for name, fn in timings.items()
+        },
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,143 @@
+"""Benchmark upstream calls and memory of workers with a shared market cache.
+
+Starts several worker processes at once, as gunicorn would, each running
+the app lifespan against its own in-process CoinGecko stand-in. The
+refresher runs one cycle, then every worker serves the same mix of pages,
+categories and coin details. This is done once with per-worker caches only
+and once with ``SHARED_CACHE_DIR`` on a tmpfs, and reports the upstream
+calls all workers made in that cycle together with each worker's resident
+memory. Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_shared_cache
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+WORKERS = 4
+
+# Runs in each worker process; ``ready`` is created once the refresher
+# leader finished its first cycle.
+WORKER = """
+import asyncio, json, os, sys, time
+import httpx
+from app.core.security import create_access_token
+from app.main import app, lifespan
+from app.services.coingecko import coingecko_service
+from app.services.market import market_service
+from app.services.refresher import market_refresher
+from benchmarks.fake_coingecko import FakeCoinGecko
+
+ready = sys.argv[1]
+PATHS = (
+    [f"/api/coins?page_num={page}&per_page=50&vs_currency=usd" for page in (1, 2)]
+    + ["/api/categories"]
+    + [f"/api/coins/coin-{rank}" for rank in range(1, 11)]
+)
+
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+
+async def main():
+    fake = FakeCoinGecko(latency=0.02)
+    await coingecko_service.start(transport=httpx.ASGITransport(app=fake.app))
+    async with lifespan(app):
+        if market_refresher.is_running:
+            while market_refresher.runs < 1:
+                await asyncio.sleep(0.01)
+            open(ready, "w").close()
+        while not os.path.exists(ready):
+            await asyncio.sleep(0.01)
+        token = create_access_token({"sub": "bench"})
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            headers={"Authorization": f"Bearer {token}"},
+        ) as client:
+            for path in PATHS:
+                assert (await client.get(path)).status_code == 200
+        refreshed = market_refresher.runs > 0
+    print(json.dumps({
+        "refresher": refreshed,
+        "upstream_calls": sum(fake.requests.values()),
+        "rss_kb": rss_kb(),
+    }))
+
+
+asyncio.run(main())
+"""
+
+
+def _tmpfs() -> Optional[str]:
+    """Return a shared memory directory to hold the cache, if there is one."""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def _cycle(workers: int, shared_dir: Optional[str]) -> Dict[str, Any]:
+    """Run ``workers`` processes concurrently and summarize their reports."""
+    scratch = tempfile.mkdtemp(prefix="bench-shared-")
+    env = {**os.environ, "REFRESH_ENABLED": "true", "SHARED_CACHE_DIR": ""}
+    env["DATABASE_URL"] = f"sqlite:///{scratch}/bench.db"
+    if shared_dir is not None:
+        env["SHARED_CACHE_DIR"] = shared_dir
+    try:
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", WORKER, os.path.join(scratch, "ready")],
+                stdout=subprocess.PIPE,
+                text=True,
+                env=env,
+            )
+            for _ in range(workers)
+        ]
+        reports: List[Dict[str, Any]] = []
+        for process in processes:
+            output, _ = process.communicate()
+            if process.returncode:
+                raise RuntimeError(f"worker exited with {process.returncode}")
+            reports.append(json.loads(output.splitlines()[-1]))
+    finally:
+        shutil.rmtree(scratch)
+    shared_bytes = 0
+    if shared_dir is not None:
+        shared_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(shared_dir) if entry.is_file()
+        )
+    return {
+        "refreshers": sum(report["refresher"] for report in reports),
+        "upstream_calls_per_cycle": sum(r["upstream_calls"] for r in reports),
+        "rss_mb_per_worker": round(
+            statistics.median(r["rss_kb"] for r in reports) / 1024, 1
+        ),
+        "shared_mb_per_host": round(shared_bytes / 2**20, 2),
+    }
+
+
+def run(workers: int = WORKERS) -> Dict[str, Any]:
+    """Run the benchmark and return per-worker and shared cache results."""
+    shared_dir = tempfile.mkdtemp(prefix="vetty-cache-", dir=_tmpfs())
+    try:
+        shared = _cycle(workers, shared_dir)
+    finally:
+        shutil.rmtree(shared_dir)
+    return {
+        "benchmark": "shared_cache",
+        "workers": workers,
+        "per_worker_cache": _cycle(workers, None),
+        "shared_cache": shared,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,70 @@
+"""Benchmark worker startup: time to first request in a fresh process.
+
+Starts several worker processes, one at a time, as a process manager
+would. Each imports the app, runs its lifespan and serves ``/health``,
+reporting how long each phase took. The database engine is built in the
+lifespan phase rather than at import. Run from the ``backend`` directory::
+
+    python -m benchmarks.bench_startup
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+WORKERS = 5
+
+# Runs in each worker process; ``started`` is the parent's wall clock at spawn
+WORKER = """
+import json, sys, time
+started = float(sys.argv[1])
+launched = time.time()
+from app.main import app
+imported = time.time()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    ready = time.time()
+    assert client.get("/health").status_code == 200
+    served = time.time()
+print(json.dumps({
+    "interpreter_ms": (launched - started) * 1000,
+    "import_ms": (imported - launched) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "first_request_ms": (served - ready) * 1000,
+    "time_to_first_request_ms": (served - started) * 1000,
+}))
+"""
+
+
+def _worker() -> Dict[str, float]:
+    """Start one worker process and return its phase timings."""
+    env = {**os.environ, "REFRESH_ENABLED": "false"}
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER, repr(time.time())],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run(workers: int = WORKERS) -> Dict[str, Any]:
+    """Run the benchmark and return median phase timings across workers."""
+    samples: List[Dict[str, float]] = [_worker() for _ in range(workers)]
+    return {
+        "benchmark": "startup",
+        "workers": workers,
+        **{
+            phase: round(statistics.median(s[phase] for s in samples), 1)
+            for phase in samples[0]
+        },
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
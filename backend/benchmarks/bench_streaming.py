@@ -0,0 +1,78 @@
+"""Benchmark fanning price diffs out to many stream subscribers.
+
+Subscribes 1000 clients to 10 page streams and times one poll in which
+every price changed, compared with the upstream fetches and bytes the same
+clients would cause by each polling a full page. Run from the ``backend``
+directory::
+
+    python -m benchmarks.bench_streaming
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock, MagicMock
+import orjson
+from app.services.streaming import PriceStreamer, StreamKey
+from benchmarks.fixtures import market_rows
+
+SUBSCRIBERS = 1000
+STREAMS = 10
+PER_PAGE = 25
+
+
+def _market(rows: List[Dict[str, Any]]) -> MagicMock:
+    """Serve pages of ``rows`` from a market service mock."""
+    market = MagicMock()
+
+    async def page(currency, page, per_page, projection=None):
+        start = (page - 1) * per_page
+        return [projection.row(row) for row in rows[start : start + per_page]]
+
+    market.get_coins_market = AsyncMock(side_effect=page)
+    return market
+
+
+async def _run() -> Dict[str, Any]:
+    """Subscribe every client, then time one poll with changed prices."""
+    rows = market_rows(count=STREAMS * PER_PAGE)
+    market = _market(rows)
+    streamer = PriceStreamer(market=market, interval=3600, queue_size=4)
+    subscriptions = [
+        await streamer.subscribe(
+            StreamKey(currency="usd", page=n % STREAMS + 1, per_page=PER_PAGE)
+        )
+        for n in range(SUBSCRIBERS)
+    ]
+    for subscription in subscriptions:
+        subscription.queue.get_nowait()
+    for row in rows:
+        row["current_price"] *= 1.01
+    fetches = market.get_coins_market.await_count
+    started = time.perf_counter()
+    await streamer.poll_once()
+    elapsed = time.perf_counter() - started
+    diff_bytes = sum(len(s.queue.get_nowait()) for s in subscriptions)
+    full_page = len(orjson.dumps(rows[:PER_PAGE]))
+    await streamer.stop()
+    return {
+        "poll_ms": round(elapsed * 1000, 2),
+        "upstream_fetches_per_poll": market.get_coins_market.await_count - fetches,
+        "pushed_bytes_per_poll": diff_bytes,
+        "polling_clients_bytes_per_poll": full_page * SUBSCRIBERS,
+    }
+
+
+def run() -> Dict[str, Any]:
+    """Run the benchmark and return its results."""
+    return {
+        "benchmark": "streaming",
+        "subscribers": SUBSCRIBERS,
+        "streams": STREAMS,
+        **asyncio.run(_run()),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,174 @@
+"""A local stand-in for the CoinGecko API with injectable faults.
+
+Serves ``/coins/markets``, including ``ids=`` selections of the synthetic
+``coin-<rank>`` ids, ``/coins/categories`` and ``/coins/{id}`` from the
+synthetic payloads in :mod:`benchmarks.fixtures`, after a configurable
+latency, and answers a configurable share of requests with a 500 or a 429.
+The load test mounts it in-process; it can also be served on its own for
+runs against a live API process::
+
+    python -m benchmarks.fake_coingecko --port 8900 --latency-ms 80
+    COINGECKO_API_URL=http://127.0.0.1:8900/api/v3 uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import random
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import orjson
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from benchmarks.fixtures import category_rows, coin_details, coin_list, market_rows
+
+PREFIX = "/api/v3"
+
+
+class FakeCoinGecko:
+    """Fault-injecting CoinGecko stand-in with per-status request counters.
+
+    ``latency`` plus up to ``jitter`` seconds is spent before every answer.
+    ``error_rate`` and ``rate_limit_rate`` are the shares of requests
+    answered with 500 and with 429 (carrying ``Retry-After``).
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 7,
+    ):
+        """Initialize the fake and its pre-encoded payloads."""
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.requests: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._categories = orjson.dumps(category_rows())
+        self._coins = orjson.dumps(coin_list())
+        self._markets: Dict[Tuple[str, int, int], bytes] = {}
+        self._details: Dict[str, bytes] = {}
+        self._pages: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        self.app = Starlette(
+            routes=[
+                Route(PREFIX + "/coins/markets", self._coins_markets),
+                Route(PREFIX + "/coins/categories", self._coins_categories),
+                Route(PREFIX + "/coins/list", self._coins_list),
+                Route(PREFIX + "/coins/{coin_id}", self._coin_details),
+            ]
+        )
+
+    async def _fault(self, endpoint: str) -> Optional[Response]:
+        """Wait out the simulated latency and maybe return an injected error."""
+        await asyncio.sleep(self.latency + self._rng.uniform(0, self.jitter))
+        draw = self._rng.random()
+        if draw < self.rate_limit_rate:
+            self.requests[endpoint, 429] += 1
+            return Response(
+                status_code=429, headers={"Retry-After": str(self.retry_after)}
+            )
+        if draw < self.rate_limit_rate + self.error_rate:
+            self.requests[endpoint, 500] += 1
+            return Response(status_code=500)
+        self.requests[endpoint, 200] += 1
+        return None
+
+    @staticmethod
+    def _json(body: bytes) -> Response:
+        """Wrap an encoded JSON body."""
+        return Response(body, media_type="application/json")
+
+    async def _coins_markets(self, request: Request) -> Response:
+        """Serve one page of ``/coins/markets``."""
+        fault = await self._fault("/coins/markets")
+        if fault is not None:
+            return fault
+        params = request.query_params
+        if "ids" in params:
+            return self._json(self._markets_by_ids(params))
+        key = (
+            params.get("vs_currency", "usd"),
+            int(params.get("page", 1)),
+            int(params.get("per_page", 100)),
+        )
+        body = self._markets.get(key)
+        if body is None:
+            currency, page, per_page = key
+            rows = market_rows(currency, count=per_page, page=page)
+            body = self._markets[key] = orjson.dumps(rows)
+        return self._json(body)
+
+    def _markets_by_ids(self, params: Any) -> bytes:
+        """Encode the rows of the ``coin-<rank>`` ids listed in ``ids``."""
+        currency = params.get("vs_currency", "usd")
+        ranks = sorted(
+            int(coin_id[5:])
+            for coin_id in params["ids"].split(",")
+            if coin_id.startswith("coin-") and coin_id[5:].isdigit()
+        )
+        rows = []
+        for rank in ranks:
+            page = (currency, (rank - 1) // 250 + 1)
+            if page not in self._pages:
+                self._pages[page] = market_rows(currency, count=250, page=page[1])
+            rows.append(self._pages[page][(rank - 1) % 250])
+        return orjson.dumps(rows)
+
+    async def _coins_categories(self, request: Request) -> Response:
+        """Serve ``/coins/categories``."""
+        fault = await self._fault("/coins/categories")
+        return fault or self._json(self._categories)
+
+    async def _coins_list(self, request: Request) -> Response:
+        """Serve ``/coins/list``."""
+        fault = await self._fault("/coins/list")
+        return fault or self._json(self._coins)
+
+    async def _coin_details(self, request: Request) -> Response:
+        """Serve ``/coins/{id}``."""
+        fault = await self._fault("/coins/{id}")
+        if fault is not None:
+            return fault
+        coin_id = request.path_params["coin_id"]
+        body = self._details.get(coin_id)
+        if body is None:
+            body = self._details[coin_id] = orjson.dumps(coin_details(coin_id))
+        return self._json(body)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Return the requests served so far per endpoint and status."""
+        return [
+            {"endpoint": endpoint, "status": status, "count": count}
+            for (endpoint, status), count in sorted(self.requests.items())
+        ]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Serve the fake on its own with uvicorn."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    fake = FakeCoinGecko(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+    )
+    uvicorn.run(fake.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
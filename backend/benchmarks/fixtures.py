@@ -0,0 +1,134 @@
+"""Synthetic CoinGecko payloads for benchmarks."""
+
+import json
+import random
+from typing import Any, Dict, List
+
+SPARKLINE_POINTS = 168
+FX_RATES = {"usd": 1.0, "cad": 1.36, "inr": 83.2}
+
+
+def market_rows(
+    vs_currency: str = "usd",
+    count: int = 250,
+    page: int = 1,
+    sparkline_points: int = SPARKLINE_POINTS,
+    seed: int = 7,
+) -> List[Dict[str, Any]]:
+    """Return ``count`` markets rows shaped like ``/coins/markets``.
+
+    Rows are JSON round-tripped so they have the same object layout as a
+    decoded upstream response. The same ``seed`` yields the same coins in
+    every currency, with prices scaled by a fixed exchange rate.
+    """
+    rng = random.Random(seed + page)
+    rate = FX_RATES.get(vs_currency, 1.0)
+    rows = []
+    for offset in range(count):
+        rank = (page - 1) * count + offset + 1
+        price = rng.uniform(0.01, 50000) * rate
+        market_cap = price * rng.uniform(1e6, 1e9)
+        sparkline = [
+            price * (1 + rng.uniform(-0.05, 0.05)) for _ in range(sparkline_points)
+        ]
+        rows.append(
+            {
+                "id": f"coin-{rank}",
+                "symbol": f"c{rank}",
+                "name": f"Coin {rank}",
+                "image": f"https://assets.example.com/coins/images/{rank}/large.png",
+                "current_price": price,
+                "market_cap": market_cap,
+                "market_cap_rank": rank,
+                "fully_diluted_valuation": market_cap * 1.2,
+                "total_volume": market_cap * 0.05,
+                "high_24h": price * 1.03,
+                "low_24h": price * 0.97,
+                "price_change_24h": price * 0.01,
+                "price_change_percentage_24h": rng.uniform(-10, 10),
+                "market_cap_change_24h": market_cap * 0.01,
+                "market_cap_change_percentage_24h": rng.uniform(-10, 10),
+                "circulating_supply": rng.uniform(1e6, 1e9),
+                "total_supply": 2e9,
+                "max_supply": None,
+                "ath": price * 2,
+                "ath_change_percentage": -50.0,
+                "ath_date": "2021-11-10T14:24:11.849Z",
+                "atl": price / 10,
+                "atl_change_percentage": 900.0,
+                "atl_date": "2015-10-20T00:00:00.000Z",
+                "roi": None,
+                "last_updated": "2024-01-01T00:00:00.000Z",
+                "sparkline_in_7d": {"price": sparkline},
+            }
+        )
+    return json.loads(json.dumps(rows))
+
+
+def category_rows(count: int = 600, seed: int = 7) -> List[Dict[str, Any]]:
+    """Return ``count`` rows shaped like ``/coins/categories``."""
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        rows.append(
+            {
+                "id": f"category-{index}",
+                "name": f"Category {index}",
+                "market_cap": rng.uniform(1e6, 1e12),
+                "market_cap_change_24h": rng.uniform(-10, 10),
+                "content": "",
+                "top_3_coins": [
+                    f"https://assets.example.com/coins/images/{n}/small.png"
+                    for n in range(3)
+                ],
+                "volume_24h": rng.uniform(1e5, 1e10),
+                "updated_at": "2024-01-01T00:00:00.000Z",
+            }
+        )
+    return rows
+
+
+def coin_list(count: int = 15000) -> List[Dict[str, Any]]:
+    """Return ``count`` entries shaped like ``/coins/list``.
+
+    Ids, symbols and names match the rows of :func:`market_rows`.
+    """
+    return [
+        {"id": f"coin-{rank}", "symbol": f"c{rank}", "name": f"Coin {rank}"}
+        for rank in range(1, count + 1)
+    ]
+
+
+def coin_details(
+    coin_id: str, sparkline_points: int = SPARKLINE_POINTS
+) -> Dict[str, Any]:
+    """Return a document shaped like ``/coins/{id}`` for ``coin_id``."""
+    rng = random.Random(coin_id)
+    price = rng.uniform(0.01, 50000)
+    currencies = {currency: price * rate for currency, rate in FX_RATES.items()}
+    return {
+        "id": coin_id,
+        "symbol": coin_id[:4],
+        "name": coin_id.replace("-", " ").title(),
+        "categories": ["Layer 1 (L1)", "Smart Contract Platform"],
+        "description": {"en": "A synthetic coin used for load testing. " * 20},
+        "links": {"homepage": [f"https://{coin_id}.example.com"]},
+        "image": {
+            size: f"https://assets.example.com/coins/images/{coin_id}/{size}.png"
+            for size in ("thumb", "small", "large")
+        },
+        "market_cap_rank": rng.randint(1, 1000),
+        "market_data": {
+            "current_price": currencies,
+            "market_cap": {c: v * 1e7 for c, v in currencies.items()},
+            "total_volume": {c: v * 5e5 for c, v in currencies.items()},
+            "price_change_percentage_24h": rng.uniform(-10, 10),
+            "sparkline_7d": {
+                "price": [
+                    price * (1 + rng.uniform(-0.05, 0.05))
+                    for _ in range(sparkline_points)
+                ]
+            },
+        },
+        "last_updated": "2024-01-01T00:00:00.000Z",
+    }
@@ -0,0 +1,242 @@
+"""Load test the API against a local CoinGecko stand-in.
+
+Runs the app in-process and points its pooled CoinGecko client at
+:class:`benchmarks.fake_coingecko.FakeCoinGecko`, so upstream latency,
+errors and 429s are controlled. ``/api/coins``, ``/api/coins/{coin_id}``,
+``/api/categories`` and ``/api/coins/batch`` are each driven by a closed
+loop of workers at every concurrency level, starting from empty caches,
+and throughput plus p50/p95/p99 latency are reported as JSON. Run from the
+``backend`` directory::
+
+    python -m benchmarks.loadtest --concurrency 1 16 64 --output before.json
+    python -m benchmarks.loadtest --output after.json --baseline before.json
+
+With ``--baseline``, each run is also compared with the matching run of an
+earlier result file.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+import httpx
+from app.core.security import create_access_token
+from app.main import app
+from app.services.coingecko import CircuitBreaker, RateGovernor, coingecko_service
+from app.services.market import market_service
+from benchmarks.fake_coingecko import FakeCoinGecko
+
+CURRENCIES = ("inr", "usd")
+
+# Endpoint name -> request path for a random draw
+ENDPOINTS: Dict[str, Callable[[random.Random, int], str]] = {
+    "/api/coins": lambda rng, coins: (
+        f"/api/coins?page_num={rng.randint(1, 5)}&per_page=10"
+        f"&vs_currency={rng.choice(CURRENCIES)}"
+    ),
+    "/api/coins/{coin_id}": lambda rng, coins: (
+        f"/api/coins/coin-{rng.randint(1, coins)}"
+    ),
+    "/api/categories": lambda rng, coins: "/api/categories",
+    "/api/coins/batch": lambda rng, coins: (
+        "/api/coins/batch?vs_currency=eur&ids="
+        + ",".join(f"coin-{rng.randint(1, coins)}" for _ in range(20))
+    ),
+}
+
+
+def _percentile(quantiles: List[float], percent: int) -> float:
+    """Return the ``percent`` percentile from 99 cut points, in milliseconds."""
+    return round(quantiles[percent - 1] * 1000, 2)
+
+
+def _summary(latencies: List[float], statuses: Counter, elapsed: float) -> Dict:
+    """Summarize one run."""
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    total = len(latencies)
+    return {
+        "requests": total,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": _percentile(quantiles, 50),
+        "p95_ms": _percentile(quantiles, 95),
+        "p99_ms": _percentile(quantiles, 99),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "error_rate": round(1 - statuses.get(200, 0) / total, 4),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def _reset() -> None:
+    """Empty the market caches so every run starts cold."""
+    market_service.cache.clear()
+    market_service.views.clear()
+    market_service.payloads.clear()
+    market_service.last_good.clear()
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    concurrency: int,
+    requests: int,
+    coins: int,
+    seed: int,
+) -> Dict[str, Any]:
+    """Send ``requests`` requests to ``endpoint`` from ``concurrency`` workers."""
+    rng = random.Random(seed)
+    paths = [ENDPOINTS[endpoint](rng, coins) for _ in range(requests)]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker() -> None:
+        while paths:
+            path = paths.pop()
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, statuses, time.perf_counter() - started)
+
+
+async def _run(args: argparse.Namespace, fake: FakeCoinGecko) -> List[Dict]:
+    """Run every endpoint at every concurrency level."""
+    await coingecko_service.start(transport=httpx.ASGITransport(app=fake.app))
+    token = create_access_token({"sub": "loadtest"})
+    transport = httpx.ASGITransport(app=app)
+    runs = []
+    try:
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://loadtest",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=None,
+        ) as client:
+            for endpoint in args.endpoints:
+                for concurrency in args.concurrency:
+                    _reset()
+                    fake.requests.clear()
+                    # Fresh upstream guards, so one run's failures do not
+                    # leak into the next.
+                    governor = RateGovernor(per_minute=args.upstream_per_minute)
+                    with (
+                        patch.object(coingecko_service, "governor", governor),
+                        patch.object(coingecko_service, "breaker", CircuitBreaker()),
+                    ):
+                        result = await _drive(
+                            client,
+                            endpoint,
+                            concurrency,
+                            args.requests,
+                            args.coins,
+                            args.seed,
+                        )
+                    runs.append(
+                        {
+                            "endpoint": endpoint,
+                            "concurrency": concurrency,
+                            **result,
+                            "upstream": fake.summary(),
+                        }
+                    )
+    finally:
+        await coingecko_service.close()
+    return runs
+
+
+def _git_commit() -> Optional[str]:
+    """Return the checked out commit, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict]:
+    """Return the relative change of each run present in both results."""
+    before = {(r["endpoint"], r["concurrency"]): r for r in baseline["runs"]}
+    changes = []
+    for run in current["runs"]:
+        old = before.get((run["endpoint"], run["concurrency"]))
+        if old is None:
+            continue
+        change = {"endpoint": run["endpoint"], "concurrency": run["concurrency"]}
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            change[f"{metric}_change_pct"] = (
+                round((run[metric] - old[metric]) / old[metric] * 100, 1)
+                if old[metric]
+                else None
+            )
+        changes.append(change)
+    return changes
+
+
+def run(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the load test and return its results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=500, help="per run")
+    parser.add_argument(
+        "--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS)
+    )
+    parser.add_argument("--coins", type=int, default=100, help="distinct coin ids")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--upstream-per-minute",
+        type=float,
+        default=60000,
+        help="request budget of the CoinGecko rate governor",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    args = parser.parse_args(argv)
+
+    fake = FakeCoinGecko(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+    results: Dict[str, Any] = {
+        "benchmark": "loadtest",
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {
+            name: value
+            for name, value in vars(args).items()
+            if name not in ("output", "baseline")
+        },
+        "runs": asyncio.run(_run(args, fake)),
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["comparison"] = compare(json.load(f), results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -2,8 +2,27 @@
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.database import Base
 from app.main import app
 from app.core.security import create_access_token
+from app.services.market import market_service
+
+
+@pytest.fixture(autouse=True)
+def clear_market_cache():
+    """Isolate tests from market data cached by earlier tests."""
+    market_service.cache.clear()
+    market_service.views.clear()
+    market_service.payloads.clear()
+    market_service.last_good.clear()
+    yield
+    market_service.cache.clear()
+    market_service.views.clear()
+    market_service.payloads.clear()
+    market_service.last_good.clear()
 
 
 @pytest.fixture
@@ -17,3 +36,16 @@ def auth_headers():
     """Create authentication headers with valid token."""
     token = create_access_token(data={"sub": "test_user"})
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def session_factory():
+    """Create an in-memory SQLite database with all tables."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
@@ -1,11 +1,24 @@
 """Test authentication endpoints."""
 
+from unittest.mock import patch
+import pytest
 from fastapi.testclient import TestClient
+from app.core.security import get_password_hash
 from app.main import app
+from app.services.users import UserService
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def users(session_factory):
+    """Back the token endpoint with a SQLite user store holding ``admin``."""
+    service = UserService(session_factory)
+    service._add("admin", get_password_hash("admin123"))
+    with patch("app.api.auth.user_service", service):
+        yield service
+
+
 def test_login_success():
     """Test successful login."""
     response = client.post(
@@ -27,7 +40,30 @@ def test_login_invalid_credentials():
     assert data["detail"] == "Incorrect username or password"
 
 
+def test_login_unknown_user():
+    """Test unknown users get the same answer as wrong passwords."""
+    response = client.post(
+        "/api/auth/token", json={"username": "nobody", "password": "admin123"}
+    )
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Incorrect username or password"
+
+
 def test_login_missing_fields():
     """Test login with missing fields."""
     response = client.post("/api/auth/token", json={"username": "admin"})
     assert response.status_code == 422
+
+
+def test_revoke_token():
+    """Test a revoked token can no longer reach protected routes."""
+    token = client.post(
+        "/api/auth/token", json={"username": "admin", "password": "admin123"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post("/api/auth/revoke", headers=headers)
+    assert response.status_code == 204
+    response = client.get("/api/categories", headers=headers)
+    assert response.status_code == 401
+    response = client.post("/api/auth/revoke", headers=headers)
+    assert response.status_code == 401
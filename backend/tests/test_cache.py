@@ -0,0 +1,125 @@
+"""Test in-process caching primitives."""
+
+from app.core.cache import TTLCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_and_set():
+    """Test stored values are returned until they expire."""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, clock=clock)
+    cache.set("a", 1, ttl=10)
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_missing_key_returns_default():
+    """Test the default is returned for unknown keys."""
+    cache = TTLCache()
+    sentinel = object()
+    assert cache.get("missing", sentinel) is sentinel
+    assert cache.stats.misses == 1
+
+
+def test_lru_eviction():
+    """Test the least recently used entry is evicted when full."""
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_delete_and_clear():
+    """Test entries can be dropped individually or all at once."""
+    cache = TTLCache()
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats.misses == 0
+
+
+def test_info():
+    """Test counters are exported with the hit ratio and sizing."""
+    cache = TTLCache(maxsize=8)
+    cache.set("a", 1, ttl=60)
+    cache.get("a")
+    cache.get("b")
+    info = cache.info()
+    assert info["hits"] == 1
+    assert info["misses"] == 1
+    assert info["hit_ratio"] == 0.5
+    assert info["size"] == 1
+    assert info["maxsize"] == 8
+
+
+def test_lookup_serves_stale_entries_within_grace():
+    """Test entries past their TTL are returned as stale until the grace ends."""
+    clock = FakeClock()
+    cache = TTLCache(clock=clock)
+    cache.set("a", 1, ttl=10, grace=20)
+    assert not cache.lookup("a").is_stale(clock.now)
+    clock.now = 15
+    entry = cache.lookup("a")
+    assert entry.value == 1
+    assert entry.is_stale(clock.now)
+    assert cache.get("a") is None
+    clock.now = 30
+    assert cache.lookup("a") is None
+    assert cache.stats.hits == 1
+    assert cache.stats.stale_hits == 1
+    assert cache.stats.misses == 2
+    assert cache.stats.expirations == 1
+
+
+def test_peek_and_prune():
+    """Test peeking leaves counters and recency alone and prune filters."""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, clock=clock)
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=10)
+    clock.now = 20
+    assert cache.peek("a") == 1
+    assert cache.peek("missing", 0) == 0
+    assert cache.stats.hits == cache.stats.misses == 0
+    cache.set("c", 3, ttl=10)
+    assert cache.peek("a") is None
+    assert cache.prune(lambda value: value > 2) == 1
+    assert cache.peek("b") == 2 and len(cache) == 1
+
+
+def test_byte_budget():
+    """Test entries are evicted to keep their total weight under maxbytes."""
+    cache = TTLCache(maxsize=10, maxbytes=10, weigh=len)
+    cache.set("a", "xxxx", ttl=10)
+    cache.set("b", "xxxx", ttl=10)
+    cache.set("a", "xxx", ttl=10)
+    assert cache.nbytes == 7
+    cache.set("c", "xxxx", ttl=10)
+    assert cache.peek("b") is None
+    assert cache.nbytes == 7
+    assert cache.stats.evictions == 1
+    cache.set("d", "x" * 11, ttl=10)
+    assert len(cache) == 0 and cache.nbytes == 0
+    assert cache.info()["maxbytes"] == 10
@@ -1,9 +1,11 @@
 """Test category endpoints."""
 
 import pytest
-from unittest.mock import patch, MagicMock
+import requests
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services.market import market_service
 
 client = TestClient(app)
 
@@ -46,3 +48,48 @@ def test_get_categories_success(auth_headers, mock_categories_data):
         assert len(data) == 1
         assert data[0]["id"] == "defi"
         assert data[0]["name"] == "Decentralized Finance (DeFi)"
+
+
+def test_get_categories_last_good_marked_stale(auth_headers, mock_categories_data):
+    """Test an outage serves the last good list flagged as stale."""
+    with patch("app.services.coingecko.requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_categories_data
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+        response = client.get("/api/categories", headers=auth_headers)
+        assert "x-data-stale" not in response.headers
+
+        market_service.cache.clear()
+        mock_get.side_effect = requests.RequestException("down")
+        response = client.get("/api/categories", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["x-data-stale"] == "true"
+        assert response.json()[0]["id"] == "defi"
+
+
+def test_get_categories_sorted_page(auth_headers):
+    """Test categories can be sorted, searched and paged."""
+    categories = [
+        {"id": f"category-{n}", "name": f"Category {n}", "market_cap": float(n)}
+        for n in range(1, 21)
+    ]
+    with patch.object(
+        market_service, "get_categories", AsyncMock(return_value=categories)
+    ):
+        response = client.get(
+            "/api/categories?sort=market_cap&limit=3&offset=1", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert [c["id"] for c in response.json()] == [
+            "category-19",
+            "category-18",
+            "category-17",
+        ]
+        response = client.get(
+            "/api/categories?search=category 1&sort=name&limit=2",
+            headers=auth_headers,
+        )
+        assert [c["id"] for c in response.json()] == ["category-1", "category-10"]
+        response = client.get("/api/categories?sort=price", headers=auth_headers)
+        assert response.status_code == 422
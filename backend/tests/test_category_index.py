@@ -0,0 +1,42 @@
+"""Test the in-memory category index."""
+
+import orjson
+from app.services.category_index import CategoryIndex
+
+CATEGORIES = [
+    {"id": "layer-1", "name": "Layer 1", "market_cap": 900.0, "volume_24h": 50.0},
+    {"id": "defi", "name": "DeFi", "market_cap": 100.0, "volume_24h": 80.0},
+    {"id": "meme", "name": "Meme", "market_cap": None, "volume_24h": 70.0},
+    {"id": "gaming", "name": "gaming (GameFi)", "market_cap": 300.0},
+]
+
+
+def _ids(body: bytes) -> list:
+    """Return the ids of an encoded page."""
+    return [category["id"] for category in orjson.loads(body)]
+
+
+def test_default_order_matches_upstream_encoding():
+    """Test the unsorted, unpaged body equals encoding the whole list."""
+    index = CategoryIndex(CATEGORIES)
+    assert len(index) == 4
+    assert index.query() == orjson.dumps(CATEGORIES)
+    assert CategoryIndex([]).query() == b"[]"
+
+
+def test_sorts_keep_missing_values_last():
+    """Test numeric sorts are descending, name ascending, missing last."""
+    index = CategoryIndex(CATEGORIES)
+    assert _ids(index.query("market_cap")) == ["layer-1", "gaming", "defi", "meme"]
+    assert _ids(index.query("volume_24h")) == ["defi", "meme", "layer-1", "gaming"]
+    assert _ids(index.query("name")) == ["defi", "gaming", "layer-1", "meme"]
+
+
+def test_search_and_paging():
+    """Test name search ignores case and pages slice the sorted matches."""
+    index = CategoryIndex(CATEGORIES)
+    assert _ids(index.query(search="GAME")) == ["gaming"]
+    assert _ids(index.query("market_cap", limit=2)) == ["layer-1", "gaming"]
+    assert _ids(index.query("market_cap", limit=2, offset=2)) == ["defi", "meme"]
+    assert _ids(index.query("name", search="fi", offset=1)) == ["gaming"]
+    assert index.query(offset=10) == b"[]"
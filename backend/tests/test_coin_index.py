@@ -0,0 +1,77 @@
+"""Test the in-memory coin index."""
+
+from app.services.coin_index import CoinIndex
+from app.services.multicurrency import MergedMarkets
+
+
+def _index():
+    """Build an index over four coins in two currencies."""
+    rows = [
+        ("bitcoin", "btc", 2.0, 900),
+        ("ethereum", "eth", -1.0, 500),
+        ("tether", "usdt", None, 950),
+        ("bitcoin-cash", "bch", 7.5, 10),
+    ]
+    pages = {
+        currency: [
+            {
+                "id": coin_id,
+                "symbol": symbol,
+                "current_price": rate,
+                "price_change_percentage_24h": change,
+                "total_volume": volume * rate,
+            }
+            for coin_id, symbol, change, volume in rows
+        ]
+        for currency, rate in (("usd", 1.0), ("inr", 80.0))
+    }
+    return CoinIndex(MergedMarkets(pages))
+
+
+def test_rank_order_slices():
+    """Test pages are cut from the market cap order."""
+    index = _index()
+    assert index.size("usd") == 4
+    assert [row["id"] for row in index.query("usd", 1, 3)] == [
+        "bitcoin",
+        "ethereum",
+        "tether",
+    ]
+    assert [row["id"] for row in index.query("usd", 2, 3)] == ["bitcoin-cash"]
+    assert index.query("usd", 3, 3) == []
+    assert index.query("inr", 1, 1)[0]["current_price"] == 80.0
+
+
+def test_secondary_orders():
+    """Test precomputed orders keep missing values last."""
+    index = _index()
+    desc = index.query("usd", 1, 4, order="price_change_percentage_24h_desc")
+    asc = index.query("usd", 1, 4, order="price_change_percentage_24h_asc")
+    volume = index.query("inr", 1, 2, order="volume_desc")
+    assert [row["id"] for row in desc] == [
+        "bitcoin-cash",
+        "bitcoin",
+        "ethereum",
+        "tether",
+    ]
+    assert [row["id"] for row in asc] == [
+        "ethereum",
+        "bitcoin",
+        "bitcoin-cash",
+        "tether",
+    ]
+    assert [row["id"] for row in volume] == ["tether", "bitcoin"]
+
+
+def test_symbol_prefix_filter():
+    """Test symbol prefixes are matched case-insensitively in the given order."""
+    index = _index()
+    rows = index.query("usd", 1, 10, symbol_prefix="B")
+    assert [row["id"] for row in rows] == ["bitcoin", "bitcoin-cash"]
+    rows = index.query(
+        "usd", 1, 10, order="price_change_percentage_24h_desc", symbol_prefix="b"
+    )
+    assert [row["id"] for row in rows] == ["bitcoin-cash", "bitcoin"]
+    assert index.query("usd", 1, 10, symbol_prefix="xyz") == []
+    assert "usd" in index
+    assert "cad" not in index
@@ -0,0 +1,73 @@
+"""Test the coin search prefix index."""
+
+from app.services.coin_index import CoinIndex
+from app.services.coin_search import MAX_RESULTS, CoinSearch
+from app.services.multicurrency import MergedMarkets
+
+COINS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    {"id": "bitcoin-cash", "symbol": "bch", "name": "Bitcoin Cash"},
+    {"id": "wrapped-bitcoin", "symbol": "wbtc", "name": "Wrapped Bitcoin"},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    {"id": "bitcoinz", "symbol": "btcz", "name": "BitcoinZ"},
+]
+
+
+def _index():
+    """Rank ethereum, bitcoin and wrapped bitcoin, in that order."""
+    rows = [
+        {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+        {"id": "wrapped-bitcoin", "symbol": "wbtc", "name": "Wrapped Bitcoin"},
+        {"id": "tether", "symbol": "usdt", "name": "Tether"},
+    ]
+    return CoinIndex(MergedMarkets({"usd": rows}))
+
+
+def _ids(results):
+    """Return the ids of search results."""
+    return [row["id"] for row in results]
+
+
+def test_results_ranked_by_market_cap():
+    """Test ranked coins come first in rank order, unranked ones after."""
+    search = CoinSearch(COINS, _index())
+    assert _ids(search.search("bitc")) == [
+        "bitcoin",
+        "wrapped-bitcoin",
+        "bitcoinz",
+        "bitcoin-cash",
+    ]
+    assert search.search("btc")[0] == {
+        "id": "bitcoin",
+        "symbol": "btc",
+        "name": "Bitcoin",
+        "market_cap_rank": 2,
+    }
+    assert search.search("BCH")[0]["market_cap_rank"] is None
+
+
+def test_matches_symbol_name_words_and_id():
+    """Test symbols, names, later name words and ids are all searched."""
+    search = CoinSearch(COINS, _index())
+    assert _ids(search.search("cash")) == ["bitcoin-cash"]
+    assert _ids(search.search("bitcoin-c")) == ["bitcoin-cash"]
+    assert _ids(search.search(" Ether ")) == ["ethereum"]
+    assert _ids(search.search("usdt")) == ["tether"]
+    assert search.search("doge") == []
+    assert search.search("  ") == []
+    assert len(search) == 6
+
+
+def test_limit_and_memoized_prefixes():
+    """Test limits apply, also to prefixes whose top results are memoized."""
+    coins = [
+        {"id": f"coin-{n}", "symbol": f"c{n}", "name": f"Coin {n}"}
+        for n in range(1, 2001)
+    ]
+    search = CoinSearch(coins, None)
+    assert _ids(search.search("c", limit=3)) == ["coin-1", "coin-2", "coin-3"]
+    assert len(search.search("c", limit=500)) == MAX_RESULTS
+    assert _ids(search.search("c", limit=2)) == ["coin-1", "coin-2"]
+    assert _ids(search.search("coin 19", limit=2)) == ["coin-19", "coin-190"]
+    assert CoinSearch([], None).search("c") == []
@@ -1,10 +1,23 @@
 """Test CoinGecko service."""
 
+import asyncio
 from unittest.mock import patch, MagicMock
+import httpx
 import requests
 import pytest
 from fastapi import HTTPException
-from app.services.coingecko import CoinGeckoService
+from app.core.config import settings
+from app.services.coingecko import (
+    CircuitBreaker,
+    CoinGeckoService,
+    Priority,
+    RateGovernor,
+    RateLimited,
+    _retry_after,
+    _timeout,
+    background_priority,
+)
+from tests.test_cache import FakeClock
 
 
 def test_get_coins_market_success():
@@ -80,3 +93,329 @@ def test_get_coin_details_failure():
         with pytest.raises(HTTPException) as exc_info:
             service.get_coin_details("bitcoin")
         assert exc_info.value.status_code == 503
+
+
+def _mock_transport(handler):
+    """Build an httpx transport that routes requests to ``handler``."""
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_async_client_reuses_pool():
+    """Test async fetches go through the pooled client."""
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(200, json=[{"id": "bitcoin"}])
+
+    service = CoinGeckoService()
+    await service.start(transport=_mock_transport(handler))
+    try:
+        assert service.is_started
+        client = service._client
+        await service.get_coins_market_async(vs_currency="usd")
+        await service.get_categories_async()
+        assert service._client is client
+        assert seen == ["/api/v3/coins/markets", "/api/v3/coins/categories"]
+    finally:
+        await service.close()
+    assert not service.is_started
+
+
+@pytest.mark.asyncio
+async def test_async_coin_details_success():
+    """Test async coin details fetch sends the expected parameters."""
+
+    def handler(request):
+        assert request.url.params["market_data"] == "true"
+        return httpx.Response(200, json={"id": "bitcoin"})
+
+    service = CoinGeckoService()
+    await service.start(transport=_mock_transport(handler))
+    try:
+        result = await service.get_coin_details_async("bitcoin")
+        assert result["id"] == "bitcoin"
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_async_failure_maps_to_503():
+    """Test upstream errors on the async client still map to 503."""
+
+    def handler(request):
+        return httpx.Response(500, json={"error": "boom"})
+
+    service = CoinGeckoService()
+    await service.start(transport=_mock_transport(handler))
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            await service.get_categories_async()
+        assert exc_info.value.status_code == 503
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_async_falls_back_to_thread_when_not_started():
+    """Test async methods use the blocking client off-loop before start."""
+    service = CoinGeckoService()
+    with patch("app.services.coingecko.requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"id": "bitcoin"}
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        result = await service.get_coin_details_async("bitcoin")
+        assert result["id"] == "bitcoin"
+        mock_get.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_async_per_host_concurrency_cap():
+    """Test in-flight requests per host never exceed the configured cap."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json=[])
+
+    service = CoinGeckoService()
+    await service.start(transport=_mock_transport(handler))
+    try:
+        with patch.object(settings, "COINGECKO_MAX_CONCURRENCY_PER_HOST", 2):
+            service._host_limits.clear()
+            await asyncio.gather(
+                *(service.get_coins_market_async(page=n) for n in range(6))
+            )
+        assert peak == 2
+    finally:
+        await service.close()
+
+
+def _governor(**kwargs):
+    """Build a governor on a fake clock whose sleeps advance the clock."""
+    clock = FakeClock()
+
+    async def sleep(seconds):
+        clock.now += seconds
+
+    governor = RateGovernor(clock=clock, **kwargs)
+    return governor, clock, patch("app.services.coingecko.asyncio.sleep", sleep)
+
+
+@pytest.mark.asyncio
+async def test_governor_token_bucket():
+    """Test calls beyond the burst wait for refills or are rejected."""
+    governor, clock, fake_sleep = _governor(
+        per_minute=60, burst=2, reserve=0, max_wait=1.5
+    )
+    with fake_sleep:
+        await governor.acquire()
+        await governor.acquire()
+        await governor.acquire()
+        assert clock.now == pytest.approx(1.0)
+        await governor.acquire()
+        with pytest.raises(RateLimited):
+            governor._tokens = -1.0
+            await governor.acquire()
+    info = governor.info()
+    assert info["acquired"]["interactive"] == 4
+    assert info["rejected"] == 1
+    assert info["wait_seconds"] == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_governor_background_yields_to_interactive():
+    """Test background calls leave the reserve and never reject."""
+    governor, clock, fake_sleep = _governor(per_minute=60, burst=3, reserve=1)
+    with fake_sleep:
+        with background_priority():
+            await governor.acquire()
+            await governor.acquire()
+            assert clock.now == 0.0
+            await governor.acquire()
+            assert clock.now == pytest.approx(1.0)
+        await governor.acquire(Priority.INTERACTIVE)
+        assert clock.now == pytest.approx(1.0)
+    assert governor.info()["acquired"] == {"interactive": 1, "background": 3}
+
+
+@pytest.mark.asyncio
+async def test_governor_backoff_after_throttle():
+    """Test a 429 pauses calls for Retry-After, or an exponential backoff."""
+    governor, clock, fake_sleep = _governor(per_minute=600, burst=5, max_wait=100)
+    with patch("app.services.coingecko.random.uniform", return_value=0.0):
+        assert governor.throttle(7) == 7
+        with fake_sleep:
+            await governor.acquire()
+        assert clock.now == pytest.approx(7.0)
+        assert governor.throttle() == 2 * settings.COINGECKO_BACKOFF_BASE_SECONDS
+        assert governor.throttle() == 4 * settings.COINGECKO_BACKOFF_BASE_SECONDS
+        governor.succeeded()
+        assert governor.throttle() == settings.COINGECKO_BACKOFF_BASE_SECONDS
+    assert governor.info()["throttled"] == 4
+
+
+def test_retry_after_parsing():
+    """Test Retry-After is read as seconds or an HTTP date."""
+    assert _retry_after("12") == 12.0
+    assert _retry_after("") is None
+    assert _retry_after("soon") is None
+    assert _retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_async_429_backs_off_and_retries():
+    """Test a 429 is retried after Retry-After instead of failing at once."""
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "0"}),
+        httpx.Response(200, json=[{"id": "defi"}]),
+    ]
+
+    def handler(request):
+        return responses.pop(0)
+
+    service = CoinGeckoService()
+    service.governor = RateGovernor(per_minute=6000)
+    await service.start(transport=_mock_transport(handler))
+    try:
+        assert await service.get_categories_async() == [{"id": "defi"}]
+        assert service.governor.throttled == 1
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_async_repeated_429_maps_to_503():
+    """Test persistent throttling still surfaces as 503."""
+
+    def handler(request):
+        return httpx.Response(429, headers={"Retry-After": "0"})
+
+    service = CoinGeckoService()
+    service.governor = RateGovernor(per_minute=6000)
+    await service.start(transport=_mock_transport(handler))
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            await service.get_categories_async()
+        assert exc_info.value.status_code == 503
+        assert service.governor.throttled == settings.COINGECKO_RATE_LIMIT_RETRIES + 1
+    finally:
+        await service.close()
+
+
+def test_breaker_opens_half_opens_and_closes():
+    """Test the breaker trips after repeated failures and recovers via a probe."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failures=2, reset_after=30, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.info() == {
+        "state": "closed",
+        "consecutive_failures": 0,
+        "opened": 2,
+        "short_circuited": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_async_retries_transient_failures():
+    """Test 5xx answers and connection errors are retried with backoff."""
+    responses = [
+        httpx.ConnectError("refused"),
+        httpx.Response(502),
+        httpx.Response(200, json=[{"id": "defi"}]),
+    ]
+
+    def handler(request):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    service = CoinGeckoService()
+    await service.start(transport=_mock_transport(handler))
+    try:
+        with patch("app.services.coingecko.asyncio.sleep") as sleep:
+            assert await service.get_categories_async() == [{"id": "defi"}]
+        assert sleep.await_count == 2
+        assert service.breaker.info()["consecutive_failures"] == 0
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_async_read_timeouts_and_client_errors_not_retried():
+    """Test read timeouts and 4xx answers fail on the first attempt."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path.endswith("slow"):
+            raise httpx.ReadTimeout("slow")
+        return httpx.Response(404)
+
+    service = CoinGeckoService()
+    await service.start(transport=_mock_transport(handler))
+    try:
+        for coin_id in ("slow", "missing"):
+            with pytest.raises(HTTPException) as exc_info:
+                await service.get_coin_details_async(coin_id)
+            assert exc_info.value.status_code == 503
+        assert len(calls) == 2
+        assert service.breaker.info()["consecutive_failures"] == 1
+    finally:
+        await service.close()
+
+
+@pytest.mark.asyncio
+async def test_async_open_breaker_fails_fast():
+    """Test no request is sent while the breaker is open."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    service = CoinGeckoService()
+    service.breaker = CircuitBreaker(failures=1, reset_after=60)
+    await service.start(transport=_mock_transport(handler))
+    try:
+        with patch("app.services.coingecko.asyncio.sleep"):
+            with pytest.raises(HTTPException):
+                await service.get_categories_async()
+        sent = len(calls)
+        assert sent == settings.COINGECKO_RETRIES + 1
+        with pytest.raises(HTTPException) as exc_info:
+            await service.get_categories_async()
+        assert "circuit breaker open" in exc_info.value.detail
+        assert len(calls) == sent
+    finally:
+        await service.close()
+
+
+def test_client_timeouts_split_connect_and_read():
+    """Test connect and read timeouts are configured separately."""
+    timeout = _timeout()
+    assert timeout.connect == settings.COINGECKO_CONNECT_TIMEOUT_SECONDS
+    assert timeout.read == settings.COINGECKO_READ_TIMEOUT_SECONDS
@@ -3,7 +3,9 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
+from app.db.repository import HistoryStore
 from app.main import app
+from app.services.market import market_service
 
 client = TestClient(app)
 
@@ -104,7 +106,167 @@ def test_get_coin_details_success(auth_headers, mock_coin_detail):
         assert data["name"] == "Bitcoin"
 
 
+def test_get_coins_batch(auth_headers, mock_coins_data):
+    """Test a batch request returns found coins and per-id errors."""
+    with patch("app.services.coingecko.requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_coins_data
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        response = client.get(
+            "/api/coins/batch?ids=bitcoin,unknown&vs_currency=eur",
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["data"]["bitcoin"]["current_price"] == 50000
+        assert data["errors"]["unknown"]["status"] == 404
+        params = mock_get.call_args.kwargs["params"]
+        assert params["ids"] == "bitcoin,unknown"
+        assert mock_get.call_count == 1
+
+
+def test_search_coins(auth_headers, mock_coins_data):
+    """Test coins are found by prefix and ranked by market cap."""
+    coin_list = [
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+        {"id": "bitcoin-cash", "symbol": "bch", "name": "Bitcoin Cash"},
+    ]
+
+    def fake_get(url, **kwargs):
+        mock_response = MagicMock()
+        mock_response.raise_for_status = MagicMock()
+        if url.endswith("/coins/list"):
+            mock_response.json.return_value = coin_list
+        else:
+            mock_response.json.return_value = mock_coins_data
+        return mock_response
+
+    with patch("app.services.coingecko.requests.get", side_effect=fake_get):
+        response = client.get("/api/coins/search?q=Bit", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == [
+            {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "market_cap_rank": 1},
+            {
+                "id": "bitcoin-cash",
+                "symbol": "bch",
+                "name": "Bitcoin Cash",
+                "market_cap_rank": None,
+            },
+        ]
+        response = client.get("/api/coins/search?q=bit&limit=1", headers=auth_headers)
+        assert len(response.json()) == 1
+        response = client.get("/api/coins/search?q=", headers=auth_headers)
+        assert response.status_code == 422
+
+
+def test_get_coin_history(auth_headers, session_factory):
+    """Test chart ranges are served from the local history store."""
+    history = HistoryStore(session_factory)
+    history.append([("bitcoin", "inr", 4000000.0)])
+    with patch.object(market_service, "history", history):
+        response = client.get(
+            "/api/coins/bitcoin/history?range=30d", headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["range"] == "30d"
+        assert data["resolution_seconds"] == 14400
+        assert data["candles"][0][1:] == [4000000.0] * 4
+        response = client.get(
+            "/api/coins/bitcoin/history?range=5y", headers=auth_headers
+        )
+        assert response.status_code == 422
+        response = client.get(
+            "/api/coins/dogecoin/history?vs_currency=usd", headers=auth_headers
+        )
+        assert response.status_code == 404
+
+
+def test_get_coins_batch_too_many_ids(auth_headers):
+    """Test batches are limited to ``BATCH_MAX_IDS`` coins."""
+    ids = ",".join(f"coin-{n}" for n in range(51))
+    response = client.get(f"/api/coins/batch?ids={ids}", headers=auth_headers)
+    assert response.status_code == 400
+
+
 def test_get_coin_details_unauthorized():
     """Test getting coin details without authentication."""
     response = client.get("/api/coins/bitcoin")
     assert response.status_code == 401
+
+
+def test_get_coins_invalid_order(auth_headers):
+    """Test unknown sort orders are rejected."""
+    response = client.get("/api/coins?order=name_asc", headers=auth_headers)
+    assert response.status_code == 422
+
+
+def test_get_coins_sorted_and_filtered(auth_headers, mock_coins_data):
+    """Test sort and symbol filters are accepted for supported currencies."""
+    with patch("app.services.coingecko.requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_coins_data
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        response = client.get(
+            "/api/coins?vs_currency=usd&order=volume_desc&symbol_prefix=bt",
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert [coin["id"] for coin in response.json()] == ["bitcoin"]
+
+
+def test_get_coins_projected(auth_headers, mock_coins_data):
+    """Test fields and sparkline options shape the returned rows."""
+    mock_coins_data[0]["sparkline_in_7d"] = {"price": [1.0, 2.0, 3.0, 4.0]}
+    with patch("app.services.coingecko.requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_coins_data
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        response = client.get(
+            "/api/coins?fields=name,sparkline_in_7d&sparkline_points=2"
+            "&sparkline_mode=stride",
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == [
+            {
+                "id": "bitcoin",
+                "name": "Bitcoin",
+                "sparkline_in_7d": {"price": [1.0, 4.0]},
+            }
+        ]
+
+
+def test_get_coins_invalid_sparkline_options(auth_headers):
+    """Test out of range sparkline options are rejected."""
+    for query in ("sparkline_points=1", "sparkline_points=500", "sparkline_mode=x"):
+        response = client.get(f"/api/coins?{query}", headers=auth_headers)
+        assert response.status_code == 422
+
+
+def test_get_coins_not_modified(auth_headers, mock_coins_data):
+    """Test polling with the returned ETag is answered with 304."""
+    with patch("app.services.coingecko.requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.json.return_value = mock_coins_data
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        response = client.get("/api/coins", headers=auth_headers)
+        etag = response.headers["etag"]
+        response = client.get(
+            "/api/coins", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        response = client.get(
+            "/api/coins?per_page=5", headers={**auth_headers, "If-None-Match": '"x"'}
+        )
+        assert response.status_code == 200
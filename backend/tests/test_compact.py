@@ -0,0 +1,54 @@
+"""Test compact market value encoding."""
+
+from array import array
+from app.services.compact import (
+    ABSENT,
+    CoinRecord,
+    decode_document,
+    decode_value,
+    encode_document,
+    encode_value,
+)
+
+
+def test_sparkline_round_trip():
+    """Test float price series are packed into arrays and restored."""
+    sparkline = {"price": [1.5, 2.25, 3.0]}
+    encoded = encode_value(sparkline)
+    assert isinstance(encoded, array)
+    assert decode_value(encoded) == sparkline
+
+
+def test_other_values_unchanged():
+    """Test values that are not pure float series pass through untouched."""
+    for value in (
+        1.5,
+        "btc",
+        None,
+        {"price": [1, 2]},
+        {"price": [1.0, None]},
+        {"price": [1.0], "volume": [2.0]},
+        [1.0, 2.0],
+    ):
+        assert encode_value(value) is value
+        assert decode_value(value) is value
+
+
+def test_coin_record_is_slotted():
+    """Test records carry no per-instance dictionary."""
+    record = CoinRecord(("bitcoin",), ((1.0,), None))
+    assert not hasattr(record, "__dict__")
+    assert record.quotes[1] is None
+    assert repr(ABSENT) == "ABSENT"
+
+
+def test_document_round_trip():
+    """Test nested sparklines in a details document are packed and restored."""
+    details = {
+        "id": "bitcoin",
+        "tickers": [{"base": "BTC"}],
+        "market_data": {"sparkline_7d": {"price": [1.0, 2.0]}, "ath": {"usd": 1.0}},
+    }
+    encoded = encode_document(details)
+    assert isinstance(encoded["market_data"]["sparkline_7d"], array)
+    assert decode_document(encoded) == details
@@ -1,7 +1,16 @@
 """Test main application endpoints."""
 
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.shared_cache import SharedCache
+from app.db import database
+from app.db.database import Base
 from app.main import app
+from app.services.coingecko import coingecko_service
+from app.services.market import market_service
+from app.services.refresher import market_refresher
+from app.services.users import user_service
 
 client = TestClient(app)
 
@@ -24,3 +33,107 @@ def test_version():
     assert data["version"] == "1.0.0"
     assert data["api_version"] == "v1"
     assert "coingecko_api" in data["dependencies"]
+
+
+def test_lifespan_opens_and_closes_coingecko_client():
+    """Test the app lifespan manages the pooled CoinGecko client."""
+    with patch.object(settings, "REFRESH_ENABLED", False):
+        with TestClient(app) as lifespan_client:
+            assert coingecko_service.is_started
+            assert not market_refresher.is_running
+            assert lifespan_client.get("/health").status_code == 200
+    assert not coingecko_service.is_started
+
+
+def test_lifespan_runs_market_refresher():
+    """Test the app lifespan starts and stops the background refresher."""
+    with patch.object(market_refresher, "refresh_once", AsyncMock()) as refresh:
+        with TestClient(app):
+            assert market_refresher.is_running
+        assert not market_refresher.is_running
+    refresh.assert_awaited()
+
+
+def test_lifespan_refreshes_only_on_shared_cache_leader(tmp_path):
+    """Test workers sharing a cache leave refreshing to the lock holder."""
+    leader = SharedCache.from_directory(str(tmp_path))
+    assert leader.acquire_leadership()
+    with (
+        patch.object(
+            market_service, "shared", SharedCache.from_directory(str(tmp_path))
+        ),
+        patch.object(market_refresher, "refresh_once", AsyncMock()) as refresh,
+    ):
+        with TestClient(app):
+            assert not market_refresher.is_running
+        leader.release_leadership()
+        with TestClient(app):
+            assert market_refresher.is_running
+            assert market_service.shared.is_leader
+        assert not market_service.shared.is_leader
+    refresh.assert_awaited()
+
+
+def test_cache_stats():
+    """Test cache counters are exposed."""
+    response = client.get("/cache/stats")
+    assert response.status_code == 200
+    data = response.json()
+    for field in ("hits", "misses", "evictions", "hit_ratio", "size", "maxsize"):
+        assert field in data["cache"]
+    for field in ("executions", "coalesced", "in_flight"):
+        assert field in data["singleflight"]
+    for field in ("tokens", "acquired", "throttled", "rejected"):
+        assert field in data["rate_limit"]
+
+
+def test_lifespan_creates_snapshot_tables_when_enabled():
+    """Test the snapshot tables are created on startup when L2 is enabled."""
+    with (
+        patch.object(settings, "REFRESH_ENABLED", False),
+        patch.object(settings, "CACHE_L2_ENABLED", True),
+        patch.object(Base.metadata, "create_all") as create_all,
+    ):
+        with TestClient(app):
+            engine = database.get_engine()
+    create_all.assert_called_once_with(bind=engine)
+
+
+def test_lifespan_bootstraps_admin_user():
+    """Test the configured admin account is created on startup."""
+    with (
+        patch.object(settings, "REFRESH_ENABLED", False),
+        patch.object(settings, "ADMIN_USERNAME", "root"),
+        patch.object(settings, "ADMIN_PASSWORD", "changeme"),
+        patch.object(user_service, "start", AsyncMock()) as start,
+        patch.object(user_service, "ensure", AsyncMock()) as ensure,
+    ):
+        with TestClient(app):
+            pass
+    start.assert_awaited_once()
+    ensure.assert_awaited_once_with("root", "changeme")
+
+
+def test_lifespan_prepares_users_without_other_tables():
+    """Test the user store is prepared even with every optional table off."""
+    with (
+        patch.object(settings, "REFRESH_ENABLED", False),
+        patch.object(settings, "CACHE_L2_ENABLED", False),
+        patch.object(settings, "HISTORY_ENABLED", False),
+        patch.object(Base.metadata, "create_all") as create_all,
+        patch.object(user_service, "start", AsyncMock()) as start,
+    ):
+        with TestClient(app):
+            pass
+    create_all.assert_not_called()
+    start.assert_awaited_once()
+
+
+def test_lifespan_creates_and_disposes_engine():
+    """Test the database engine lives for the duration of the lifespan."""
+    database.dispose_engine()
+    with patch.object(settings, "REFRESH_ENABLED", False):
+        with TestClient(app):
+            assert database._engine is not None
+            assert database._async_engine is None
+    assert database._engine is None
@@ -0,0 +1,575 @@
+"""Test the cached market data service."""
+
+import asyncio
+import gc
+import threading
+import weakref
+from unittest.mock import AsyncMock, MagicMock, patch
+import orjson
+import pytest
+from fastapi import HTTPException
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.shared_cache import SharedCache
+from app.db.repository import HistoryStore
+from app.services.coin_index import CoinIndex
+from app.services.market import MarketDataService, served_stale
+from app.services.projection import Projection
+from tests.test_cache import FakeClock
+
+
+@pytest.fixture(autouse=True)
+def single_page_index():
+    """Build the coin index from a single upstream page per currency."""
+    with patch.object(settings, "COIN_INDEX_SIZE", 250):
+        yield
+
+
+def _service():
+    """Build a market service around a mocked CoinGecko client."""
+    client = MagicMock()
+    client.get_coins_market_async = AsyncMock(return_value=[{"id": "bitcoin"}])
+    client.get_categories_async = AsyncMock(return_value=[{"id": "defi"}])
+    client.get_coin_details_async = AsyncMock(return_value={"id": "bitcoin"})
+    return MarketDataService(client=client, cache=TTLCache(maxsize=16)), client
+
+
+@pytest.mark.asyncio
+async def test_coins_market_cached_per_normalized_params():
+    """Test identical market queries hit the cache after the first fetch."""
+    service, client = _service()
+    await service.get_coins_market(vs_currency="EUR", page=1, per_page=10)
+    await service.get_coins_market(vs_currency="eur", page=1, per_page=10)
+    await service.get_coins_market(vs_currency="eur", page=2, per_page=10)
+    assert client.get_coins_market_async.await_count == 2
+    client.get_coins_market_async.assert_any_await(
+        vs_currency="eur", page=1, per_page=10
+    )
+    assert service.cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_supported_currencies_share_one_index():
+    """Test inr, cad and usd requests are served from one batched fetch."""
+    service, client = _service()
+
+    async def fetch(vs_currency, page, per_page):
+        price = {"inr": 80.0, "cad": 1.3, "usd": 1.0}[vs_currency]
+        return [{"id": "tether", "symbol": "usdt", "current_price": price}]
+
+    client.get_coins_market_async.side_effect = fetch
+    usd = await service.get_coins_market(vs_currency="usd")
+    inr = await service.get_coins_market(vs_currency="INR")
+    cad = await service.get_coins_market(vs_currency="cad")
+    assert client.get_coins_market_async.await_count == 3
+    assert usd == [{"id": "tether", "symbol": "usdt", "current_price": 1.0}]
+    assert inr[0]["current_price"] == 80.0
+    assert cad[0]["current_price"] == 1.3
+    client.get_coins_market_async.assert_any_await(
+        vs_currency="cad", page=1, per_page=250
+    )
+
+
+@pytest.mark.asyncio
+async def test_pages_are_sliced_from_the_index():
+    """Test any page size within the index is served without upstream calls."""
+    service, client = _service()
+    client.get_coins_market_async.return_value = [
+        {"id": f"coin-{rank}", "symbol": f"c{rank}", "market_cap_rank": rank}
+        for rank in range(1, 251)
+    ]
+    first = await service.get_coins_market(page=1, per_page=10)
+    second = await service.get_coins_market(page=2, per_page=20)
+    assert [row["id"] for row in first] == [f"coin-{rank}" for rank in range(1, 11)]
+    assert second[0]["id"] == "coin-21"
+    assert len(second) == 20
+    assert client.get_coins_market_async.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_sorting_and_filtering_use_the_index():
+    """Test sorted and filtered pages are served from the index."""
+    service, client = _service()
+    client.get_coins_market_async.return_value = [
+        {"id": "bitcoin", "symbol": "btc", "price_change_percentage_24h": 1.0},
+        {"id": "bitcoin-cash", "symbol": "bch", "price_change_percentage_24h": 5.0},
+        {"id": "ethereum", "symbol": "eth", "price_change_percentage_24h": 3.0},
+    ]
+    rows = await service.get_coins_market(
+        vs_currency="usd", order="price_change_percentage_24h_desc"
+    )
+    assert [row["id"] for row in rows] == ["bitcoin-cash", "ethereum", "bitcoin"]
+    rows = await service.get_coins_market(vs_currency="usd", symbol_prefix="B")
+    assert [row["id"] for row in rows] == ["bitcoin", "bitcoin-cash"]
+    assert client.get_coins_market_async.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_pages_beyond_the_index_use_merged_pages():
+    """Test deep pages fall back to one multi-currency upstream page."""
+    service, client = _service()
+    rows = await service.get_coins_market(vs_currency="cad", page=30, per_page=10)
+    assert rows == [{"id": "bitcoin"}]
+    assert client.get_coins_market_async.await_count == 3
+    client.get_coins_market_async.assert_any_await(
+        vs_currency="usd", page=30, per_page=10
+    )
+
+
+@pytest.mark.asyncio
+async def test_projected_pages_cached_per_parameter_set():
+    """Test projected pages are built once per parameters and data version."""
+    service, client = _service()
+    client.get_coins_market_async.return_value = [
+        {"id": "bitcoin", "name": "Bitcoin", "sparkline_in_7d": {"price": [1.0] * 9}}
+    ]
+    projection = Projection(["sparkline_in_7d"], sparkline_points=3)
+    first = await service.get_coins_market(vs_currency="usd", projection=projection)
+    again = await service.get_coins_market(
+        vs_currency="usd", projection=Projection(["sparkline_in_7d"], 3)
+    )
+    assert first == [{"id": "bitcoin", "sparkline_in_7d": {"price": [1.0] * 3}}]
+    assert again is first
+    other = await service.get_coins_market(vs_currency="eur", projection=projection)
+    assert other == first
+    deep = await service.get_coins_market(
+        vs_currency="usd", page=30, projection=projection
+    )
+    assert deep == first
+    await service.refresh_coin_index()
+    refreshed = await service.get_coins_market(vs_currency="usd", projection=projection)
+    assert refreshed == first and refreshed is not first
+
+
+@pytest.mark.asyncio
+async def test_projected_details():
+    """Test coin details are projected from the cached document."""
+    service, client = _service()
+    client.get_coin_details_async.return_value = {
+        "id": "bitcoin",
+        "description": {"en": "..."},
+        "market_data": {"sparkline_7d": {"price": [1.0, 2.0, 3.0]}},
+    }
+    details = await service.get_coin_details("bitcoin", Projection(["market_data"], 2))
+    assert details == {
+        "id": "bitcoin",
+        "market_data": {"sparkline_7d": {"price": [1.0, 3.0]}},
+    }
+    full = await service.get_coin_details("bitcoin", Projection())
+    assert full == client.get_coin_details_async.return_value
+    client.get_coin_details_async.assert_awaited_once_with("bitcoin")
+
+
+@pytest.mark.asyncio
+async def test_payloads_encoded_once_per_refresh():
+    """Test serialized payloads are reused until the source is refreshed."""
+    service, client = _service()
+    first = await service.get_coins_market_payload(vs_currency="usd")
+    assert await service.get_coins_market_payload(vs_currency="usd") is first
+    assert orjson.loads(first.body) == [{"id": "bitcoin"}]
+    details = await service.get_coin_details_payload("bitcoin")
+    assert orjson.loads(details.body) == {"id": "bitcoin"}
+    categories = await service.get_categories_payload()
+    assert await service.get_categories_payload() is categories
+    await service.refresh_coin_index()
+    refreshed = await service.get_coins_market_payload(vs_currency="usd")
+    assert refreshed is not first
+    assert refreshed.etag == first.etag
+
+
+@pytest.mark.asyncio
+async def test_refreshes_release_views_of_replaced_sources():
+    """Test views not requested again do not keep old sources alive."""
+    service, client = _service()
+    for page in range(1, 21):
+        await service.refresh_coin_index()
+        await service.get_coins_market_payload(vs_currency="usd", page=page)
+    gc.collect()
+    live = [item for item in gc.get_objects() if isinstance(item, CoinIndex)]
+    assert len(live) == 1
+    assert len(service.payloads) == 1
+
+
+@pytest.mark.asyncio
+async def test_payloads_capped_by_size():
+    """Test client-chosen parameters cannot pin more than the byte budget."""
+    service, client = _service()
+    client.get_categories_async.return_value = [
+        {"id": f"category-{n}", "name": f"Category {n}", "content": "x" * 500}
+        for n in range(100)
+    ]
+    with patch.object(service.payloads, "maxbytes", 200_000):
+        for offset in range(50):
+            await service.get_categories_payload(offset=offset)
+    assert 0 < service.payloads.nbytes <= 200_000
+    assert len(service.payloads) < 50
+    assert service.payloads.stats.evictions > 0
+
+
+@pytest.mark.asyncio
+async def test_sorting_unsupported_currency_rejected():
+    """Test sorting or filtering other currencies is a client error."""
+    service, client = _service()
+    with pytest.raises(HTTPException) as exc_info:
+        await service.get_coins_market(vs_currency="eur", symbol_prefix="b")
+    assert exc_info.value.status_code == 400
+    client.get_coins_market_async.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_categories_and_details_cached():
+    """Test categories and coin details are cached independently."""
+    service, client = _service()
+    for _ in range(3):
+        await service.get_categories()
+        await service.get_coin_details("Bitcoin")
+    assert client.get_categories_async.await_count == 1
+    client.get_coin_details_async.assert_awaited_once_with("bitcoin")
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached():
+    """Test upstream errors propagate and are retried on the next call."""
+    service, client = _service()
+    client.get_categories_async.side_effect = [
+        HTTPException(status_code=503, detail="down"),
+        [{"id": "defi"}],
+    ]
+    with pytest.raises(HTTPException):
+        await service.get_categories()
+    assert await service.get_categories() == [{"id": "defi"}]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_coalesce_into_one_fetch():
+    """Test a burst of identical cold requests triggers one upstream pass."""
+    service, client = _service()
+
+    async def slow_fetch(**kwargs):
+        await asyncio.sleep(0.01)
+        return [{"id": "bitcoin"}]
+
+    client.get_coins_market_async.side_effect = slow_fetch
+    await asyncio.gather(
+        *(service.get_coins_market(vs_currency="inr") for _ in range(25))
+    )
+    assert client.get_coins_market_async.await_count == 3
+    assert service.info()["singleflight"]["coalesced"] == 24
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_served_while_revalidating():
+    """Test stale data is returned immediately and refreshed in the background."""
+    clock = FakeClock()
+    client = MagicMock()
+    client.get_categories_async = AsyncMock(side_effect=[["old"], ["new"]])
+    service = MarketDataService(client=client, cache=TTLCache(clock=clock))
+    with patch.object(settings, "CACHE_CATEGORIES_TTL_SECONDS", 10):
+        assert await service.get_categories() == ["old"]
+        clock.now = 11
+        assert await service.get_categories() == ["old"]
+        await asyncio.gather(*service._revalidations)
+        assert await service.get_categories() == ["new"]
+    assert client.get_categories_async.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_revalidation_keeps_serving_until_hard_ttl():
+    """Test outages surface only once neither cached nor last good data exists."""
+    clock = FakeClock()
+    client = MagicMock()
+    client.get_categories_async = AsyncMock(
+        side_effect=[["old"]] + [HTTPException(status_code=503)] * 4
+    )
+    service = MarketDataService(client=client, cache=TTLCache(clock=clock))
+    with (
+        patch.object(settings, "CACHE_CATEGORIES_TTL_SECONDS", 10),
+        patch.object(settings, "CACHE_HARD_TTL_SECONDS", 100),
+        patch.object(settings, "CACHE_LAST_GOOD_TTL_SECONDS", 150),
+    ):
+        await service.get_categories()
+        assert not served_stale()
+        clock.now = 50
+        assert await service.get_categories() == ["old"]
+        assert served_stale()
+        await asyncio.gather(*service._revalidations)
+        clock.now = 100
+        assert await service.get_categories() == ["old"]
+        clock.now = 150
+        with pytest.raises(HTTPException):
+            await service.get_categories()
+
+
+@pytest.mark.asyncio
+async def test_refresh_bypasses_fresh_entries():
+    """Test refresh methods always fetch and replace the cached value."""
+    service, client = _service()
+    await service.get_coins_market(vs_currency="usd")
+    client.get_coins_market_async.return_value = [{"id": "ethereum"}]
+    await service.refresh_coin_index()
+    await service.refresh_categories()
+    assert await service.get_coins_market(vs_currency="usd") == [{"id": "ethereum"}]
+    assert client.get_coins_market_async.await_count == 6
+    assert client.get_categories_async.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_serves_other_workers(tmp_path):
+    """Test a worker reads what the refresher leader shared, without upstream."""
+    leader, leader_client = _service()
+    follower, follower_client = _service()
+    leader.shared = SharedCache.from_directory(str(tmp_path))
+    follower.shared = SharedCache.from_directory(str(tmp_path))
+    await leader.refresh_coin_index()
+    await leader.refresh_categories()
+    assert await follower.get_coins_market(vs_currency="usd") == [{"id": "bitcoin"}]
+    assert await follower.get_categories() == [{"id": "defi"}]
+    assert follower_client.get_coins_market_async.await_count == 0
+    assert follower_client.get_categories_async.await_count == 0
+    await leader.refresh_categories()
+    assert leader_client.get_categories_async.await_count == 2
+    assert follower.info()["shared"]["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_io_runs_off_the_event_loop(tmp_path):
+    """Test shared cache reads and writes run in the threadpool."""
+    service, client = _service()
+    service.shared = SharedCache.from_directory(str(tmp_path))
+    threads = []
+    for name in ("get", "set"):
+        method = getattr(service.shared, name)
+
+        def record(*args, method=method):
+            threads.append(threading.current_thread())
+            return method(*args)
+
+        setattr(service.shared, name, record)
+    await service.get_categories()
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_errors_do_not_fail_requests():
+    """Test a broken shared cache falls back to CoinGecko."""
+    service, client = _service()
+    service.shared = MagicMock()
+    service.shared.get.side_effect = OSError("read-only file system")
+    service.shared.set.side_effect = OSError("read-only file system")
+    assert await service.get_categories() == [{"id": "defi"}]
+    assert client.get_categories_async.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_purge_shared_uses_the_hard_ttl(tmp_path):
+    """Test shared snapshots past the hard TTL are purged; errors are logged."""
+    service, client = _service()
+    assert await service.purge_shared() == 0
+    service.shared = MagicMock()
+    service.shared.purge.return_value = 3
+    assert await service.purge_shared() == 3
+    service.shared.purge.assert_called_once_with(settings.CACHE_HARD_TTL_SECONDS)
+    service.shared.purge.side_effect = OSError("gone")
+    assert await service.purge_shared() == 0
+
+
+@pytest.mark.asyncio
+async def test_coin_search_rebuilt_only_when_sources_change():
+    """Test searches share one index until the coin list or index changes."""
+    service, client = _service()
+    client.get_coins_list_async = AsyncMock(
+        return_value=[{"id": "bitcoin-cash", "symbol": "bch", "name": "Bitcoin Cash"}]
+    )
+    client.get_coins_market_async.return_value = [
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"}
+    ]
+    first = await service.search_coins_payload("bit")
+    assert [row["id"] for row in orjson.loads(first.body)] == [
+        "bitcoin",
+        "bitcoin-cash",
+    ]
+    search = await service.get_coin_search()
+    assert await service.refresh_coin_search() is search
+    assert client.get_coins_list_async.await_count == 1
+    await service.refresh_coin_index()
+    assert await service.get_coin_search() is not search
+
+
+@pytest.mark.asyncio
+async def test_search_payloads_dropped_with_their_sources():
+    """Test refreshing the coin index releases the old search and its payloads."""
+    service, client = _service()
+    client.get_coins_list_async = AsyncMock(return_value=[])
+    client.get_coins_market_async.return_value = [
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"}
+    ]
+    first = await service.search_coins_payload("bit")
+    assert await service.search_coins_payload("bit") is first
+    searches = [weakref.ref(await service.get_coin_search())]
+    for _ in range(5):
+        await service.refresh_coin_index()
+        assert not service.payloads
+        await service.search_coins_payload("bit")
+        searches.append(weakref.ref(await service.get_coin_search()))
+    gc.collect()
+    assert [search() is not None for search in searches] == [False] * 5 + [True]
+
+
+@pytest.mark.asyncio
+async def test_coin_search_without_coin_list():
+    """Test the coin index stays searchable while the coin list is down."""
+    service, client = _service()
+    client.get_coins_list_async = AsyncMock(
+        side_effect=HTTPException(status_code=503, detail="down")
+    )
+    payload = await service.search_coins_payload("BIT")
+    assert orjson.loads(payload.body)[0]["id"] == "bitcoin"
+    assert served_stale()
+
+
+@pytest.mark.asyncio
+async def test_refresh_records_price_history(session_factory):
+    """Test each index refresh appends prices that charts are served from."""
+    service, client = _service()
+    client.get_coins_market_async.return_value = [
+        {"id": "bitcoin", "current_price": 50000.0}
+    ]
+    with pytest.raises(HTTPException) as disabled:
+        await service.get_coin_history_payload("bitcoin", "usd", "1d")
+    assert disabled.value.status_code == 404
+    service.history = HistoryStore(session_factory)
+    await service.refresh_coin_index()
+    payload = await service.get_coin_history_payload("BITCOIN", "USD", "1d")
+    history = orjson.loads(payload.body)
+    assert history["resolution_seconds"] == 300
+    assert history["candles"][0][1:] == [50000.0] * 4
+    with pytest.raises(HTTPException) as missing:
+        await service.get_coin_history_payload("ethereum", "usd", "1d")
+    assert missing.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_history_errors_do_not_fail_refresh():
+    """Test a broken history store neither fails refreshes nor chart reads."""
+    service, client = _service()
+    service.history = MagicMock()
+    service.history.append.side_effect = RuntimeError("disk full")
+    service.history.load.side_effect = RuntimeError("disk full")
+    assert await service.refresh_coin_index() is not None
+    with pytest.raises(HTTPException) as unavailable:
+        await service.get_coin_history_payload("bitcoin", "usd", "7d")
+    assert unavailable.value.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_snapshot_store_read_through():
+    """Test a fresh database snapshot is served without calling CoinGecko."""
+    service, client = _service()
+    service.store = MagicMock()
+    service.store.load_coins_markets.return_value = {
+        currency: [{"id": "cached", "current_price": price}]
+        for currency, price in (("inr", 80), ("cad", 1.3), ("usd", 1))
+    }
+    assert await service.get_coins_market(vs_currency="usd") == [
+        {"id": "cached", "current_price": 1}
+    ]
+    service.store.load_coins_markets.assert_called_once_with(
+        ("inr", "cad", "usd"), 1, 250, 60
+    )
+    client.get_coins_market_async.assert_not_awaited()
+    service.store.save_coins_markets.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_store_write_through():
+    """Test upstream data is written to the database after a snapshot miss."""
+    service, client = _service()
+    service.store = MagicMock()
+    service.store.load_categories.return_value = None
+    assert await service.get_categories() == [{"id": "defi"}]
+    service.store.save_categories.assert_called_once_with([{"id": "defi"}])
+
+
+@pytest.mark.asyncio
+async def test_snapshot_store_errors_do_not_fail_requests():
+    """Test database failures fall back to CoinGecko."""
+    service, client = _service()
+    service.store = MagicMock()
+    service.store.load_coins_markets.side_effect = RuntimeError("db down")
+    service.store.save_coins_markets.side_effect = RuntimeError("db down")
+    assert await service.get_coins_market() == [{"id": "bitcoin"}]
+    assert client.get_coins_market_async.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_market_folds_misses_into_one_call():
+    """Test index and cached coins are served locally, the rest in one call."""
+    service, client = _service()
+    client.get_coins_market_async.side_effect = lambda vs_currency, page, per_page: [
+        {"id": "bitcoin", "symbol": "btc", "current_price": 1.0}
+    ]
+    client.get_coins_markets_by_ids_async = AsyncMock(
+        return_value=[{"id": "dogecoin", "symbol": "doge", "current_price": 0.1}]
+    )
+    await service.get_coin_index()
+
+    result = await service.get_coins_batch(
+        ["dogecoin", "BITCOIN", "missing", "bitcoin"], vs_currency="usd"
+    )
+    assert list(result["data"]) == ["dogecoin", "bitcoin"]
+    assert result["data"]["bitcoin"]["current_price"] == 1.0
+    assert result["errors"] == {"missing": {"status": 404, "detail": "Coin not found"}}
+    client.get_coins_markets_by_ids_async.assert_awaited_once_with(
+        "usd", ["dogecoin", "missing"]
+    )
+
+    result = await service.get_coins_batch(
+        ["dogecoin"], vs_currency="usd", projection=Projection(["symbol"])
+    )
+    assert result["data"] == {"dogecoin": {"id": "dogecoin", "symbol": "doge"}}
+    assert client.get_coins_markets_by_ids_async.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_market_upstream_failure_reported_per_id():
+    """Test a failed upstream call yields errors, or last good rows if any."""
+    service, client = _service()
+    client.get_coins_markets_by_ids_async = AsyncMock(
+        return_value=[{"id": "dogecoin", "current_price": 0.1}]
+    )
+    await service.get_coins_batch(["dogecoin"], vs_currency="eur")
+    service.cache.clear()
+    client.get_coins_markets_by_ids_async.side_effect = HTTPException(503, "down")
+
+    result = await service.get_coins_batch(["dogecoin", "shiba"], vs_currency="eur")
+    assert result["data"] == {"dogecoin": {"id": "dogecoin", "current_price": 0.1}}
+    assert result["errors"] == {"shiba": {"status": 503, "detail": "down"}}
+    assert served_stale()
+
+
+@pytest.mark.asyncio
+async def test_batch_details_bounded_concurrency_and_partial_results():
+    """Test detail misses run concurrently up to the limit, failures per id."""
+    service, client = _service()
+    running = peak = 0
+
+    async def details(coin_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if coin_id == "broken":
+            raise HTTPException(503, "down")
+        return {"id": coin_id}
+
+    client.get_coin_details_async.side_effect = details
+    await service.get_coin_details("coin-0")
+    ids = [f"coin-{n}" for n in range(6)] + ["broken"]
+    with patch.object(settings, "BATCH_MAX_CONCURRENCY", 2):
+        result = await service.get_coins_batch(ids, view="details")
+    assert list(result["data"]) == ids[:-1]
+    assert result["errors"] == {"broken": {"status": 503, "detail": "down"}}
+    assert peak == 2
+    assert client.get_coin_details_async.await_count == 7
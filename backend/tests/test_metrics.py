@@ -0,0 +1,174 @@
+"""Test the metrics registry, middleware and /metrics endpoint."""
+
+from unittest.mock import patch
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Registry
+from app.core.security import create_access_token, decode_token
+from app.main import app
+from app.services.coingecko import CircuitBreaker, CoinGeckoService, RateGovernor
+
+client = TestClient(app)
+
+
+def _sample(text, line_start):
+    """Return the value of the first exposition line starting with ``line_start``."""
+    for line in text.splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_counter_gauge_and_histogram_exposition():
+    """Test samples are rendered in the Prometheus text format."""
+    registry = Registry()
+    requests = registry.counter("requests", "Requests.", ("route",))
+    in_flight = registry.gauge("in_flight", "In flight.")
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",))
+    requests.inc("/a")
+    requests.inc("/a", amount=2)
+    in_flight.labels().inc()
+    latency.observe(0.003, "/a")
+    latency.observe(20.0, "/a")
+
+    text = registry.expose()
+    assert "# TYPE requests counter" in text
+    assert 'requests_total{route="/a"} 3.0' in text
+    assert "in_flight 1.0" in text
+    assert 'latency_seconds_bucket{route="/a",le="0.0025"} 0' in text
+    assert 'latency_seconds_bucket{route="/a",le="0.005"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{route="/a"} 2' in text
+    assert 'latency_seconds_sum{route="/a"} 20.003' in text
+
+
+def test_label_values_are_escaped():
+    """Test quotes, backslashes and newlines in label values are escaped."""
+    registry = Registry()
+    registry.counter("c", "C.", ("path",)).inc('a"b\\c\nd')
+    assert 'c_total{path="a\\"b\\\\c\\nd"} 1.0' in registry.expose()
+
+
+def test_track_cache_reads_stats_at_scrape_time():
+    """Test cache statistics are exported when metrics are collected."""
+    cache = TTLCache(maxsize=4)
+    metrics.track_cache("test", cache)
+    cache.set("k", 1, ttl=60)
+    cache.get("k")
+    cache.get("missing")
+
+    text = metrics.registry.expose()
+    assert _sample(text, 'cache_lookups_total{cache="test",result="hit"}') == 1
+    assert _sample(text, 'cache_lookups_total{cache="test",result="miss"}') == 1
+    assert _sample(text, 'cache_hit_ratio{cache="test"}') == 0.5
+    assert _sample(text, 'cache_entries{cache="test"}') == 1
+
+
+def test_track_cache_reports_bytes_of_sized_caches():
+    """Test caches capped by size also export the bytes they hold."""
+    cache = TTLCache(maxsize=4, maxbytes=100, weigh=len)
+    metrics.track_cache("sized", cache)
+    cache.set("k", b"abc", ttl=60)
+    assert _sample(metrics.registry.expose(), 'cache_bytes{cache="sized"}') == 3
+
+
+def test_metrics_endpoint_records_routes_by_template():
+    """Test requests are counted under their route template, not raw path."""
+    client.get("/health")
+    client.get("/no/such/path")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    labels = '{method="GET",route="/health",status="200"}'
+    assert _sample(text, "http_requests_total" + labels) >= 1
+    labels = '{method="GET",route="unmatched",status="404"}'
+    assert _sample(text, "http_requests_total" + labels) >= 1
+    assert 'http_request_duration_seconds_count{method="GET",route="/health"}' in text
+    # The scrape itself is still in flight while it renders
+    assert _sample(text, "http_requests_in_flight") >= 1
+    assert 'cache_hit_ratio{cache="market"}' in text
+
+
+def test_jwt_verification_is_timed_by_result():
+    """Test token checks are timed separately for cache hits and decodes."""
+    histogram = metrics.jwt_verification_duration
+    before = {
+        result: histogram.labels(result).count for result in ("decoded", "cached")
+    }
+    token = create_access_token({"sub": "metrics"})
+    decode_token(token)
+    decode_token(token)
+    assert histogram.labels("decoded").count == before["decoded"] + 1
+    assert histogram.labels("cached").count == before["cached"] + 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_requests_recorded_per_endpoint():
+    """Test CoinGecko attempts are recorded under endpoint templates."""
+
+    def handler(request):
+        if request.url.path.endswith("/coins/bitcoin"):
+            return httpx.Response(404)
+        return httpx.Response(200, json=[])
+
+    requests = metrics.upstream_requests
+    latency = metrics.upstream_duration
+    ok_before = requests.labels("/coins/categories", "200").value
+    missing_before = requests.labels("/coins/{id}", "404").value
+    timed_before = latency.labels("/coins/{id}").count
+
+    service = CoinGeckoService()
+    await service.start(transport=httpx.MockTransport(handler))
+    try:
+        await service.get_categories_async()
+        with pytest.raises(Exception):
+            await service.get_coin_details_async("bitcoin")
+    finally:
+        await service.close()
+    assert requests.labels("/coins/categories", "200").value == ok_before + 1
+    assert requests.labels("/coins/{id}", "404").value == missing_before + 1
+    assert latency.labels("/coins/{id}").count == timed_before + 1
+
+
+@pytest.mark.asyncio
+async def test_rate_governor_and_breaker_exported():
+    """Test budget, queue and breaker state are exposed as metrics."""
+    governor = RateGovernor(per_minute=60, burst=2, reserve=0)
+    breaker = CircuitBreaker(failures=1)
+    metrics.track_rate_governor(governor)
+    metrics.track_circuit_breaker(breaker)
+    await governor.acquire()
+    governor.throttle(retry_after=30)
+    breaker.record_failure()
+    breaker.allow()
+
+    text = metrics.registry.expose()
+    assert _sample(text, 'coingecko_rate_limit_acquired_total{priority="interactive"}')
+    assert _sample(text, "coingecko_rate_limit_throttled_total") == 1
+    assert _sample(text, "coingecko_rate_limit_paused_seconds") >= 30
+    assert _sample(text, 'coingecko_rate_limit_waiting{priority="background"}') == 0
+    assert _sample(text, 'coingecko_circuit_state{state="open"}') == 1
+    assert _sample(text, 'coingecko_circuit_state{state="closed"}') == 0
+    assert _sample(text, "coingecko_circuit_opened_total") == 1
+    assert _sample(text, "coingecko_circuit_short_circuited_total") == 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_retries_counted_per_endpoint():
+    """Test retried CoinGecko attempts are counted."""
+    answers = iter([httpx.Response(503), httpx.Response(200, json=[])])
+    retries = metrics.upstream_retries.labels("/coins/categories")
+    before = retries.value
+    service = CoinGeckoService()
+    await service.start(transport=httpx.MockTransport(lambda _: next(answers)))
+    try:
+        with patch.object(settings, "COINGECKO_RETRY_BACKOFF_SECONDS", 0):
+            await service.get_categories_async()
+    finally:
+        await service.close()
+    assert retries.value == before + 1
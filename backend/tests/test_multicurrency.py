@@ -0,0 +1,74 @@
+"""Test multi-currency market page merging."""
+
+from array import array
+import pytest
+from app.services.multicurrency import MergedMarkets
+
+
+def _row(coin_id, price, sparkline):
+    """Build a markets row."""
+    return {
+        "id": coin_id,
+        "symbol": coin_id[:3],
+        "name": coin_id.title(),
+        "market_cap_rank": 1,
+        "current_price": price,
+        "sparkline_in_7d": {"price": sparkline},
+    }
+
+
+def test_merge_keeps_shared_fields_once():
+    """Test identical fields are stored once and quotes per currency."""
+    merged = MergedMarkets(
+        {
+            "usd": [_row("bitcoin", 50000, [1.0, 2.0])],
+            "inr": [_row("bitcoin", 4000000, [80.0, 160.0])],
+        }
+    )
+    record = merged.records["bitcoin"]
+    assert record.shared == ("bitcoin", "bit", "Bitcoin", 1)
+    usd, inr = record.quotes
+    assert inr[0] == 4000000
+    assert inr[1] == array("d", [80.0, 160.0])
+    assert merged.get("bitcoin", "inr", "sparkline_in_7d") == {"price": [80.0, 160.0]}
+    assert merged.get("bitcoin", "usd", "name") == "Bitcoin"
+    assert merged.get("bitcoin", "usd", "missing", "n/a") == "n/a"
+
+
+def test_project_round_trips_upstream_rows():
+    """Test projecting a currency rebuilds its original rows in order."""
+    pages = {
+        "usd": [_row("bitcoin", 50000, [1.0]), _row("ethereum", 3000, [2.0])],
+        "cad": [_row("bitcoin", 68000, [1.4]), _row("ethereum", 4100, [2.7])],
+    }
+    merged = MergedMarkets(pages)
+    assert merged.project("usd") == pages["usd"]
+    assert merged.project("cad") == pages["cad"]
+    assert merged.pages() == pages
+    assert "usd" in merged
+    assert "inr" not in merged
+
+
+def test_currencies_with_different_coins():
+    """Test coins missing from one currency page are only projected elsewhere."""
+    pages = {
+        "usd": [_row("bitcoin", 50000, [1.0]), _row("ethereum", 3000, [2.0])],
+        "inr": [_row("bitcoin", 4000000, [80.0]), _row("tether", 80, [80.0])],
+    }
+    merged = MergedMarkets(pages)
+    assert [row["id"] for row in merged.project("inr")] == ["bitcoin", "tether"]
+    assert merged.project("usd") == pages["usd"]
+    assert merged.project("inr") == pages["inr"]
+    assert merged.records["tether"].quotes[0] is None
+    assert merged.get("tether", "usd", "current_price", "n/a") == "n/a"
+    assert merged.get("tether", "usd", "name") == "Tether"
+    with pytest.raises(KeyError):
+        merged.row("tether", "usd")
+
+
+def test_duplicate_ids_keep_first_position():
+    """Test a coin repeated across concatenated pages is listed once."""
+    pages = {"usd": [_row("bitcoin", 1, [1.0]), _row("bitcoin", 2, [2.0])]}
+    merged = MergedMarkets(pages)
+    assert len(merged) == 1
+    assert merged.project("usd") == [pages["usd"][0]]
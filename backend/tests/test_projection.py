@@ -0,0 +1,63 @@
+"""Test field projection and sparkline downsampling."""
+
+from array import array
+import pytest
+from app.services.compact import encode_document
+from app.services.projection import Projection, lttb, parse_fields, stride
+
+
+def test_stride_keeps_ends_evenly_spaced():
+    """Test stride sampling keeps both ends and evenly spaced points."""
+    points = [float(i) for i in range(168)]
+    thinned = stride(points, 5)
+    assert thinned == [0.0, 42.0, 84.0, 125.0, 167.0]
+    assert stride(points, 500) == points
+
+
+def test_lttb_keeps_extremes():
+    """Test LTTB keeps the ends and a spike a stride would skip."""
+    points = [1.0] * 168
+    points[50] = 100.0
+    thinned = lttb(array("d", points), 12)
+    assert len(thinned) == 12
+    assert thinned[0] == thinned[-1] == 1.0
+    assert 100.0 in thinned
+    assert 100.0 not in stride(points, 12)
+
+
+def test_parse_fields():
+    """Test comma separated field lists are split and trimmed."""
+    assert parse_fields(" id, name ,,") == ["id", "name"]
+    assert parse_fields("") is None
+    assert parse_fields(",") is None
+
+
+def test_projection_row_and_document():
+    """Test rows and compact documents keep only the requested data."""
+    projection = Projection(["current_price", "sparkline_in_7d"], 3, "stride")
+    row = {
+        "id": "bitcoin",
+        "name": "Bitcoin",
+        "current_price": 1.0,
+        "sparkline_in_7d": {"price": [1.0, 2.0, 3.0, 4.0, 5.0]},
+    }
+    assert projection.row(row) == {
+        "id": "bitcoin",
+        "current_price": 1.0,
+        "sparkline_in_7d": {"price": [1.0, 3.0, 5.0]},
+    }
+    details = encode_document(
+        {"id": "bitcoin", "market_data": {"sparkline_7d": row["sparkline_in_7d"]}}
+    )
+    projected = Projection(["market_data"], 2).document(details)
+    assert projected["market_data"]["sparkline_7d"] == {"price": [1.0, 5.0]}
+
+
+def test_projection_key_and_truthiness():
+    """Test equal parameter sets share a key and empty ones are falsy."""
+    assert not Projection()
+    assert Projection(sparkline_points=10)
+    assert Projection(["name", "id"]).key == Projection(["id", "name"]).key
+    assert Projection(sparkline_mode="stride").key == Projection().key
+    with pytest.raises(ValueError):
+        Projection(sparkline_mode="average")
@@ -0,0 +1,91 @@
+"""Test the background market refresher."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+from fastapi import HTTPException
+from app.services.coingecko import Priority, _priority
+from app.services.refresher import MarketRefresher
+
+
+def _market():
+    """Build a mocked market service."""
+    market = MagicMock()
+    market.refresh_coin_index = AsyncMock()
+    market.refresh_categories = AsyncMock(return_value=[])
+    market.refresh_coin_search = AsyncMock()
+    market.purge_shared = AsyncMock(return_value=0)
+    return market
+
+
+@pytest.mark.asyncio
+async def test_refresh_once_covers_hot_datasets():
+    """Test the coin index, category list and coin search are refreshed."""
+    market = _market()
+    refresher = MarketRefresher(market=market)
+    assert await refresher.refresh_once() == 0
+    market.refresh_coin_index.assert_awaited_once()
+    market.refresh_categories.assert_awaited_once()
+    market.refresh_coin_search.assert_awaited_once()
+    market.purge_shared.assert_awaited_once()
+    assert refresher.runs == 1
+
+
+@pytest.mark.asyncio
+async def test_coin_search_built_from_refreshed_index():
+    """Test the coin search is rebuilt only after the coin index is replaced."""
+    market = _market()
+    calls = []
+
+    async def refresh_index():
+        await asyncio.sleep(0.01)
+        calls.append("index")
+
+    async def refresh_search():
+        calls.append("search")
+
+    market.refresh_coin_index.side_effect = refresh_index
+    market.refresh_coin_search.side_effect = refresh_search
+    await MarketRefresher(market=market).refresh_once()
+    assert calls == ["index", "search"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_runs_at_background_priority():
+    """Test refresh fetches are marked as background upstream work."""
+    market = _market()
+    seen = []
+
+    async def record():
+        seen.append(_priority.get())
+
+    market.refresh_coin_index.side_effect = record
+    market.refresh_categories.side_effect = record
+    await MarketRefresher(market=market).refresh_once()
+    assert seen == [Priority.BACKGROUND, Priority.BACKGROUND]
+    assert _priority.get() is Priority.INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_refresh_once_counts_failures():
+    """Test failed datasets are counted without aborting the others."""
+    market = _market()
+    market.refresh_categories.side_effect = HTTPException(status_code=503)
+    refresher = MarketRefresher(market=market)
+    assert await refresher.refresh_once() == 1
+    assert refresher.failures == 1
+    market.refresh_coin_index.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_start_and_stop_loop():
+    """Test the loop refreshes on its interval until stopped."""
+    market = _market()
+    refresher = MarketRefresher(market=market, interval=0.01)
+    refresher.start()
+    assert refresher.is_running
+    await asyncio.sleep(0.05)
+    await refresher.stop()
+    assert not refresher.is_running
+    assert refresher.runs >= 2
+    await refresher.stop()
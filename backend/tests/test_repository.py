@@ -0,0 +1,269 @@
+"""Test snapshot persistence against SQLite."""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base, async_url
+from app.db.models import CachedCategory, CachedCoin, PriceCandle
+from app.db.repository import CoinReader, HistoryStore, SnapshotStore, _now
+
+
+def _coin(coin_id, rank, price):
+    """Build a markets row."""
+    return {
+        "id": coin_id,
+        "symbol": coin_id[:3],
+        "name": coin_id.title(),
+        "image": f"https://example.com/{coin_id}.png",
+        "current_price": price,
+        "market_cap": price * 1000,
+        "market_cap_rank": rank,
+        "price_change_percentage_24h": 1.5,
+    }
+
+
+def _age_rows(session_factory, model, seconds):
+    """Move every row's ``updated_at`` into the past."""
+    with session_factory() as session:
+        session.execute(
+            update(model).values(updated_at=_now() - timedelta(seconds=seconds))
+        )
+        session.commit()
+
+
+def test_save_and_load_coins_market(session_factory):
+    """Test a saved page is read back in rank order."""
+    store = SnapshotStore(session_factory)
+    rows = [_coin("bitcoin", 1, 50000), _coin("ethereum", 2, 3000)]
+    store.save_coins_market("usd", rows)
+    assert store.load_coins_market("usd", 1, 2, max_age=60) == rows
+    with session_factory() as session:
+        bitcoin = session.get(CachedCoin, "bitcoin")
+        assert bitcoin.current_price_usd == 50000
+        assert bitcoin.market_cap == 50000000
+        assert bitcoin.updated_at is not None
+
+
+def test_upsert_merges_currencies(session_factory):
+    """Test saving another currency updates rows without losing the first."""
+    store = SnapshotStore(session_factory)
+    store.save_coins_market("usd", [_coin("bitcoin", 1, 50000)])
+    store.save_coins_market("inr", [_coin("bitcoin", 1, 4000000)])
+    with session_factory() as session:
+        bitcoin = session.get(CachedCoin, "bitcoin")
+        assert bitcoin.current_price_usd == 50000
+        assert bitcoin.current_price_inr == 4000000
+        assert set(bitcoin.market_data) == {"usd", "inr"}
+    assert store.load_coins_market("inr", 1, 1, max_age=60)[0]["current_price"] == (
+        4000000
+    )
+
+
+def test_load_coins_market_requires_complete_fresh_page(session_factory):
+    """Test partial, missing-currency or stale pages are treated as misses."""
+    store = SnapshotStore(session_factory)
+    store.save_coins_market("usd", [_coin("bitcoin", 1, 50000)])
+    assert store.load_coins_market("usd", 1, 2, max_age=60) is None
+    assert store.load_coins_market("cad", 1, 1, max_age=60) is None
+    _age_rows(session_factory, CachedCoin, 120)
+    assert store.load_coins_market("usd", 1, 1, max_age=60) is None
+
+
+def test_merged_currencies_keep_their_own_age(session_factory, monkeypatch):
+    """Test writing one currency does not make another row's old quote fresh."""
+    store = SnapshotStore(session_factory)
+    written = _now() - timedelta(hours=2)
+    monkeypatch.setattr("app.db.repository._now", lambda: written)
+    store.save_coins_market("inr", [_coin("bitcoin", 1, 4000000)])
+    monkeypatch.undo()
+    store.save_coins_market("eur", [_coin("bitcoin", 1, 45000)])
+    assert store.load_coins_market("eur", 1, 1, max_age=60) is not None
+    assert store.load_coins_market("inr", 1, 1, max_age=60) is None
+    assert store.load_coins_markets(["eur", "inr"], 1, 1, max_age=60) is None
+    assert store.load_coins_market("inr", 1, 1, max_age=3 * 3600) is not None
+
+
+def test_unknown_currency_keeps_payload_only(session_factory):
+    """Test currencies without a price column are still persisted as JSON."""
+    store = SnapshotStore(session_factory)
+    store.save_coins_market("eur", [_coin("bitcoin", 1, 45000)])
+    assert store.load_coins_market("eur", 1, 1, max_age=60)[0]["current_price"] == (
+        45000
+    )
+
+
+def test_save_and_load_categories(session_factory):
+    """Test categories are replaced as a whole and read back in upstream order."""
+    store = SnapshotStore(session_factory)
+    store.save_categories(
+        [
+            {"id": "gaming", "name": "Gaming", "market_cap": 10},
+            {"id": "defi", "name": "DeFi", "market_cap": 50, "volume_24h": 5},
+        ]
+    )
+    store.save_categories(
+        [
+            {"id": "defi", "name": "DeFi", "market_cap": 60, "volume_24h": 6},
+            {"id": "layer-1", "name": "Layer 1", "market_cap": 90},
+        ]
+    )
+    rows = store.load_categories(max_age=60)
+    assert [row["id"] for row in rows] == ["defi", "layer-1"]
+    assert rows[0]["volume_24h"] == 6
+    with session_factory() as session:
+        assert session.get(CachedCategory, "defi").market_cap == 60
+    _age_rows(session_factory, CachedCategory, 120)
+    assert store.load_categories(max_age=60) is None
+
+
+def test_categories_round_trip_upstream_rows(session_factory):
+    """Test stored categories keep every upstream field unchanged."""
+    store = SnapshotStore(session_factory)
+    rows = [
+        {
+            "id": "layer-1",
+            "name": "Layer 1 (L1)",
+            "market_cap": 2.1e12,
+            "market_cap_change_24h": -1.25,
+            "content": "",
+            "top_3_coins_id": ["bitcoin", "ethereum", "binancecoin"],
+            "top_3_coins": ["https://example.com/bitcoin.png"],
+            "volume_24h": 6.4e10,
+            "updated_at": "2024-01-01T00:00:00.000Z",
+        },
+        {
+            "id": "smart-contract-platform",
+            "name": "Smart Contracts",
+            "market_cap": 3e12,
+        },
+    ]
+    store.save_categories(rows)
+    assert store.load_categories(max_age=60) == rows
+
+
+def test_empty_snapshots(session_factory):
+    """Test empty inputs are ignored and empty tables read as misses."""
+    store = SnapshotStore(session_factory)
+    store.save_coins_market("usd", [])
+    store.save_categories([])
+    assert store.load_categories(max_age=60) is None
+
+
+def test_save_and_load_multiple_currencies(session_factory):
+    """Test one upsert stores every currency and reads back per currency."""
+    store = SnapshotStore(session_factory)
+    pages = {
+        "inr": [_coin("bitcoin", 1, 4000000)],
+        "usd": [_coin("bitcoin", 1, 50000)],
+    }
+    store.save_coins_markets(pages)
+    with session_factory() as session:
+        bitcoin = session.get(CachedCoin, "bitcoin")
+        assert bitcoin.current_price_inr == 4000000
+        assert bitcoin.current_price_usd == 50000
+    assert store.load_coins_markets(["inr", "usd"], 1, 1, max_age=60) == pages
+    assert store.load_coins_markets(["inr", "cad"], 1, 1, max_age=60) is None
+
+
+def test_currency_pages_with_different_coins(session_factory):
+    """Test a coin missing from one currency page keeps its stored quote."""
+    store = SnapshotStore(session_factory)
+    store.save_coins_market("usd", [_coin("bitcoin", 1, 50000)])
+    store.save_coins_markets(
+        {
+            "inr": [_coin("bitcoin", 1, 4000000), _coin("ethereum", 2, 250000)],
+            "usd": [_coin("bitcoin", 1, 51000), _coin("tether", 2, 1)],
+        }
+    )
+    with session_factory() as session:
+        bitcoin = session.get(CachedCoin, "bitcoin")
+        assert bitcoin.current_price_usd == 51000
+        assert bitcoin.current_price_inr == 4000000
+        ethereum = session.get(CachedCoin, "ethereum")
+        assert ethereum.current_price_inr == 250000
+        assert ethereum.current_price_usd is None
+        assert ethereum.market_cap is None
+        tether = session.get(CachedCoin, "tether")
+        assert tether.current_price_usd == 1
+        assert tether.current_price_inr is None
+        assert tether.market_cap == 1000
+
+
+def test_history_rolls_points_up_into_candles(session_factory):
+    """Test points merge into OHLC candles at every resolution."""
+    store = HistoryStore(session_factory)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for minutes, price in ((0, 100.0), (1, 120.0), (2, 90.0), (6, 110.0)):
+        written = store.append(
+            [("bitcoin", "usd", price), ("ethereum", "usd", None)],
+            at=start + timedelta(minutes=minutes),
+        )
+        assert written == 4
+    now = start + timedelta(minutes=10)
+    epoch_ms = int(start.timestamp()) * 1000
+    assert store.load("bitcoin", "usd", "1d", at=now) == [
+        [epoch_ms, 100.0, 120.0, 90.0, 90.0],
+        [epoch_ms + 300_000, 110.0, 110.0, 110.0, 110.0],
+    ]
+    assert store.load("bitcoin", "usd", "1y", at=now) == [
+        [epoch_ms, 100.0, 120.0, 90.0, 110.0]
+    ]
+    assert store.load("ethereum", "usd", "1d", at=now) == []
+    assert store.load("bitcoin", "inr", "1d", at=now) == []
+
+
+def test_history_prunes_candles_past_their_range(session_factory):
+    """Test old candles are dropped per resolution on write."""
+    store = HistoryStore(session_factory)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    store.append([("bitcoin", "usd", 100.0)], at=start)
+    later = start + timedelta(days=2)
+    store.append([("bitcoin", "usd", 200.0)], at=later)
+    assert [candle[1] for candle in store.load("bitcoin", "usd", "1d", at=later)] == [
+        200.0
+    ]
+    assert [candle[1] for candle in store.load("bitcoin", "usd", "7d", at=later)] == [
+        100.0,
+        200.0,
+    ]
+    with session_factory() as session:
+        assert session.query(PriceCandle).count() == 7
+    assert store.append([]) == 0
+
+
+@pytest.fixture
+def coin_db_url(tmp_path):
+    """Create a SQLite file holding three coins saved through the sync path."""
+    url = f"sqlite:///{tmp_path / 'coins.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    SnapshotStore(sessionmaker(bind=engine)).save_coins_market(
+        "usd",
+        [
+            _coin("bitcoin", 1, 50000),
+            _coin("ethereum", 2, 3000),
+            _coin("tether", 3, 1),
+        ],
+    )
+    engine.dispose()
+    return url
+
+
+@pytest.mark.asyncio
+async def test_coin_reader_bulk_reads(coin_db_url):
+    """Test async bulk reads by id list, symbol and rank range."""
+    engine = create_async_engine(async_url(coin_db_url))
+    reader = CoinReader(async_sessionmaker(engine, expire_on_commit=False))
+    try:
+        coins = await reader.by_ids(["tether", "missing", "bitcoin", "tether"])
+        assert [coin.id for coin in coins] == ["tether", "bitcoin"]
+        assert coins[1].current_price_usd == 50000
+        assert await reader.by_ids([]) == []
+        coins = await reader.by_symbols(["ETH", "bit"])
+        assert [coin.id for coin in coins] == ["bitcoin", "ethereum"]
+        coins = await reader.by_rank(2, 3)
+        assert [coin.market_cap_rank for coin in coins] == [2, 3]
+    finally:
+        await engine.dispose()
@@ -0,0 +1,126 @@
+"""Test pre-serialized JSON responses."""
+
+import asyncio
+import gzip
+import time
+from unittest.mock import MagicMock, patch
+import brotli
+import orjson
+import pytest
+from app.core.responses import (
+    COMPRESSORS,
+    Payload,
+    _etag_matches,
+    negotiate,
+    payload_response,
+)
+
+
+def _request(if_none_match=None, accept_encoding=None):
+    """Build a request stub carrying optional conditional and coding headers."""
+    request = MagicMock()
+    request.headers = {}
+    if if_none_match is not None:
+        request.headers["if-none-match"] = if_none_match
+    if accept_encoding is not None:
+        request.headers["accept-encoding"] = accept_encoding
+    return request
+
+
+def test_payload_etag_follows_content():
+    """Test equal content shares a strong ETag and changed content does not."""
+    first = Payload.encode([{"id": "bitcoin", "price": 1.5}])
+    assert orjson.loads(first.body) == [{"id": "bitcoin", "price": 1.5}]
+    assert first.etag == Payload.encode([{"id": "bitcoin", "price": 1.5}]).etag
+    assert first.etag != Payload.encode([{"id": "bitcoin", "price": 2.0}]).etag
+    assert first.etag.startswith('"') and first.etag.endswith('"')
+
+
+def test_etag_matching():
+    """Test If-None-Match lists, weak tags and wildcards."""
+    assert _etag_matches('"a", "b"', '"b"')
+    assert _etag_matches('W/"b"', '"b"')
+    assert _etag_matches("*", '"b"')
+    assert not _etag_matches('"a"', '"b"')
+    assert not _etag_matches(None, '"b"')
+
+
+@pytest.mark.asyncio
+async def test_payload_response():
+    """Test bodies are served as JSON and matching tags get a 304."""
+    payload = Payload.encode({"id": "bitcoin"})
+    response = await payload_response(_request(), payload)
+    assert response.status_code == 200
+    assert response.body == payload.body
+    assert response.headers["etag"] == payload.etag
+    assert response.media_type == "application/json"
+    not_modified = await payload_response(_request(payload.etag), payload)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["etag"] == payload.etag
+
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding preferences, q values and wildcards."""
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("br;q=0.5, gzip") == "gzip"
+    assert negotiate("br;q=0, *") == "gzip"
+    assert negotiate("*;q=0.1") == "br"
+    assert negotiate("identity") is None
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("gzip;q=oops") is None
+    assert negotiate(None) is None
+
+
+@pytest.mark.asyncio
+async def test_compressed_variants_made_once():
+    """Test large bodies are compressed per coding once, with their own tags."""
+    payload = Payload.encode([{"id": f"coin-{n}", "price": 1.5} for n in range(100)])
+    response = await payload_response(_request(accept_encoding="gzip, br"), payload)
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == payload.etag_for("br") != payload.etag
+    assert brotli.decompress(response.body) == payload.body
+    assert payload.compress("br") is payload.variants["br"]
+    response = await payload_response(_request(accept_encoding="gzip"), payload)
+    assert gzip.decompress(response.body) == payload.body
+    assert set(payload.variants) == {"br", "gzip"}
+    plain = await payload_response(_request(), payload)
+    assert "content-encoding" not in plain.headers
+    assert plain.body == payload.body
+    not_modified = await payload_response(
+        _request(payload.etag, accept_encoding="gzip"), payload
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == payload.etag_for("gzip")
+
+
+@pytest.mark.asyncio
+async def test_small_bodies_are_not_compressed():
+    """Test bodies under COMPRESSION_MIN_BYTES are always sent as is."""
+    payload = Payload.encode({"id": "bitcoin"})
+    response = await payload_response(_request(accept_encoding="br"), payload)
+    assert "content-encoding" not in response.headers
+    assert not payload.variants
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_requests_compress_once():
+    """Test requests racing for a new variant share one compression."""
+    payload = Payload.encode([{"id": f"coin-{n}", "price": 1.5} for n in range(100)])
+    calls = []
+    compress = COMPRESSORS["gzip"]
+
+    def slow_compress(body):
+        calls.append(body)
+        time.sleep(0.05)
+        return compress(body)
+
+    request = _request(accept_encoding="gzip")
+    with patch.dict(COMPRESSORS, {"gzip": slow_compress}):
+        responses = await asyncio.gather(
+            *(payload_response(request, payload) for _ in range(10))
+        )
+    assert len(calls) == 1
+    assert {response.body for response in responses} == {payload.variants["gzip"]}
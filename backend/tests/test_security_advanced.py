@@ -1,19 +1,30 @@
 """Advanced security tests."""
 
 from datetime import timedelta
+from unittest.mock import patch
 from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
 import pytest
-from app.core.security import create_access_token, verify_token
+from app.core.security import (
+    _token_key,
+    create_access_token,
+    RevokedTokens,
+    revoke_token,
+    revoked_tokens,
+    verified_tokens,
+    verify_token,
+)
 
 
-def test_verify_token_invalid():
+@pytest.mark.asyncio
+async def test_verify_token_invalid():
     """Test token verification with invalid token."""
     invalid_creds = HTTPAuthorizationCredentials(
         scheme="Bearer", credentials="invalid_token_here"
     )
     with pytest.raises(HTTPException) as exc_info:
-        verify_token(invalid_creds)
+        await verify_token(invalid_creds)
     assert exc_info.value.status_code == 401
 
 
@@ -22,3 +33,71 @@ def test_create_token_with_custom_expiry():
     data = {"sub": "testuser"}
     token = create_access_token(data, expires_delta=timedelta(minutes=60))
     assert token is not None
+
+
+def _credentials(token):
+    """Wrap ``token`` as bearer credentials."""
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.mark.asyncio
+async def test_verified_tokens_are_cached():
+    """Test a token is decoded once and then served from the cache."""
+    token = create_access_token({"sub": "cached"})
+    with patch("app.core.security.jwt.decode", wraps=jwt.decode) as decode:
+        first = await verify_token(_credentials(token))
+        second = await verify_token(_credentials(token))
+    assert first == second
+    assert first["sub"] == "cached"
+    assert decode.call_count == 1
+    assert token.encode() not in verified_tokens._data
+
+
+@pytest.mark.asyncio
+async def test_cached_tokens_expire_with_the_token():
+    """Test the cache entry lives exactly until the token's exp claim."""
+    token = create_access_token({"sub": "short"}, expires_delta=timedelta(seconds=30))
+    claims = await verify_token(_credentials(token))
+    entry = verified_tokens.lookup(_token_key(token))
+    assert entry.expires_at == pytest.approx(claims["exp"], abs=1)
+    with (
+        patch.object(verified_tokens, "_clock", return_value=claims["exp"] + 1),
+        patch("app.core.security.jwt.decode", return_value=claims) as decode,
+    ):
+        await verify_token(_credentials(token))
+    decode.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_revoked_tokens_are_rejected():
+    """Test revocation drops a cached token and rejects it afterwards."""
+    token = create_access_token({"sub": "revoked"})
+    await verify_token(_credentials(token))
+    revoke_token(token)
+    with pytest.raises(HTTPException) as exc_info:
+        await verify_token(_credentials(token))
+    assert exc_info.value.status_code == 401
+    revoke_token("not-a-token")
+
+
+def test_revocations_are_never_evicted():
+    """Test revocations outlive any cache size and end with the token."""
+    now = [1000.0]
+    revoked = RevokedTokens(clock=lambda: now[0])
+    for number in range(10000):
+        revoked.add(str(number).encode(), 1060.0)
+    revoked.add(b"later", 2000.0)
+    assert b"0" in revoked
+    assert len(revoked) == 10001
+    now[0] = 1061.0
+    assert b"0" not in revoked
+    assert b"later" in revoked
+    assert len(revoked) == 1
+
+
+def test_revoke_token_keeps_it_until_exp():
+    """Test a revoked token is remembered until exactly its exp claim."""
+    token = create_access_token({"sub": "gone"}, expires_delta=timedelta(seconds=30))
+    revoke_token(token)
+    exp = jwt.get_unverified_claims(token)["exp"]
+    assert revoked_tokens._expiry[_token_key(token)] == exp
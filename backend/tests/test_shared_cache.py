@@ -0,0 +1,120 @@
+"""Test the host-wide shared snapshot cache."""
+
+import os
+import time
+from unittest.mock import patch
+from app.core.shared_cache import SharedBackend, SharedCache
+
+
+def test_set_and_get_across_instances(tmp_path):
+    """Test a snapshot written by one process is read by another."""
+    writer = SharedCache.from_directory(str(tmp_path / "shared"))
+    reader = SharedCache.from_directory(str(tmp_path / "shared"))
+    assert reader.get(("categories",), 60) is None
+    writer.set(("categories",), [{"id": "defi", "market_cap": 1.5}])
+    assert reader.get(("categories",), 60) == [{"id": "defi", "market_cap": 1.5}]
+    assert reader.get(("coins_market", "usd", 1, 10), 60) is None
+    assert reader.info() == {
+        "leader": False,
+        "hits": 1,
+        "misses": 2,
+        "writes": 0,
+        "purged": 0,
+    }
+    assert writer.info()["writes"] == 1
+
+
+def test_expired_snapshot_is_a_miss(tmp_path):
+    """Test snapshots older than ``max_age`` are not served."""
+    cache = SharedCache.from_directory(str(tmp_path))
+    with patch("app.core.shared_cache.time.time", return_value=time.time() - 100):
+        cache.set("key", {"id": "bitcoin"})
+    assert cache.get("key", 60) is None
+    assert cache.get("key", 120) == {"id": "bitcoin"}
+
+
+def test_corrupt_snapshot_is_a_miss(tmp_path):
+    """Test empty or truncated files are treated as missing."""
+    cache = SharedCache.from_directory(str(tmp_path))
+    cache.set("key", [1, 2, 3])
+    path = cache.backend.directory / cache._name("key")
+    path.write_bytes(b"")
+    assert cache.get("key", 60) is None
+    path.write_bytes(b"\x00" * 8 + b"[1,")
+    assert cache.get("key", 60) is None
+
+
+def test_purge_deletes_old_snapshots(tmp_path):
+    """Test old snapshots and abandoned temporary files are deleted."""
+    cache = SharedCache.from_directory(str(tmp_path))
+    assert cache.purge(60) == 0
+    assert cache.acquire_leadership()
+    with patch("app.core.shared_cache.time.time", return_value=time.time() - 100):
+        cache.set(("coin_details", "bitcoin"), {"id": "bitcoin"})
+    old = tmp_path / cache._name(("coin_details", "bitcoin"))
+    abandoned = tmp_path / "abandoned.tmp"
+    abandoned.write_bytes(b"partial")
+    for path in (old, abandoned, tmp_path / "refresher.lock"):
+        os.utime(path, (time.time() - 100, time.time() - 100))
+    cache.set(("categories",), [{"id": "defi"}])
+    assert cache.purge(60) == 2
+    assert not old.exists() and not abandoned.exists()
+    assert cache.get(("categories",), 60) == [{"id": "defi"}]
+    assert cache.is_leader and (tmp_path / "refresher.lock").exists()
+    assert cache.info()["purged"] == 2
+    cache.release_leadership()
+
+
+def test_one_leader_per_directory(tmp_path):
+    """Test only one process at a time holds refresher leadership."""
+    first = SharedCache.from_directory(str(tmp_path))
+    second = SharedCache.from_directory(str(tmp_path))
+    assert first.acquire_leadership()
+    assert first.acquire_leadership()
+    assert not second.acquire_leadership()
+    first.release_leadership()
+    assert not first.is_leader
+    assert second.acquire_leadership()
+    second.release_leadership()
+
+
+class DictBackend(SharedBackend):
+    """Stand-in for a network store such as Redis."""
+
+    def __init__(self):
+        self.data = {}
+        self.leader = None
+
+    def read(self, name):
+        return self.data.get(name)
+
+    def write(self, name, data):
+        self.data[name] = bytes(data)
+
+    def acquire_leadership(self):
+        self.leader = self.leader or self
+        return self.leader is self
+
+    def release_leadership(self):
+        self.leader = None
+
+    @property
+    def is_leader(self):
+        return self.leader is self
+
+
+def test_pluggable_backend():
+    """Test any byte store implementing the backend interface can be used."""
+    cache = SharedCache(DictBackend())
+    cache.set(("categories",), [{"id": "defi"}])
+    assert cache.get(("categories",), 60) == [{"id": "defi"}]
+    assert cache.acquire_leadership() and cache.is_leader
+    cache.release_leadership()
+    assert cache.info() == {
+        "leader": False,
+        "hits": 1,
+        "misses": 0,
+        "writes": 1,
+        "purged": 0,
+    }
+    assert cache.purge(0) == 0
@@ -0,0 +1,72 @@
+"""Test request coalescing."""
+
+import asyncio
+import pytest
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test concurrent callers for one key share a single result."""
+    flights = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"id": "bitcoin"}
+
+    results = await asyncio.gather(*(flights.do("k", fetch) for _ in range(20)))
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flights.info() == {"executions": 1, "coalesced": 19, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared():
+    """Test every waiter receives the leader's exception."""
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(flights.do("k", fail) for _ in range(5)), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.executions == 1
+
+
+@pytest.mark.asyncio
+async def test_distinct_keys_run_independently():
+    """Test different keys are not coalesced and finished keys run again."""
+    flights = SingleFlight()
+
+    async def fetch():
+        return 1
+
+    await asyncio.gather(flights.do("a", fetch), flights.do("b", fetch))
+    await flights.do("a", fetch)
+    assert flights.executions == 3
+    assert flights.coalesced == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_work():
+    """Test cancelling the first caller leaves the fetch running for others."""
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flights.do("k", fetch))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(flights.do("k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == "done"
@@ -0,0 +1,161 @@
+"""Test price streaming."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from app.main import app
+from app.services.streaming import PriceStreamer, StreamKey, _diff, price_streamer
+
+client = TestClient(app)
+
+
+def _market(rows):
+    """Build a market service mock serving ``rows`` as a single page."""
+    market = MagicMock()
+
+    async def page(currency, page, per_page, projection=None):
+        return [projection.row(row) for row in rows]
+
+    market.get_coins_market = AsyncMock(side_effect=page)
+    return market
+
+
+def _messages(subscription):
+    """Drain and decode the queued messages of ``subscription``."""
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(orjson.loads(subscription.queue.get_nowait()))
+    return messages
+
+
+def test_diff_sends_changed_fields_removals_and_order():
+    """Test diffs carry only what changed."""
+    old = {"a": {"id": "a", "price": 1}, "b": {"id": "b", "price": 2}}
+    assert _diff(old, dict(old)) is None
+    new = {"c": {"id": "c", "price": 3}, "a": {"id": "a", "price": 1.5}}
+    assert _diff(old, new) == {
+        "type": "diff",
+        "changed": [{"id": "c", "price": 3}, {"id": "a", "price": 1.5}],
+        "removed": ["b"],
+        "order": ["c", "a"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_subscribers_share_one_fetch_per_poll():
+    """Test subscribers of one stream share fetches and receive diffs."""
+    rows = [{"id": "bitcoin", "current_price": 1.0, "image": "btc.png"}]
+    market = _market(rows)
+    streamer = PriceStreamer(market=market, interval=60)
+    key = StreamKey(currency="usd")
+    first = await streamer.subscribe(key)
+    second = await streamer.subscribe(key)
+    try:
+        snapshot = {
+            "type": "snapshot",
+            "data": [{"id": "bitcoin", "current_price": 1.0}],
+        }
+        assert _messages(first) == [snapshot]
+        assert _messages(second) == [snapshot]
+
+        rows[0] = {**rows[0], "current_price": 2.0}
+        await streamer.poll_once()
+        await streamer.poll_once()
+        diff = {
+            "type": "diff",
+            "changed": [{"id": "bitcoin", "current_price": 2.0}],
+            "removed": [],
+        }
+        assert _messages(first) == [diff]
+        assert _messages(second) == [diff]
+        assert market.get_coins_market.await_count == 3
+        assert streamer.info()["subscribers"] == 2
+    finally:
+        streamer.unsubscribe(first)
+        streamer.unsubscribe(second)
+        await streamer.stop()
+    assert streamer.info()["streams"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_resynced_with_snapshot():
+    """Test a full queue is replaced by a snapshot instead of blocking."""
+    rows = [{"id": "bitcoin", "current_price": 1.0}]
+    streamer = PriceStreamer(market=_market(rows), interval=60, queue_size=2)
+    subscription = await streamer.subscribe(StreamKey(currency="usd"))
+    try:
+        for price in (2.0, 3.0, 4.0):
+            rows[0] = {"id": "bitcoin", "current_price": price}
+            await streamer.poll_once()
+        # The 3.0 diff did not fit behind the snapshot and the 2.0 diff
+        assert _messages(subscription) == [
+            {"type": "snapshot", "data": [{"id": "bitcoin", "current_price": 3.0}]},
+            {
+                "type": "diff",
+                "changed": [{"id": "bitcoin", "current_price": 4.0}],
+                "removed": [],
+            },
+        ]
+        assert streamer.resyncs == 1
+    finally:
+        streamer.unsubscribe(subscription)
+        await streamer.stop()
+
+
+@pytest.mark.asyncio
+async def test_poll_failures_keep_last_state():
+    """Test a failed poll leaves subscribers on their last state."""
+    rows = [{"id": "bitcoin", "current_price": 1.0}]
+    market = _market(rows)
+    streamer = PriceStreamer(market=market, interval=60)
+    subscription = await streamer.subscribe(StreamKey(currency="usd"))
+    try:
+        _messages(subscription)
+        market.get_coins_market.side_effect = RuntimeError("down")
+        await streamer.poll_once()
+        assert _messages(subscription) == []
+    finally:
+        streamer.unsubscribe(subscription)
+        await streamer.stop()
+
+
+def test_stream_rejects_missing_or_invalid_token():
+    """Test the JWT is checked before the WebSocket is accepted."""
+    for url in ("/api/stream", "/api/stream?token=invalid"):
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect(url):
+                pass
+        assert exc_info.value.code == 1008
+
+
+def test_stream_sends_snapshot_for_coin_ids(auth_headers):
+    """Test a coin ids subscription starts with a snapshot."""
+    batch = AsyncMock(
+        return_value={"data": {"bitcoin": {"id": "bitcoin", "current_price": 1.0}}}
+    )
+    with (
+        patch.object(price_streamer.market, "get_coins_batch", batch),
+        patch.object(price_streamer, "interval", 3600),
+    ):
+        with client.websocket_connect(
+            "/api/stream?ids=BITCOIN&vs_currency=usd", headers=auth_headers
+        ) as websocket:
+            message = websocket.receive_json()
+    assert message == {
+        "type": "snapshot",
+        "data": [{"id": "bitcoin", "current_price": 1.0}],
+    }
+    assert batch.await_args.args[:3] == (["bitcoin"], "usd", "market")
+    assert price_streamer.info()["subscribers"] == 0
+
+
+def test_stream_rejects_invalid_subscription(auth_headers):
+    """Test out of range subscriptions are refused."""
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect(
+            "/api/stream?per_page=500", headers=auth_headers
+        ) as websocket:
+            websocket.receive_json()
+    assert exc_info.value.code == 1008
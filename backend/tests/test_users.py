@@ -0,0 +1,106 @@
+"""Test the user store."""
+
+import threading
+from unittest.mock import patch
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core import security
+from app.db.models import User
+from app.services.users import UserService
+
+
+@pytest.fixture
+def users(session_factory):
+    """Create a user service on an empty SQLite database."""
+    return UserService(session_factory)
+
+
+@pytest.mark.asyncio
+async def test_create_and_authenticate(users):
+    """Test created users authenticate with their password only."""
+    user = await users.create("alice", "s3cret")
+    assert user.hashed_password != "s3cret"
+    assert (await users.authenticate("alice", "s3cret")).id == user.id
+    assert await users.authenticate("alice", "wrong") is None
+    assert await users.authenticate("bob", "s3cret") is None
+
+
+@pytest.mark.asyncio
+async def test_inactive_users_rejected(users, session_factory):
+    """Test deactivated users cannot log in."""
+    await users.create("alice", "s3cret")
+    with session_factory() as session:
+        session.query(User).update({User.is_active: False})
+        session.commit()
+    assert await users.authenticate("alice", "s3cret") is None
+
+
+@pytest.mark.asyncio
+async def test_ensure_is_idempotent(users):
+    """Test ensuring an existing user keeps it unchanged."""
+    first = await users.ensure("admin", "one")
+    second = await users.ensure("admin", "two")
+    assert first.id == second.id
+    assert await users.authenticate("admin", "one") is not None
+
+
+@pytest.mark.asyncio
+async def test_password_checks_run_in_password_pool(users):
+    """Test bcrypt runs on the password pool, not the event loop thread."""
+    await users.create("alice", "s3cret")
+    threads = []
+
+    def verify(plain, hashed):
+        threads.append(threading.current_thread().name)
+        return True
+
+    with patch.object(security, "verify_password", verify):
+        await users.authenticate("alice", "s3cret")
+    assert threads[0].startswith("password")
+
+
+@pytest.mark.asyncio
+async def test_start_creates_table_and_placeholder():
+    """Test starting on an empty database creates the users table."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    users = UserService(sessionmaker(bind=engine))
+    await users.start()
+    assert inspect(engine).has_table("users")
+    assert users._placeholder_hash is not None
+    assert await users.authenticate("nobody", "s3cret") is None
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_unknown_users_check_placeholder_in_password_pool(users):
+    """Test the first unknown-user login hashes off the event loop."""
+    threads = []
+    hash_password = security.get_password_hash
+
+    def record(password):
+        threads.append(threading.current_thread().name)
+        return hash_password(password)
+
+    with patch.object(security, "get_password_hash", record):
+        assert await users.authenticate("nobody", "s3cret") is None
+    assert threads and threads[0].startswith("password")
+
+
+@pytest.mark.asyncio
+async def test_database_errors_are_unavailable():
+    """Test a failing database answers 503 rather than an unhandled error."""
+
+    def broken():
+        raise OperationalError("SELECT 1", {}, Exception("down"))
+
+    users = UserService(broken)
+    await users.start()
+    with pytest.raises(HTTPException) as exc_info:
+        await users.authenticate("alice", "s3cret")
+    assert exc_info.value.status_code == 503